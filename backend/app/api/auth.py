@@ -1,55 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.db_schema.user import User
 from app.dependencies import get_db
-from passlib.context import CryptContext
 from app.models.user import UserCreate,TokenResponse,UserPasswordChange
 from app.utils.audit_logs import log_action
 from app.utils.jwt import create_access_token
 from app.services.auth_middleware import get_current_admin_user,get_current_user
+from app.services.password_hasher import password_hasher, HasherSaturated
+from app.services.rate_limiter import RateLimiter, client_ip
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm.attributes import flag_modified
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# failed logins per client IP, failed password checks per (username, client IP),
+# and failed password checks per username from anywhere. The tight lockout is
+# keyed on the pair so that someone who only knows a clinician's username can
+# lock out their own address, not the clinician's; the per-username limit is
+# much looser and caps guessing one account's password from many addresses.
+LOGIN_IP_LIMIT = int(os.getenv("LOGIN_IP_LIMIT", "30"))
+LOGIN_IP_WINDOW = float(os.getenv("LOGIN_IP_WINDOW", "60"))
+LOGIN_ATTEMPT_LIMIT = int(os.getenv("LOGIN_ATTEMPT_LIMIT", "5"))
+LOGIN_ATTEMPT_WINDOW = float(os.getenv("LOGIN_ATTEMPT_WINDOW", "300"))
+LOGIN_USERNAME_LIMIT = int(os.getenv("LOGIN_USERNAME_LIMIT", "50"))
+LOGIN_USERNAME_WINDOW = float(os.getenv("LOGIN_USERNAME_WINDOW", "900"))
+PASSWORD_HASH_RETRY_AFTER = os.getenv("PASSWORD_HASH_RETRY_AFTER", "2")
+
+ip_limiter = RateLimiter(LOGIN_IP_LIMIT, LOGIN_IP_WINDOW)
+attempt_limiter = RateLimiter(LOGIN_ATTEMPT_LIMIT, LOGIN_ATTEMPT_WINDOW)
+username_limiter = RateLimiter(LOGIN_USERNAME_LIMIT, LOGIN_USERNAME_WINDOW)
+
+
+def too_many_attempts(retry_after: float) -> HTTPException:
+    return HTTPException(status_code=429, detail="Too many attempts, try again later",
+                         headers={"Retry-After": str(math.ceil(retry_after))})
+
+def hasher_busy(e: HasherSaturated) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": PASSWORD_HASH_RETRY_AFTER})
+
 
 @router.post("/register")
-def register_user(data:UserCreate , db: Session = Depends(get_db),current_user: User = Depends(get_current_admin_user)):
-    user = db.query(User).filter_by(username=data.username).first()
+async def register_user(data:UserCreate , db: Session = Depends(get_db),current_user: User = Depends(get_current_admin_user)):
+    user = await run_in_threadpool(lambda: db.query(User).filter_by(username=data.username).first())
     if user:
         raise HTTPException(status_code=400, detail="Username already exists")
 
-    hashed_pw = pwd_context.hash(data.password)
+    try:
+        hashed_pw = await password_hasher.hash(data.password)
+    except HasherSaturated as e:
+        raise hasher_busy(e)
     new_user = User(username=data.username, hashed_password=hashed_pw, role=data.role,email=data.email,must_change_password=True)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    log_action(db,user_id=new_user.id,action="user_registered",endpoint="/auth/register",payload={"username": new_user.username})
+
+    def save():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+        log_action(db,user_id=new_user.id,action="user_registered",endpoint="/auth/register",payload={"username": new_user.username})
+    await run_in_threadpool(save)
     return {"id": new_user.id, "username": new_user.username}
 
+@router.get("/users")
+def list_assignable_users(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: every non-admin user as {id, username}, for assigning patients and tasks.
+    """
+    users = db.query(User.id, User.username).filter(User.role != "admin").order_by(User.username).all()
+    return [{"id": u.id, "username": u.username} for u in users]
+
 @router.post("/login", response_model=TokenResponse)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not  pwd_context.verify(form_data.password, user.hashed_password):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    # rejected before any bcrypt work, so a storm of bad logins stays cheap;
+    # only failures count, so a ward logging in behind one NAT isn't throttled
+    ip = client_ip(request)
+    attempt = (form_data.username, ip)
+    retry_after = (ip_limiter.retry_after(ip) or attempt_limiter.retry_after(attempt)
+                   or username_limiter.retry_after(form_data.username))
+    if retry_after:
+        raise too_many_attempts(retry_after)
+
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.username == form_data.username).first())
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await password_hasher.verify(form_data.password, user.hashed_password)
+        except HasherSaturated as e:
+            raise hasher_busy(e)
+    if not user or not verified:
+        ip_limiter.record(ip)
+        attempt_limiter.record(attempt)
+        username_limiter.record(form_data.username)
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    log_action(db, user_id=user.id, action="login_success", endpoint="/auth/login",
-               payload={"username": user.username})
+    attempt_limiter.reset(attempt)
+
+    def finish():
+        if new_hash:
+            # stored hash predates the current BCRYPT_ROUNDS
+            user.hashed_password = new_hash
+            db.commit()
+        log_action(db, user_id=user.id, action="login_success", endpoint="/auth/login",
+                   payload={"username": user.username})
+    await run_in_threadpool(finish)
     access_token = create_access_token(data={"sub": str(user.id), "role": user.role, "username": user.username,'must_change_password':user.must_change_password})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.put('/changePassword')
-def change_password(payload:UserPasswordChange,db:Session = Depends(get_db),current_user:User = Depends(get_current_user)):
-    user = db.query(User).filter(User.id == current_user.id).first()
+async def change_password(request: Request, payload:UserPasswordChange,db:Session = Depends(get_db),current_user:User = Depends(get_current_user)):
+    attempt = (current_user.username, client_ip(request))
+    retry_after = attempt_limiter.retry_after(attempt) or username_limiter.retry_after(current_user.username)
+    if retry_after:
+        raise too_many_attempts(retry_after)
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.id == current_user.id).first())
     if not user:
         raise HTTPException(status_code=404, detail="User not found in session.")
 
-    if not pwd_context.verify(payload.oldPassword, user.hashed_password):
-        raise HTTPException(status_code=400, detail="Incorrect current password")
-    user.hashed_password = pwd_context.hash(payload.newPassword)
-    user.must_change_password = False
-    db.commit()
-    db.refresh(user)
+    try:
+        verified, _ = await password_hasher.verify(payload.oldPassword, user.hashed_password)
+        if not verified:
+            attempt_limiter.record(attempt)
+            username_limiter.record(current_user.username)
+            raise HTTPException(status_code=400, detail="Incorrect current password")
+        new_hash = await password_hasher.hash(payload.newPassword)
+    except HasherSaturated as e:
+        raise hasher_busy(e)
+
+    def save():
+        user.hashed_password = new_hash
+        user.must_change_password = False
+        db.commit()
+        db.refresh(user)
+    await run_in_threadpool(save)
 
     return {"message": "Password updated successfully!"}
 
@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.warmup import warmup
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+async def liveness():
+    """
+    Liveness probe: the process is up and serving (models may still be loading).
+    """
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    """
+    Readiness probe: 200 once the startup warm-up (disease models, SHAP
+    explainers, Gemini SDK) has finished, 503 while it runs or if a step failed.
+    """
+    stats = warmup.stats()
+    if not stats["ready"]:
+        status = "failed" if stats["errors"] else "warming_up"
+        return JSONResponse(status_code=503, content={"status": status, **stats})
+    return {"status": "ready", **stats}
@@ -0,0 +1,151 @@
+import os
+import secrets
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from app.db_schema.user import User
+from app.dependencies import get_db
+from app.services.auth_middleware import get_current_admin_user, optional_oauth2_scheme, user_from_token
+from app.services.instrumentation import render_metrics
+from app.db import pool_stats
+from app.services.model_registry import model_registry
+from app.services.explanation_cache import explanation_cache
+from app.services.dashboard_counters import dashboard_counters
+from app.services.patient_profile import patient_profiles
+from app.services.inference_pool import inference_pool
+from app.services.audit_writer import audit_writer
+from app.services.notification_broker import notification_broker
+from app.services.principal_cache import principal_cache
+from app.services.password_hasher import password_hasher
+from app.api.auth import ip_limiter, attempt_limiter, username_limiter
+from app.services.scheduler import scheduler
+from app.api.predict import micro_batcher
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+# static bearer token for Prometheus scrapers, which can't log in; unset = admins only
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@router.get("/models")
+def get_model_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: load time and memory footprint of every loaded disease model.
+    """
+    return {"models": model_registry.stats()}
+
+
+@router.get("/explanation-cache")
+def get_explanation_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: hit / miss counters of the explanation cache.
+    """
+    return explanation_cache.stats()
+
+
+@router.get("/inference")
+def get_inference_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: inference pool occupancy, completions and 429 rejections per
+    disease, plus the batch sizes the micro-batcher actually achieves.
+    """
+    return {**inference_pool.stats(), "micro_batching": micro_batcher.stats()}
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: connection pool occupancy, checkout wait times / timeouts and
+    a SELECT 1 health probe.
+    """
+    return pool_stats()
+
+
+@router.get("/dashboard-counters")
+def get_dashboard_counter_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: when the dashboard counters were last reconciled and how far they had drifted.
+    """
+    return dashboard_counters.stats()
+
+
+@router.get("/patient-profile-cache")
+def get_patient_profile_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: hit rate and size of the patient profile cache.
+    """
+    return patient_profiles.stats()
+
+
+@router.get("/audit-log")
+def get_audit_log_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: backlog and throughput of the batched audit log writer.
+    """
+    return audit_writer.stats()
+
+
+@router.get("/notification-streams")
+def get_notification_stream_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: open notification streams and broker delivery counts.
+    """
+    return notification_broker.stats()
+
+
+@router.get("/auth-cache")
+def get_auth_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: hit rate of the authenticated-user cache.
+    """
+    return principal_cache.stats()
+
+
+@router.get("/password-hashing")
+def get_password_hashing_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: bcrypt executor load and login rate limiter counts.
+    """
+    return {
+        "hasher": password_hasher.stats(),
+        "ip_limiter": ip_limiter.stats(),
+        "attempt_limiter": attempt_limiter.stats(),
+        "username_limiter": username_limiter.stats(),
+    }
+
+
+@router.get("/jobs")
+def get_job_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: maintenance jobs with their recent runtimes and row counts.
+    """
+    return scheduler.stats()
+
+
+@router.post("/jobs/{name}/run")
+async def run_job(name: str, current_user: User = Depends(get_current_admin_user)):
+    """
+    Admin-only: run a maintenance job now (e.g. missed_followups) instead of
+    waiting for its next scheduled run.
+    """
+    if name not in scheduler.jobs():
+        raise HTTPException(status_code=404, detail=f"Unknown job, expected one of {scheduler.jobs()}")
+    return await run_in_threadpool(scheduler.run, name, "manual")
+
+
+def metrics_access(token: str | None = Depends(optional_oauth2_scheme), db: Session = Depends(get_db)):
+    if METRICS_TOKEN and token and secrets.compare_digest(token, METRICS_TOKEN):
+        return
+    if user_from_token(token, db).role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(metrics_access)])
+def get_metrics():
+    """
+    Admin-only (or METRICS_TOKEN): request latency per route and time per
+    instrumented stage (model load, encoding, predict_proba, SHAP, DB,
+    explanation) as histograms in the Prometheus text format.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
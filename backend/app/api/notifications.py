@@ -1,43 +1,223 @@
+import asyncio
+import base64
+import json
+import os
+from datetime import datetime
 from typing import List
-from sqlalchemy.orm.attributes import flag_modified
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.dependencies import get_db
-from app.services.auth_middleware import get_current_user
-from app.models.notifications import NotificationSchema
-from app.db_schema.notifications import Notification
+from app.dependencies import get_async_db, get_db
+from app.db import SessionLocal
+from app.services.auth_middleware import get_current_user, get_current_user_async, get_stream_user
+from app.services.notification_broker import notification_broker
+from app.models.notifications import NotificationSchema, UnreadCount
+from app.db_schema.notifications import Notification, NotificationRecipient
 from uuid import UUID
 router = APIRouter()
 
+NOTIFICATIONS_PAGE_SIZE = int(os.getenv("NOTIFICATIONS_PAGE_SIZE", "50"))
+NOTIFICATIONS_MAX_PAGE_SIZE = int(os.getenv("NOTIFICATIONS_MAX_PAGE_SIZE", "200"))
+# SSE stream: keep-alive comment interval, client reconnect delay, and how many
+# missed notifications a reconnect replays before telling the client to refetch
+NOTIFICATION_HEARTBEAT_SECONDS = float(os.getenv("NOTIFICATION_HEARTBEAT_SECONDS", "15"))
+NOTIFICATION_RETRY_MS = int(os.getenv("NOTIFICATION_RETRY_MS", "3000"))
+NOTIFICATION_REPLAY_LIMIT = int(os.getenv("NOTIFICATION_REPLAY_LIMIT", "100"))
+
+
+def encode_cursor(created_at: datetime, notification_id: UUID) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at.isoformat(), str(notification_id)]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, notification_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), UUID(notification_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/my-notifications", response_model=List[NotificationSchema])
-def get_my_notifications(
-    db: Session=Depends(get_db),
+async def get_my_notifications(
+    response: Response,
+    limit: int = Query(NOTIFICATIONS_PAGE_SIZE, ge=1, le=NOTIFICATIONS_MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor header of the previous page"),
+    unread_only: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async)
+):
+    """
+    The current user's inbox, newest first, one page at a time. When more
+    notifications exist the X-Next-Cursor response header holds the cursor
+    for the next page.
+    """
+    query = (
+        select(Notification, NotificationRecipient.read_at)
+        .join(NotificationRecipient, NotificationRecipient.notification_id == Notification.id)
+        .where(NotificationRecipient.user_id == current_user.id)
+    )
+    if unread_only:
+        query = query.where(NotificationRecipient.read_at.is_(None))
+    if cursor:
+        query = query.where(
+            tuple_(NotificationRecipient.created_at, NotificationRecipient.notification_id) < decode_cursor(cursor)
+        )
+    rows = (await db.execute(
+        query.order_by(NotificationRecipient.created_at.desc(), NotificationRecipient.notification_id.desc())
+        .limit(limit + 1)
+    )).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return [
+        NotificationSchema(
+            id=notif.id,
+            user_ids=[current_user.id],
+            message=notif.message,
+            link=notif.link,
+            created_at=notif.created_at,
+            read_by=[current_user.id] if read_at else [],
+            read_at=read_at,
+        )
+        for notif, read_at in rows
+    ]
+
+
+@router.get("/my-notifications/unread-count", response_model=UnreadCount)
+def get_unread_count(
+    db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    notifs = (
-        db.query(Notification)
-        .filter(Notification.user_ids.contains([UUID(str(current_user.id))]))
-        .order_by(Notification.created_at.desc())
-        .all()
+    unread = (
+        db.query(func.count())
+        .select_from(NotificationRecipient)
+        .filter(NotificationRecipient.user_id == current_user.id, NotificationRecipient.read_at.is_(None))
+        .scalar()
     )
-    return notifs
+    return UnreadCount(unread=unread)
 
 
 @router.post("/mark-as-read/{notification_id}")
 def mark_notification_as_read(
-    notification_id: str,
+    notification_id: UUID,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    notif = db.query(Notification).filter_by(id=notification_id).first()
-    if not notif:
+    recipient = db.get(NotificationRecipient, (notification_id, current_user.id))
+    if not recipient:
         raise HTTPException(status_code=404, detail="Notification not found")
 
-    if current_user.id not in notif.read_by:
-
-        notif.read_by.append(current_user.id)
-        flag_modified(notif, "read_by")
+    if recipient.read_at is None:
+        recipient.read_at = datetime.utcnow()
         db.commit()
-        db.refresh(notif)
 
-    return {"message": "Marked as read"}
\ No newline at end of file
+    return {"message": "Marked as read"}
+
+
+@router.post("/mark-all-read")
+def mark_all_notifications_as_read(
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    updated = db.execute(
+        update(NotificationRecipient)
+        .where(NotificationRecipient.user_id == current_user.id, NotificationRecipient.read_at.is_(None))
+        .values(read_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return {"message": "Marked as read", "updated": updated}
+
+
+def notifications_since(user_id: UUID, since: tuple, limit: int) -> list[dict]:
+    """The user's notifications after the (created_at, id) cursor, oldest first."""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Notification)
+            .join(NotificationRecipient, NotificationRecipient.notification_id == Notification.id)
+            .filter(
+                NotificationRecipient.user_id == user_id,
+                tuple_(NotificationRecipient.created_at, NotificationRecipient.notification_id) > since,
+            )
+            .order_by(NotificationRecipient.created_at, NotificationRecipient.notification_id)
+            .limit(limit)
+            .all()
+        )
+        return [
+            {"id": str(n.id), "message": n.message, "link": n.link, "created_at": n.created_at.isoformat()}
+            for n in rows
+        ]
+    finally:
+        db.close()
+
+
+def sse_event(user_id: UUID, event: dict) -> tuple[tuple, str]:
+    """(cursor position, SSE frame) of a broker event, shaped like a /my-notifications item."""
+    created_at, notification_id = datetime.fromisoformat(event["created_at"]), UUID(event["id"])
+    data = NotificationSchema(
+        id=notification_id,
+        user_ids=[user_id],
+        message=event["message"],
+        link=event["link"],
+        created_at=created_at,
+        read_by=[],
+    ).model_dump_json()
+    return (created_at, notification_id), f"id: {encode_cursor(created_at, notification_id)}\nevent: notification\ndata: {data}\n\n"
+
+
+@router.get("/my-notifications/stream")
+async def stream_my_notifications(
+    cursor: str | None = Query(None, description="Resume after this event id"),
+    last_event_id: str | None = Header(None),
+    current_user=Depends(get_stream_user)
+):
+    """
+    Server-sent events: every new notification for the current user, as it
+    is created. Each event id is a cursor; on reconnect EventSource sends it
+    back as Last-Event-ID and the notifications missed in between are
+    replayed first. A "resync" event means too many were missed and the
+    client should refetch /my-notifications. Comment lines every
+    NOTIFICATION_HEARTBEAT_SECONDS keep proxies from closing the connection.
+    """
+    resume = last_event_id or cursor
+    since = decode_cursor(resume) if resume else None
+    user_id = current_user.id
+    # subscribe before replaying, so nothing created in between is missed
+    subscription = notification_broker.subscribe(user_id)
+
+    async def events():
+        last = since
+        try:
+            yield f"retry: {NOTIFICATION_RETRY_MS}\n\n"
+            if since is not None:
+                missed = await run_in_threadpool(notifications_since, user_id, since, NOTIFICATION_REPLAY_LIMIT + 1)
+                if len(missed) > NOTIFICATION_REPLAY_LIMIT:
+                    yield "event: resync\ndata: {}\n\n"
+                    missed = []
+                for event in missed:
+                    last, frame = sse_event(user_id, event)
+                    yield frame
+            while not subscription.overflowed.is_set():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), NOTIFICATION_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                position, frame = sse_event(user_id, event)
+                if last is not None and position <= last:
+                    continue  # already sent by the replay
+                last = position
+                yield frame
+            # fell too far behind: end the stream, the client reconnects from its last event id
+        finally:
+            notification_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,145 +1,222 @@
+import base64
+import json
+import os
 from datetime import datetime
-from uuid import UUID
-from sqlalchemy import func
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal
+from uuid import UUID, uuid4
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.db import SessionLocal
 from app.db_schema.user import User
 from app.db_schema.tasks import Task
-from app.dependencies import get_db
-from app.models.escalation import EscalationSchema
-from app.services.auth_middleware import get_current_user, get_current_admin_user
+from app.dependencies import get_async_db, get_db
+from app.services.auth_middleware import get_current_user, get_current_admin_user, get_current_user_async
 from app.db_schema.patient_related import Assignment, PatientReference
-from app.db_schema.predicition import Prediction
-from app.models.patient import AssignedPatient, FollowUpCreate, FollowUpSchema,PatientDetails,PredictionSummary,AssignPatient,FollowUpUpdate
+from app.db_schema.patient_latest_risk import PatientLatestRisk
+from app.models.patient import AssignedPatient, FollowUpCreate,PatientDetails,AssignPatient,FollowUpUpdate
 from app.db_schema.patient_related import FollowUp
 from app.utils.audit_logs import log_action
 from app.utils.notification_create import create_notification
-from app.db_schema.escalations import Escalation
+from app.utils.transactions import on_commit, unit_of_work
+from app.services.dashboard_counters import dashboard_counters
+from app.services.patient_profile import patient_profiles
 router = APIRouter(prefix="/patients",tags=["Patient Related Actions"])
 
 
-def get_patients_with_assigned_user(db: Session):
+@router.get("/summary")
+def get_dashboard_summary(
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+):
     """
-    Return a flat list of patients; each dict includes:
-      • assigned_user_id / assigned_username  (if any)
-      • risk  -> from latest prediction (risk field)
+    Admin dashboard counters (risk distribution, pending tasks / escalations,
+    unassigned patients, overdue follow-ups) from the in-process cache.
     """
-
-    # ── 1️⃣  Sub‑query: latest prediction per patient ───────────────
-    latest_pred_subq = (
-        db.query(
-            Prediction.patient_id.label("pid"),
-            Prediction.risk.label("risk"),
-            func.max(Prediction.timestamp).label("max_ts")
-        )
-        .group_by(Prediction.patient_id, Prediction.risk)
-        .subquery()
-    )
-
-    # ── 2️⃣  Main query: patient  ← assignment ← user  + latest_pred_subq ─
-    query = (
-        db.query(
-            PatientReference,
-            User.id.label("assigned_user_id"),
-            User.username.label("assigned_username"),
-            latest_pred_subq.c.risk.label("risk"),
-        )
-        .outerjoin(Assignment, PatientReference.patient_id == Assignment.patient_id)
-        .outerjoin(User, Assignment.user_id == User.id)
-        .outerjoin(latest_pred_subq, PatientReference.patient_id == latest_pred_subq.c.pid)
+    return dashboard_counters.snapshot(db)
+
+def assigned_patients_query(user_id: UUID):
+    return (
+        select(PatientReference, PatientLatestRisk.risk)
+        .join(Assignment, Assignment.patient_id == PatientReference.patient_id)
+        .outerjoin(PatientLatestRisk, PatientLatestRisk.patient_id == PatientReference.patient_id)
+        .where(Assignment.user_id == user_id)
     )
 
-    # ── 3️⃣  Serialize to simple dicts ──────────────────────────────
-    patients = []
-    for patient, assigned_user_id, assigned_username, risk in query.all():
-        data = {**patient.__dict__}
-        data.pop("_sa_instance_state", None)      # strip SQLAlchemy internals
-        data["assigned_user_id"]   = assigned_user_id
-        data["assigned_username"]  = assigned_username
-        data["risk"]               = risk
-        patients.append(data)
 
-    return patients
-
-@router.get("/all")
-def get_all_patients_info(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/assigned/me", response_model=list[AssignedPatient])
+async def get_my_assigned_patients(
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    patients = get_patients_with_assigned_user(db)
+    # 1. Assigned patients with their latest risk, in one indexed query
+    rows = (await db.execute(assigned_patients_query(current_user.id))).all()
 
-    users = (
-        db.query(User.id, User.username)
-        .filter(User.role != "admin")
-        .all()
-    )
-    user_list = [{"id": u.id, "username": u.username} for u in users]
+    # 2. Combine results (a patient assigned twice is listed once)
+    response = []
+    seen = set()
+    for p, risk in rows:
+        if p.patient_id in seen:
+            continue
+        seen.add(p.patient_id)
+        response.append(AssignedPatient(
+            patient_id=p.patient_id,
+            name=p.name,
+            age=p.age,
+            gender=p.gender,
+            mobile_number=p.mobile_number,
+            disease_type=p.disease_type,
+            risk=risk or "Unknown"
+        ))
 
-    pending_tasks_count = (
-        db.query(Task).filter(Task.status == "pending").count()
-    )
+    return response
 
-    escalations_count = (
-        db.query(Escalation).filter(Escalation.status == "pending").count()
-    )
+PATIENT_LIST_DEFAULT_LIMIT = int(os.getenv("PATIENT_LIST_DEFAULT_LIMIT", "50"))
+PATIENT_LIST_MAX_LIMIT = int(os.getenv("PATIENT_LIST_MAX_LIMIT", "1000"))
+PATIENT_LIST_FETCH_SIZE = 200  # rows per DB round trip while streaming
 
-    return {
-        "patients_details": patients,
-        "user_details": user_list,
-        "pending_tasks_count": pending_tasks_count,
-        "escalations_count": escalations_count,
-    }
+RISK_RANK = case(
+    (PatientLatestRisk.risk == "High", 3),
+    (PatientLatestRisk.risk == "Medium", 2),
+    (PatientLatestRisk.risk == "Low", 1),
+    else_=0,
+)
+# sort name -> keyset column (never NULL, so row comparisons stay well-defined)
+PATIENT_SORT_KEYS = {
+    "patient_id": PatientReference.patient_id,
+    "risk": RISK_RANK,
+    "probability": func.coalesce(PatientLatestRisk.predicted_probability, -1.0),
+}
 
 
-@router.get("/assigned/me", response_model=list[AssignedPatient])
-def get_my_assigned_patients(
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    user_id = current_user.id
+def encode_cursor(sort_value, patient_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, patient_id]).encode()).decode()
 
-    # 1. Get assigned patient_ids
-    assignments = db.query(Assignment).filter(Assignment.user_id == user_id).all()
-    patient_ids = [a.patient_id for a in assignments]
 
-    if not patient_ids:
-        return []
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        sort_value, patient_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return sort_value, patient_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    # 2. Get patient info
-    patients = (
-        db.query(PatientReference)
-        .filter(PatientReference.patient_id.in_(patient_ids))
-        .all()
-    )
 
-    # 3. Get latest predictions per patient (grab risk only)
-    subquery = (
+def patient_list_query(db: Session, sort: str, order: str, cursor: str | None, disease_type: str | None,
+                       risk: str | None, assigned_user_id: UUID | None, unassigned: bool):
+    """
+    Keyset-paginated patient listing: light columns only (no clinical_info),
+    latest risk from patient_latest_risk and the most recent assignee.
+    Ordered by the sort key, then patient_id as the tie-breaker.
+    """
+    sort_key = PATIENT_SORT_KEYS[sort]
+    latest_assignment = (
+        select(Assignment.user_id)
+        .where(Assignment.patient_id == PatientReference.patient_id)
+        .order_by(Assignment.assigned_at.desc())
+        .limit(1)
+        .correlate(PatientReference)
+        .scalar_subquery()
+    )
+    assignee_name = select(User.username).where(User.id == latest_assignment).scalar_subquery()
+    query = (
         db.query(
-            Prediction.patient_id,
-            Prediction.risk
+            PatientReference.patient_id,
+            PatientReference.name,
+            PatientReference.age,
+            PatientReference.gender,
+            PatientReference.mobile_number,
+            PatientReference.disease_type,
+            PatientLatestRisk.risk,
+            PatientLatestRisk.predicted_probability,
+            PatientLatestRisk.predicted_at,
+            latest_assignment.label("assigned_user_id"),
+            assignee_name.label("assigned_username"),
+            sort_key.label("sort_value"),
         )
-        .filter(Prediction.patient_id.in_(patient_ids))
-        .order_by(Prediction.patient_id, Prediction.timestamp.desc())
-        .distinct(Prediction.patient_id)
-        .all()
+        .outerjoin(PatientLatestRisk, PatientLatestRisk.patient_id == PatientReference.patient_id)
     )
 
-    prediction_map = {row.patient_id: row.risk for row in subquery}
-
-    # 4. Combine results
-    response = []
-    for p in patients:
-        response.append(AssignedPatient(
-            patient_id=p.patient_id,
-            name=p.name,
-            age=p.age,
-            gender=p.gender,
-            mobile_number=p.mobile_number,
-            disease_type=p.disease_type,
-            risk=prediction_map.get(p.patient_id, "Unknown")
-        ))
-
-    return response
+    if disease_type:
+        query = query.filter(PatientReference.disease_type == disease_type)
+    if risk == "Unknown":
+        query = query.filter(PatientLatestRisk.risk.is_(None))
+    elif risk:
+        query = query.filter(PatientLatestRisk.risk == risk)
+    if assigned_user_id:
+        # the current (latest) assignee, as reported in the row
+        query = query.filter(latest_assignment == assigned_user_id)
+    if unassigned:
+        query = query.filter(~select(Assignment.id).where(Assignment.patient_id == PatientReference.patient_id).exists())
+
+    if cursor:
+        last_value, last_patient_id = decode_cursor(cursor)
+        after = sort_key > last_value if order == "asc" else sort_key < last_value
+        if sort == "patient_id":
+            query = query.filter(after)
+        else:
+            query = query.filter(or_(after, and_(sort_key == last_value, PatientReference.patient_id > last_patient_id)))
+
+    primary = sort_key.asc() if order == "asc" else sort_key.desc()
+    if sort == "patient_id":
+        return query.order_by(primary)
+    return query.order_by(primary, PatientReference.patient_id.asc())
+
+
+@router.get("/list")
+def list_patients(
+    limit: int = Query(PATIENT_LIST_DEFAULT_LIMIT, ge=1, le=PATIENT_LIST_MAX_LIMIT),
+    cursor: str | None = None,
+    sort: Literal["patient_id", "risk", "probability"] = "patient_id",
+    order: Literal["asc", "desc"] = "asc",
+    disease_type: str | None = None,
+    risk: str | None = None,
+    assigned_user_id: UUID | None = None,
+    unassigned: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    One page of patients as {"items": [...], "next_cursor": ...}; pass
+    next_cursor back to get the following page. Rows are streamed from the
+    database in small fetches, so memory stays flat for any page size.
+    """
+    if cursor:
+        decode_cursor(cursor)  # reject a bad cursor before the response starts
+
+    def rows():
+        db = SessionLocal()
+        try:
+            query = patient_list_query(db, sort, order, cursor, disease_type, risk, assigned_user_id, unassigned)
+            last = None
+            count = 0
+            yield '{"items": ['
+            for row in query.limit(limit + 1).yield_per(PATIENT_LIST_FETCH_SIZE):
+                if count == limit:
+                    # one row beyond the page: there is a next page
+                    yield f'], "next_cursor": {json.dumps(encode_cursor(last.sort_value, last.patient_id))}}}'
+                    return
+                item = {
+                    "patient_id": row.patient_id,
+                    "name": row.name,
+                    "age": row.age,
+                    "gender": row.gender,
+                    "mobile_number": row.mobile_number,
+                    "disease_type": row.disease_type,
+                    "risk": row.risk,
+                    "predicted_probability": row.predicted_probability,
+                    "predicted_at": row.predicted_at.isoformat() if row.predicted_at else None,
+                    "assigned_user_id": str(row.assigned_user_id) if row.assigned_user_id else None,
+                    "assigned_username": row.assigned_username,
+                }
+                yield ("," if count else "") + json.dumps(item)
+                last = row
+                count += 1
+            yield '], "next_cursor": null}'
+        finally:
+            db.close()
+
+    return StreamingResponse(rows(), media_type="application/json")
 
 @router.get("/{patient_id}", response_model=PatientDetails)
 def get_patient_details(
@@ -147,56 +224,10 @@ def get_patient_details(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    patient = db.query(PatientReference).filter_by(patient_id=patient_id).first()
-    if not patient:
+    profile = patient_profiles.get(db, patient_id)
+    if profile is None:
         raise HTTPException(status_code=404, detail="Patient not found")
-
-    followups = (
-        db.query(FollowUp)
-        .filter(FollowUp.patient_id == patient_id)
-        .order_by(FollowUp.follow_up_date.desc())
-        .all()
-    )
-
-    latest_prediction = (
-        db.query(Prediction)
-        .filter(Prediction.patient_id == patient_id)
-        .order_by(Prediction.timestamp.desc())
-        .first()
-    )
-    escalations = (
-        db.query(Escalation)
-        .filter(Escalation.patient_id == patient_id)
-        .order_by(Escalation.updated_at.desc())
-        .all()
-    )
-    return PatientDetails(
-        patient_id=patient.patient_id,
-        name=patient.name,
-        age=patient.age,
-        gender=patient.gender,
-        mobile_number=patient.mobile_number,
-        disease_type=patient.disease_type,
-        clinical_info=patient.clinical_info or {},
-        follow_ups=[
-            FollowUpSchema(
-                id=str(f.id),
-                user_id=str(f.user_id),
-                notes=f.notes,
-                status=f.status,
-                follow_up_type=f.follow_up_type,
-                follow_up_date=f.follow_up_date,
-                timestamp=f.timestamp
-            ) for f in followups
-        ],
-        prediction=PredictionSummary(
-            risk=latest_prediction.risk,
-            predicted_probability=latest_prediction.predicted_probability,
-            prediction_class=str(latest_prediction.predicted_class)
-        ) if latest_prediction else None,
-        escalations=[EscalationSchema.from_orm(esc) for esc in escalations]
-
-    )
+    return profile
 
 
 
@@ -208,124 +239,126 @@ def add_follow_up(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    # Validate patient
-    patient = db.query(PatientReference).filter_by(patient_id=patient_id).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
-
-    #  Create main follow-up
-    follow_up = FollowUp(
-        patient_id=patient_id,
-        user_id=current_user.id,
-        notes=payload.notes,
-        status=payload.status,
-        follow_up_type=payload.follow_up_type,
-        follow_up_date=payload.follow_up_date,
-        timestamp=datetime.utcnow()
-    )
-    db.add(follow_up)
-    db.flush()  # so follow_up.id is generated
-
-    log_action(
-        db=db,
-        user_id=current_user.id,
-        action="followup_created",
-        endpoint=f"/patients/{patient_id}/followups",
-        payload={"followup_id": str(follow_up)}
-    )
-
-    # Handle optional next follow-up
-    if payload.next_followup:
-        # Placeholder follow-up
-        placeholder = FollowUp(
+    with unit_of_work(db):
+        # Validate patient
+        patient = db.query(PatientReference).filter_by(patient_id=patient_id).first()
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found")
+
+        #  Create main follow-up
+        follow_up = FollowUp(
+            id=uuid4(),  # returned to the client; known without flushing
             patient_id=patient_id,
             user_id=current_user.id,
-            status="upcoming",
-            follow_up_date=payload.next_followup,
+            notes=payload.notes,
+            status=payload.status,
+            follow_up_type=payload.follow_up_type,
+            follow_up_date=payload.follow_up_date,
             timestamp=datetime.utcnow()
         )
-        db.add(placeholder)
-        db.flush()
+        db.add(follow_up)
+        on_commit(db, lambda: dashboard_counters.invalidate("overdue_followups"))
+        patient_profiles.invalidate_on_commit(db, patient_id)
 
         log_action(
             db=db,
             user_id=current_user.id,
-            action="followup_placeholder_created",
+            action="followup_created",
             endpoint=f"/patients/{patient_id}/followups",
-            payload={"followup_id": str(placeholder)}
-        )
-
-        #  Create actual Task
-        assigned_to_user = db.query(User).filter_by(username=current_user.username).first()
-        if not assigned_to_user:
-            raise HTTPException(status_code=404, detail="Assigned user not found")
-
-        new_task = Task(
-            patient_id=patient_id,
-            assigned_to=assigned_to_user.id,
-            assigned_by=current_user.id,
-            description=f"Prepare for follow-up on {payload.next_followup} for patient {patient_id}",
-            due_date=payload.next_followup
+            payload={"followup_id": str(follow_up)}
         )
-        db.add(new_task)
-        db.flush()
 
-        create_notification(
-            db=db,
-            user_ids=[assigned_to_user.id],
-            message="New task assigned",
-            link=f"/patients/{patient_id}"
-        )
+        # Handle optional next follow-up
+        if payload.next_followup:
+            # Placeholder follow-up
+            placeholder = FollowUp(
+                patient_id=patient_id,
+                user_id=current_user.id,
+                status="upcoming",
+                follow_up_date=payload.next_followup,
+                timestamp=datetime.utcnow()
+            )
+            db.add(placeholder)
+
+            log_action(
+                db=db,
+                user_id=current_user.id,
+                action="followup_placeholder_created",
+                endpoint=f"/patients/{patient_id}/followups",
+                payload={"followup_id": str(placeholder)}
+            )
+
+            #  Create actual Task
+            assigned_to_user = db.query(User).filter_by(username=current_user.username).first()
+            if not assigned_to_user:
+                raise HTTPException(status_code=404, detail="Assigned user not found")
+
+            new_task = Task(
+                patient_id=patient_id,
+                assigned_to=assigned_to_user.id,
+                assigned_by=current_user.id,
+                description=f"Prepare for follow-up on {payload.next_followup} for patient {patient_id}",
+                due_date=payload.next_followup
+            )
+            db.add(new_task)
+            on_commit(db, lambda: dashboard_counters.adjust(pending_tasks=1))
+
+            create_notification(
+                db=db,
+                user_ids=[assigned_to_user.id],
+                message="New task assigned",
+                link=f"/patients/{patient_id}"
+            )
+
+            log_action(
+                db=db,
+                user_id=current_user.id,
+                action="task_created",
+                endpoint="/tasks/internal-create",
+                payload={"task_id": str(new_task)}
+            )
 
-        log_action(
-            db=db,
-            user_id=current_user.id,
-            action="task_created",
-            endpoint="/tasks/internal-create",
-            payload={"task_id": str(new_task)}
-        )
-
-    #  Finalize transaction
-    db.commit()
     return {"message": "Follow-up added successfully", "id": str(follow_up.id)}
 @router.post("/assign",status_code=201)
 def assign_patient(payload:AssignPatient,current_admin=Depends(get_current_admin_user),db: Session = Depends(get_db)):
-    # Validate patient existence
-    patient = db.query(PatientReference).filter_by(patient_id=payload.patient_id).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
-    # Validate User existence
-    user = db.query(User.id).filter_by(username=payload.username).first()
-    if not user:
-        raise HTTPException(status_code=404,detail="User Not Found")
-    # Assign the patient to user
-    assignment = Assignment(user_id=user.id,patient_id=payload.patient_id)
-    db.add(assignment)
-    db.commit()
-    db.refresh(assignment)
-    create_notification(db,user_ids=[user.id],message=f"Patient {payload.patient_id} is assigned to you",link=f"/{payload.patient_id}")
-    log_action(db, user_id=user.id, action="patient_assigned", endpoint=f"/patients/assign",
-               payload={"assignment":str(assignment)})
+    with unit_of_work(db):
+        # Validate patient existence
+        patient = db.query(PatientReference).filter_by(patient_id=payload.patient_id).first()
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        # Validate User existence
+        user = db.query(User.id).filter_by(username=payload.username).first()
+        if not user:
+            raise HTTPException(status_code=404,detail="User Not Found")
+        # Assign the patient to user
+        first_assignment = not db.query(db.query(Assignment).filter_by(patient_id=payload.patient_id).exists()).scalar()
+        assignment = Assignment(user_id=user.id,patient_id=payload.patient_id)
+        db.add(assignment)
+        if first_assignment:
+            on_commit(db, lambda: dashboard_counters.adjust(unassigned_patients=-1))
+        create_notification(db,user_ids=[user.id],message=f"Patient {payload.patient_id} is assigned to you",link=f"/{payload.patient_id}")
+        log_action(db, user_id=user.id, action="patient_assigned", endpoint=f"/patients/assign",
+                   payload={"assignment":str(assignment)})
     return {"message":f"patient got assigned successfully"}
 
 @router.patch("/followup/update/{followup_id}")
 def update_followup(followup_id:UUID,payload: FollowUpUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    followup = db.query(FollowUp).filter(FollowUp.id == followup_id).first()
-    if not followup:
-        raise HTTPException(status_code=404, detail="Follow‑up not found")
-
-    # Optionally restrict: only the creator or admin can edit
-    if current_user.role != "admin" and followup.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to edit")
-
-    # Apply only provided fields
-    for field, value in payload.model_dump(exclude_none=True).items():
-        setattr(followup, field, value)
-
-    db.commit()
-    db.refresh(followup)
-
-    log_action(db,current_user.id,action="followup_updated",endpoint="/followup/update",payload={"updated_followup":str(followup)})
+    with unit_of_work(db):
+        followup = db.query(FollowUp).filter(FollowUp.id == followup_id).first()
+        if not followup:
+            raise HTTPException(status_code=404, detail="Follow‑up not found")
+
+        # Optionally restrict: only the creator or admin can edit
+        if current_user.role != "admin" and followup.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to edit")
+
+        # Apply only provided fields
+        for field, value in payload.model_dump(exclude_none=True).items():
+            setattr(followup, field, value)
+        on_commit(db, lambda: dashboard_counters.invalidate("overdue_followups"))
+        patient_profiles.invalidate_on_commit(db, followup.patient_id)
+
+        log_action(db,current_user.id,action="followup_updated",endpoint="/followup/update",payload={"updated_followup":str(followup)})
     return {"message": "Follow-up updated successfully"}
 
 
@@ -1,19 +1,40 @@
-from fastapi import APIRouter, HTTPException,Depends
-from app.models.predict_inputs import PneumoniaInput,DiabetesInput,HeartFailureInput
-from app.services.explanation import explain_with_gemini
-from sqlalchemy.orm import Session
-import pandas as pd
-import joblib
-import shap
+import asyncio
 import json
 import os
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, HTTPException,Depends,Body
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from app.models.predict_inputs import PneumoniaInput,DiabetesInput,HeartFailureInput
+from app.services.explanation_queue import explanation_queue
+from sqlalchemy.orm import Session
 import numpy as np
 from app.services.auth_middleware import get_current_user
 from app.db_schema.user import User
-from app.utils.pred_logger import log_prediction
+from app.db_schema.predicition import Prediction
+from app.utils.pred_logger import log_prediction, log_predictions
 from app.dependencies import get_db
+from app.services.model_registry import get_model, ModelArtifacts
+from app.services.shap_service import SHAP_LAZY, compute_shap, compute_shap_rows, store_result, get_result
+from app.services.inference_pool import inference_pool, InferenceSaturated
+from app.services.micro_batcher import MicroBatcher, MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_MAX_ROWS
+from app.services.instrumentation import span
 router = APIRouter(prefix="/predict", tags=["Prediction"])
 
+MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "10000"))
+BATCH_CHUNK_SIZE = int(os.getenv("PREDICT_BATCH_CHUNK_SIZE", "1000"))
+# seconds clients are told to wait when the inference pool is saturated (429)
+INFERENCE_RETRY_AFTER = os.getenv("INFERENCE_RETRY_AFTER", "1")
+
+# Prediction.disease_type as logged -> model registry key
+DISEASE_KEYS = {
+    "pneumonia": "pneumonia",
+    "Heart Failure": "heart_failure",
+    "diabetes": "diabetes",
+}
+
 def determine_risk(predicted_class: int, probability: float) -> str:
     if predicted_class == 1:
         if probability >= 0.85:
@@ -37,206 +58,277 @@ def convert_numpy(obj):
         return obj.tolist()
     return obj
 
-def get_age_bucket(age: int) -> str:
-    if age < 0 or age > 99:
-        raise ValueError("Age must be between 0 and 99")
-    lower = (age // 10) * 10
-    upper = lower + 10
-    return f"[{lower}-{upper})"
+def classify(artifacts: ModelArtifacts, probas: np.ndarray) -> np.ndarray:
+    """Predicted class per row: tuned threshold if the model has one, else argmax (= model.predict)."""
+    if artifacts.threshold is None:
+        return artifacts.model.classes_.take(np.argmax(probas, axis=1))
+    return (probas[:, 1] >= artifacts.threshold).astype(int)
 
-@router.post("/pneumonia")
-def predict_pneumonia(input_data: PneumoniaInput,current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
-    try:
-        # Convert input to dict and DataFrame
-        user_data = input_data.model_dump()
-        df = pd.DataFrame([user_data])
-        df.drop(columns=["patient_id"], inplace=True)
-
-        # Load model and components
-        model = joblib.load("models/model_pneumonia/voting_model.pkl")
-        with open("models/model_pneumonia/threshold.json") as f:
-            threshold = json.load(f)['best_threshold']
-        with open("models/model_pneumonia/features.json") as f:
-            feature_order = json.load(f)['feature_order']
-
-        # Load encoders
-        encoders = {
-            'gender': joblib.load("models/model_pneumonia/encoders_pneumonia/label_encoder_gender.joblib"),
-            'smoking_status': joblib.load("models/model_pneumonia/encoders_pneumonia/label_encoder_smoking_status.joblib"),
-            'discharge_disposition': joblib.load("models/model_pneumonia/encoders_pneumonia/label_encoder_discharge_disposition.joblib"),
-            'multi_comorb': joblib.load("models/model_pneumonia/encoders_pneumonia/multi_label_binarizer.joblib"),
-        }
-        scaler = joblib.load("models/model_pneumonia/scalers_pneumonia/scaler.joblib")
-
-        # Encode categorical
-        df["gender"] = encoders["gender"].transform(df["gender"])
-        df["smoking_status"] = encoders["smoking_status"].transform(df["smoking_status"])
-        df["discharge_disposition"] = encoders["discharge_disposition"].transform(df["discharge_disposition"])
-
-        # Comorbidities (multi-label)
-        comorb = user_data["comorbidities"].split(",")
-        comorb_encoded = encoders["multi_comorb"].transform([comorb])
-        comorb_df = pd.DataFrame(comorb_encoded, columns=encoders["multi_comorb"].classes_)
-        df = df.drop(columns=["comorbidities"]).join(comorb_df)
-
-        # Scale selected features
-        scaler_cols = ['age', 'bmi', 'wbc_count', 'crp_level', 'oxygen_saturation', 'num_prior_admissions', 'length_of_stay']
-        df[scaler_cols] = scaler.transform(df[scaler_cols])
-
-        # Reorder to match training
-        df = df[feature_order]
-
-        # Predict
-        proba = model.predict_proba(df)[0][1]
-        pred = int(proba >= threshold)
-        risk = determine_risk(pred,proba)
-        log_prediction(
-            db=db,
-            user=current_user,
-            disease="pneumonia",
-            input_data=input_data.model_dump(),
-            prediction=pred,
-            probability=proba,
-            risk=risk
-        )
-        # SHAP explanation
-        explainer = shap.TreeExplainer(model.named_estimators_['xgb'])
-        shap_values = explainer.shap_values(df)
+def attach_explanation(response: dict, artifacts: ModelArtifacts, X: np.ndarray, shap_result: dict = None) -> dict:
+    """
+    Queue the LLM explanation and return immediately; clients poll
+    GET /predict/explanations/{explanation_id} (or its /stream variant).
+    Explanations already in the in-memory cache are returned inline.
+    """
+    prediction_id = response["prediction_id"]
+    if SHAP_LAZY:
+        # SHAP is computed on the explanation worker and cached for GET /predict/{id}/shap
+        response["shap"] = None
+        prediction = {**response, "disease": artifacts.disease}
 
-        response = {
-            "prediction": pred,
-            "probability": round(proba, 4),
-            "risk": risk,
-            "shap": {
-                "features": df.columns.tolist(),
-                "shap_values": [float(val) for val in shap_values[0]],
-                "base_value": float(explainer.expected_value)
-            }
-        }
-        response['explanation'] = explain_with_gemini(response)
-        return response
+        def build_payload():
+            shap_result = compute_shap(artifacts, X)
+            store_result(prediction_id, shap_result)
+            return {**prediction, "shap": shap_result}
+        payload = None
+    else:
+        response["shap"] = shap_result
+        payload = {**response, "disease": artifacts.disease}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+        def build_payload():
+            return payload
+    job = explanation_queue.submit(build_payload, payload)
+    response["explanation"] = job.explanation
+    response["explanation_id"] = job.id
+    return response
 
-@router.post("/heart_failure")
-def predict_heart_failure(input_data: HeartFailureInput,current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+def score_records(disease: str, records: list[dict]) -> list:
+    """
+    Runs on the inference pool for a micro-batch of single predictions: one
+    vectorized transform, predict_proba and (unless SHAP is lazy) SHAP call.
+    Returns per record (artifacts, X row, prediction, probability, shap), or
+    the ValueError that record's encoding raised.
+    """
+    artifacts = get_model(disease)
+    results = [None] * len(records)
+    with span("predict.encode"):
+        chunk, X = prepare_chunk(artifacts, list(enumerate(records)), results)
+    if chunk:
+        with span("predict.predict_proba"):
+            probas = artifacts.predict_proba(X)
+            preds = classify(artifacts, probas)
+        if SHAP_LAZY:
+            shap_rows = [None] * len(chunk)
+        else:
+            with span("predict.shap"):
+                shap_rows = compute_shap_rows(artifacts, X)
+        for row, ((index, _), proba, pred, shap_result) in enumerate(zip(chunk, probas[:, 1], preds, shap_rows)):
+            results[index] = (artifacts, X[row:row + 1], int(pred), float(proba), shap_result)
+    return [ValueError(result["error"]) if isinstance(result, dict) else result for result in results]
+
+micro_batcher = MicroBatcher(score_records, MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_MAX_ROWS)
+
+def saturated(e: InferenceSaturated) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": INFERENCE_RETRY_AFTER})
+
+async def predict_single(disease: str, disease_label: str, input_data: BaseModel, current_user: User, db: Session) -> dict:
     try:
-        raw_data = input_data.model_dump()
-        df = pd.DataFrame([raw_data])
-        encoder = joblib.load("models/model_heartfailure/encoder_heart.pkl")
-        categorical_cols = ["Gender", "Ethnicity", "Discharge_Disposition"]
-        encoded_array = encoder.transform(df[categorical_cols])
-        encoded_df = pd.DataFrame(encoded_array, columns=encoder.get_feature_names_out())
-        encoded_df.columns = [col.replace("cat__", "") for col in encoded_df.columns]
-        df = df.drop(["patient_id"] + categorical_cols, axis=1)
-        df = pd.concat([df.reset_index(drop=True), encoded_df.reset_index(drop=True)], axis=1)
-
-        with open("models/model_heartfailure/feature_order.json") as f:
-            feature_order = json.load(f)
-        df = df[feature_order]
-
-        with open("models/model_heartfailure/numerical_columns.json") as f:
-            numerical_cols = json.load(f)
-        scaler = joblib.load("models/model_heartfailure/standard_scaler.pkl")
-        df[numerical_cols] = scaler.transform(df[numerical_cols])
-
-        model = joblib.load("models/model_heartfailure/random_forest.pkl")
-        proba = model.predict_proba(df)[0][1]
-        pred = int(model.predict(df)[0])
+        record = input_data.model_dump()
+        # queueing + this request's share of a micro-batch (whose stages are timed on the pool)
+        with span("predict.inference"):
+            artifacts, X, pred, proba, shap_result = await micro_batcher.submit(disease, record)
         risk = determine_risk(pred, proba)
-        log_prediction(
+        prediction_id = await run_in_threadpool(
+            log_prediction,
             db=db,
             user=current_user,
-            disease="Heart Failure",
-            input_data=input_data.model_dump(),
+            disease=disease_label,
+            input_data=record,
             prediction=pred,
             probability=proba,
             risk=risk
         )
-        explainer = shap.Explainer(model)
-        shap_values = explainer(df)
 
         response = {
+            "prediction_id": str(prediction_id),
             "prediction": pred,
             "probability": round(proba, 4),
-            "risk":risk,
-            "shap": {
-                "features": df.columns.tolist(),
-                "shap_values": shap_values[0].values[:, 1].tolist(),  # Class 1 SHAPs
-                "base_value": float(shap_values.base_values[0][1])  # Class 1 base
-            }
+            "risk": risk,
         }
-        response['explanation'] = explain_with_gemini(response)
-        return response
+        return attach_explanation(response, artifacts, X, shap_result)
+    except InferenceSaturated as e:
+        raise saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@router.post("/pneumonia")
+async def predict_pneumonia(input_data: PneumoniaInput,current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+    return await predict_single("pneumonia", "pneumonia", input_data, current_user, db)
+
+@router.post("/heart_failure")
+async def predict_heart_failure(input_data: HeartFailureInput,current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+    return await predict_single("heart_failure", "Heart Failure", input_data, current_user, db)
 
 @router.post("/diabetes")
-def predict_diabetes(input_data: DiabetesInput,current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
-    try:
-        input_json = input_data.model_dump()
-       # input_json['diabetesMed'] = "Yes"
-        df = pd.DataFrame([input_json])
-        df.drop(columns=["patient_id"], errors="ignore", inplace=True)
-
-        model = joblib.load("models/model_diabetics/xgb_readmission_model.joblib")
-        threshold = joblib.load("models/model_diabetics/threshold.joblib")
-        df['age'] = get_age_bucket(input_json['age'])
-        ENCODERS_DIR = "models/model_diabetics/encoders_diabetics"
-        categorical_encoders = {
-            "A1Cresult": "label_encoder_A1Cresult.joblib",
-            "age": "label_encoder_age.joblib",
-            "change": "label_encoder_change.joblib",
-            "diabetesMed": "label_encoder_diabetesMed.joblib",
-            "diag_1": "label_encoder_diag_1.joblib",
-            "diag_2": "label_encoder_diag_2.joblib",
-            "diag_3": "label_encoder_diag_3.joblib",
-            "gender": "label_encoder_gender.joblib",
-            "glipizide": "label_encoder_glipizide.joblib",
-            "glyburide": "label_encoder_glyburide.joblib",
-            "insulin": "label_encoder_insulin.joblib",
-            "max_glu_serum": "label_encoder_max_glu_serum.joblib",
-            "medical_specialty": "label_encoder_medical_specialty.joblib",
-            "metformin": "label_encoder_metformin.joblib",
-            "race": "label_encoder_race.joblib",
-        }
-        encoders = {col: joblib.load(os.path.join(ENCODERS_DIR, fname)) for col, fname in categorical_encoders.items()}
-        for col in categorical_encoders:
-            if col in df.columns:
-                val = df[col].iloc[0]
-                if pd.isnull(val) or val == "NaN":
-                    val = "NaN"
-                df[col] = [val]
-                df[col] = encoders[col].transform(df[col])
-
-        proba = model.predict_proba(df)[:, 1][0]
-        pred = int(proba >= threshold)
-        risk = determine_risk(pred, proba)
-        log_prediction(
-            db=db,
-            user=current_user,
-            disease="diabetes",
-            input_data=input_data.model_dump(),
-            prediction=pred,
-            probability=proba,
-            risk=risk
+async def predict_diabetes(input_data: DiabetesInput,current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+    return await predict_single("diabetes", "diabetes", input_data, current_user, db)
+
+
+def explain_record(disease: str, record: dict) -> dict:
+    artifacts = get_model(disease)
+    with span("predict.encode"):
+        X = artifacts.pipeline.transform([record])
+    with span("predict.shap"):
+        return compute_shap(artifacts, X)
+
+@router.get("/{prediction_id}/shap")
+async def get_prediction_shap(prediction_id: UUID,current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+    """
+    SHAP attributions for a logged prediction.
+    Served from the cache filled after the predict call; recomputed from the
+    stored input if the entry has expired or was produced by another worker.
+    """
+    shap_result = get_result(str(prediction_id))
+    if shap_result is None:
+        prediction = await run_in_threadpool(
+            lambda: db.query(Prediction).filter(Prediction.id == prediction_id).first()
         )
-        explainer = shap.Explainer(model)
-        shap_values = explainer(df)
+        if not prediction:
+            raise HTTPException(status_code=404, detail="Prediction not found")
+        disease = DISEASE_KEYS.get(prediction.disease_type)
+        if disease is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported disease type: {prediction.disease_type}")
+        try:
+            shap_result = await inference_pool.run(disease, explain_record, disease, prediction.input_data)
+        except InferenceSaturated as e:
+            raise saturated(e)
+        store_result(str(prediction_id), shap_result)
+    return {"prediction_id": str(prediction_id), "shap": shap_result}
 
-        response = {
-            "prediction": int(pred),
-            "probability": round(float(proba), 4),
-            "risk":risk,
-            "shap": {
-                "features": list(df.columns),
-                "shap_values": shap_values.values[0].tolist(),
-                "base_value": convert_numpy(explainer.expected_value)
+
+EXPLANATION_STREAM_POLL = 0.5
+EXPLANATION_STREAM_HEARTBEAT = 15
+
+@router.get("/explanations/{explanation_id}")
+def get_explanation(explanation_id: str,current_user: User = Depends(get_current_user)):
+    job = explanation_queue.get(explanation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Explanation not found or expired")
+    return job.to_dict()
+
+@router.get("/explanations/{explanation_id}/stream")
+async def stream_explanation(explanation_id: str,current_user: User = Depends(get_current_user)):
+    """
+    Server-sent events: comment heartbeats while the explanation is being
+    generated, then a single `explanation` event with the final job state.
+    """
+    if explanation_queue.get(explanation_id) is None:
+        raise HTTPException(status_code=404, detail="Explanation not found or expired")
+
+    async def events():
+        waited = 0.0
+        while True:
+            job = explanation_queue.get(explanation_id)
+            if job is None or job.done:
+                data = job.to_dict() if job else {"explanation_id": explanation_id, "status": "expired"}
+                yield f"event: explanation\ndata: {json.dumps(data)}\n\n"
+                return
+            await asyncio.sleep(EXPLANATION_STREAM_POLL)
+            waited += EXPLANATION_STREAM_POLL
+            if waited >= EXPLANATION_STREAM_HEARTBEAT:
+                waited = 0.0
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def prepare_chunk(artifacts: ModelArtifacts, chunk: list, results: list):
+    """
+    Encode a chunk of validated input dicts in one vectorized pass. If the
+    encoders reject any row (unseen label, out-of-range age, ...) fall back to
+    row-by-row preparation to report exactly which rows failed, then re-run on the rest.
+    """
+    prepare = artifacts.pipeline.transform
+    try:
+        return chunk, prepare([record for _, record in chunk])
+    except Exception:
+        valid = []
+        for index, record in chunk:
+            try:
+                prepare([record])
+                valid.append((index, record))
+            except Exception as e:
+                results[index] = {"index": index, "patient_id": record.get("patient_id"), "error": str(e)}
+        if not valid:
+            return valid, None
+        return valid, prepare([record for _, record in valid])
+
+def score_batch(disease: str, input_model: type[BaseModel], records: List[dict]):
+    """
+    Runs on the inference pool: validate, encode and score a batch.
+    Returns the per-record results (errors filled in) and the scored rows.
+    """
+    artifacts = get_model(disease)
+    results = [None] * len(records)
+
+    # 1. Validate every record on its own so one bad row doesn't reject the batch
+    validated = []
+    for index, record in enumerate(records):
+        try:
+            validated.append((index, input_model.model_validate(record).model_dump()))
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "patient_id": record.get("patient_id") if isinstance(record, dict) else None,
+                "error": e.errors(include_url=False, include_context=False),
             }
+
+    # 2. Encode, scale and score chunk by chunk
+    scored = []
+    for start in range(0, len(validated), BATCH_CHUNK_SIZE):
+        with span("predict.encode"):
+            chunk, X = prepare_chunk(artifacts, validated[start:start + BATCH_CHUNK_SIZE], results)
+        if not chunk:
+            continue
+        with span("predict.predict_proba"):
+            probas = artifacts.predict_proba(X)
+            preds = classify(artifacts, probas)
+        for (index, record), proba, pred in zip(chunk, probas[:, 1], preds):
+            pred = int(pred)
+            scored.append((index, record, pred, float(proba), determine_risk(pred, proba)))
+    return results, scored
+
+async def predict_batch(disease: str, disease_label: str, input_model: type[BaseModel], records: List[dict], current_user: User, db: Session) -> dict:
+    if len(records) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch too large: at most {MAX_BATCH_SIZE} records per request")
+
+    try:
+        results, scored = await inference_pool.run(disease, score_batch, disease, input_model, records)
+    except InferenceSaturated as e:
+        raise saturated(e)
+
+    # 3. One bulk insert for every scored row
+    prediction_ids = await run_in_threadpool(
+        log_predictions,
+        db=db,
+        user=current_user,
+        disease=disease_label,
+        rows=[(record, pred, proba, risk) for _, record, pred, proba, risk in scored]
+    )
+    for (index, record, pred, proba, risk), prediction_id in zip(scored, prediction_ids):
+        results[index] = {
+            "index": index,
+            "patient_id": record["patient_id"],
+            "prediction_id": str(prediction_id),
+            "prediction": pred,
+            "probability": round(proba, 4),
+            "risk": risk,
         }
-        response["explanation"] = explain_with_gemini(response)
-        return response
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+    return {
+        "total": len(records),
+        "scored": len(scored),
+        "failed": len(records) - len(scored),
+        "results": results,
+    }
+
+@router.post("/pneumonia/batch")
+async def predict_pneumonia_batch(records: List[dict] = Body(...),current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+    return await predict_batch("pneumonia", "pneumonia", PneumoniaInput, records, current_user, db)
+
+@router.post("/heart_failure/batch")
+async def predict_heart_failure_batch(records: List[dict] = Body(...),current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+    return await predict_batch("heart_failure", "Heart Failure", HeartFailureInput, records, current_user, db)
+
+@router.post("/diabetes/batch")
+async def predict_diabetes_batch(records: List[dict] = Body(...),current_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+    return await predict_batch("diabetes", "diabetes", DiabetesInput, records, current_user, db)
@@ -1,13 +1,172 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from collections import deque
 import os
+import threading
+import time
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# ── Connection pool ──
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # hosted Postgres drops idle connections
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+
+class PoolMetrics:
+    """Checkout wait times and timeouts of one connection pool."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait += wait
+                self._recent.append(wait)
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "mean_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else None,
+                "p95_wait_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 3) if recent else None,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout, including waits for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """The same, for the asyncio engine."""
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one (asyncpg / aiosqlite)."""
+    url = make_url(url)
+    driver = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {url.get_backend_name()}, set ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def engine_options(url: str) -> dict:
+    url = make_url(url)
+    backend = url.get_backend_name()
+    is_async = url.get_driver_name() in ("asyncpg", "aiosqlite")
+    if backend == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+        if url.database in (None, "", ":memory:"):
+            # one shared connection, or every checkout would see an empty database
+            return {**options, "poolclass": StaticPool}
+    elif backend == "postgresql" and is_async:
+        options = {"connect_args": {
+            "timeout": DB_CONNECT_TIMEOUT,
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)},
+        }}
+    elif backend == "postgresql":
+        options = {"connect_args": {
+            "connect_timeout": DB_CONNECT_TIMEOUT,
+            "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+        }}
+    else:
+        options = {}
+    return {
+        **options,
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ── asyncio engine for async route handlers ──
+# A second pool of its own (same DB_POOL_* sizing), used by app.dependencies.get_async_db.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+
+# expire_on_commit=False: attributes of committed objects can't be lazily reloaded under asyncio
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_occupancy(pool) -> dict:
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "saturation": round(pool.checkedout() / capacity, 4) if capacity else None,
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.metrics.snapshot())
+    return stats
+
+
+def pool_stats() -> dict:
+    """Pool occupancy and checkout wait metrics, plus a round-trip health probe."""
+    stats = pool_occupancy(engine.pool)
+    stats["async_pool"] = pool_occupancy(async_engine.sync_engine.pool)
+    start = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        stats["healthy"] = True
+    except Exception as e:
+        print("Database health check failed:", e)
+        stats["healthy"] = False
+    stats["ping_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return stats
+
 
 Base = declarative_base()
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer
+from datetime import datetime
+from app.db import Base
+
+class ExplanationCacheEntry(Base):
+    __tablename__ = "explanation_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 of the explanation inputs
+    disease = Column(String, nullable=False)
+    explanation = Column(Text, nullable=False)
+    hits = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Text, DateTime, text, ARRAY
-from sqlalchemy.dialects.postgresql import UUID,ARRAY
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 from app.db import Base
 
@@ -7,8 +7,29 @@ class Notification(Base):
     __tablename__ = "notifications"
 
     id = Column(UUID(as_uuid=True), primary_key=True,server_default=text("gen_random_uuid()"))
-    user_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False)
     message = Column(Text, nullable=False)
     link = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    read_by = Column(ARRAY(UUID(as_uuid=True)), default=[])
\ No newline at end of file
+
+
+class NotificationRecipient(Base):
+    """
+    One inbox row per (notification, recipient), replacing the user_ids /
+    read_by arrays on notifications. created_at is copied from the
+    notification so a user's inbox is read straight off one index.
+    """
+    __tablename__ = "notification_recipients"
+
+    notification_id = Column(UUID(as_uuid=True), ForeignKey("notifications.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    read_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # newest-first inbox pages, keyset on (created_at, notification_id)
+        Index("ix_notification_recipients_user_created", user_id, created_at.desc(), notification_id.desc()),
+        # unread counts only touch unread rows
+        Index("ix_notification_recipients_unread", user_id, postgresql_where=read_at.is_(None)),
+        # prune_notifications job: old, read rows
+        Index("ix_notification_recipients_read_created", created_at, postgresql_where=read_at.isnot(None)),
+    )
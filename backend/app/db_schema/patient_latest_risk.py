@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.db import Base
+
+class PatientLatestRisk(Base):
+    """
+    One row per patient: their most recent prediction, kept current by
+    log_prediction / log_predictions and by accepted escalations
+    (app/utils/latest_risk.py), so "latest risk" is a primary-key lookup.
+    """
+    __tablename__ = "patient_latest_risk"
+
+    patient_id = Column(String, ForeignKey("patient_reference.patient_id"), primary_key=True)
+    prediction_id = Column(UUID(as_uuid=True), ForeignKey("predictions.id"), nullable=False)
+    disease_type = Column(String, nullable=False)
+    risk = Column(String)
+    predicted_class = Column(Integer, nullable=False)
+    predicted_probability = Column(Float, nullable=False)
+    predicted_at = Column(DateTime, nullable=False)  # Prediction.timestamp
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # GET /patients/list: sort by probability, filter by risk, both in keyset order
+        Index("ix_patient_latest_risk_probability", predicted_probability.desc(), patient_id),
+        Index("ix_patient_latest_risk_risk", risk, patient_id),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Date,ForeignKey, text, Integer, JSON, CheckConstraint
+from sqlalchemy import Column, String, Text, DateTime, Date,ForeignKey, text, Integer, JSON, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 from app.db import Base
@@ -6,10 +6,15 @@ from app.db import Base
 class Assignment(Base):
     __tablename__ = "assignments"
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     patient_id = Column(String, ForeignKey("patient_reference.patient_id"))
     assigned_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # latest assignee per patient (GET /patients/list) and the assigned / unassigned filters
+        Index("ix_assignments_patient_id_assigned_at", patient_id, assigned_at.desc()),
+    )
+
 class PatientReference(Base):
     __tablename__ = "patient_reference"
     patient_id = Column(String, primary_key=True)
@@ -20,6 +25,11 @@ class PatientReference(Base):
     disease_type = Column(String)
     clinical_info = Column(JSON)
 
+    __table_args__ = (
+        # disease_type filter of GET /patients/list, in keyset order
+        Index("ix_patient_reference_disease_type", disease_type, patient_id),
+    )
+
 class FollowUp(Base):
     __tablename__ = "follow_ups"
 
@@ -35,5 +45,7 @@ class FollowUp(Base):
     __table_args__ = (
         CheckConstraint("status IN ('pending', 'completed', 'cancelled', 'upcoming')"),
         CheckConstraint("follow_up_type IN ('phone', 'onsite', 'virtual','')"),
+        # missed_followups job and the overdue follow-up counter
+        Index("ix_follow_ups_status_date", "status", "follow_up_date"),
     )
 
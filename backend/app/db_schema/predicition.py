@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, JSON, ForeignKey,Integer,text
+from sqlalchemy import Column, String, Float, DateTime, JSON, ForeignKey,Integer,text,Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -17,3 +17,7 @@ class Prediction(Base):
     risk = Column(String)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # latest prediction(s) of a patient without scanning the table
+        Index("ix_predictions_patient_id_timestamp", patient_id, timestamp.desc()),
+    )
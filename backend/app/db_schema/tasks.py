@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum,Date
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum,Date,Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 from sqlalchemy.sql import text
@@ -16,3 +16,9 @@ class Task(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     due_date = Column(Date, nullable=True)
+    overdue_notified_at = Column(DateTime, nullable=True)  # set by the overdue_tasks job
+
+    __table_args__ = (
+        # overdue_tasks job: pending tasks past their due date
+        Index("ix_tasks_status_due_date", status, due_date),
+    )
@@ -1,4 +1,4 @@
-from app.db import SessionLocal
+from app.db import AsyncSessionLocal, SessionLocal
 
 def get_db():
     db = SessionLocal()
@@ -6,3 +6,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
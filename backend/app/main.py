@@ -1,14 +1,24 @@
 import os
-from datetime import datetime
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI,Request, Depends
-from app.api import predict,auth,patients,tasks,escalations,notifications
+from fastapi import FastAPI,Request
+from app.api import predict,auth,patients,tasks,escalations,notifications,internal,health
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.utils.error_logger import log_error_to_db
 from app.dependencies import get_db
+from app.db import async_engine, engine
 import traceback
-from app.db_schema.patient_related import FollowUp
+from app.services.model_registry import model_registry, PRELOAD_MODELS
+from app.services.explanation import EXPLANATION_BACKEND, import_sdk
+from app.services.explanation_queue import explanation_queue
+from app.services.inference_pool import inference_pool
+from app.services.audit_writer import audit_writer
+from app.services.notification_broker import notification_broker
+from app.services.password_hasher import password_hasher
+from app.services.scheduler import scheduler
+from app.services.maintenance_jobs import register_maintenance_jobs
+from app.services.instrumentation import InstrumentationMiddleware, instrument_engine
+from app.services.warmup import warmup
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,6 +30,16 @@ app.include_router(patients.router)
 app.include_router(tasks.router)
 app.include_router(escalations.router)
 app.include_router(notifications.router)
+app.include_router(internal.router)
+app.include_router(health.router)
+register_maintenance_jobs(scheduler)
+# Load every disease model (and its SHAP explainer) once so the first
+# predictions don't pay for it; in the background, so the rest of the API
+# is up meanwhile and /health/ready says when predictions are fast
+if PRELOAD_MODELS:
+    warmup.register("models", model_registry.load_all)
+if EXPLANATION_BACKEND == "gemini":
+    warmup.register("gemini_sdk", import_sdk)
 
 # Allow localhost frontend access
 origins = [
@@ -34,7 +54,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],               # allow all HTTP methods
     allow_headers=["*"],               # allow all headers
+    expose_headers=["X-Next-Cursor", "Server-Timing"],  # notification paging, per-stage timings
 )
+# outermost, so request timings include every other middleware
+app.add_middleware(InstrumentationMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+@app.on_event("startup")
+def start_workers():
+    inference_pool.start()
+    audit_writer.start()
+    warmup.start()
+
+@app.on_event("startup")
+async def start_scheduler():
+    scheduler.start()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+
+@app.on_event("shutdown")
+def stop_workers():
+    scheduler.shutdown()
+    explanation_queue.shutdown()
+    inference_pool.shutdown()
+    notification_broker.shutdown()
+    password_hasher.shutdown()
+    # last, so audit entries from requests finishing above are still written
+    audit_writer.shutdown()
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -50,14 +99,3 @@ async def global_exception_handler(request: Request, exc: Exception):
         status_code=500,
         content={"detail": f"Internal Server Error: {str(exc)}"}
     )
-@app.patch("/internal/update-missed-followups")
-def update_missed_followups(
-    db: Session = Depends(get_db),
-):
-    updated = (
-        db.query(FollowUp)
-        .filter(FollowUp.status == "upcoming", FollowUp.follow_up_date < datetime.utcnow())
-        .update({FollowUp.status: "pending"})
-    )
-    db.commit()
-    return {"updated_rows": updated}
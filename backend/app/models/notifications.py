@@ -5,11 +5,13 @@ from uuid import UUID
 
 class NotificationSchema(BaseModel):
     id: UUID
+    # user_ids / read_by only ever hold the requesting user now; kept for existing clients
     user_ids: List[UUID]
     message: str
     link: Optional[str]
     created_at: datetime
     read_by: List[UUID]
+    read_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
@@ -18,3 +20,7 @@ class NotificationCreate(BaseModel):
     user_ids: List[UUID]
     message: str
     link: Optional[str] = None
+
+
+class UnreadCount(BaseModel):
+    unread: int
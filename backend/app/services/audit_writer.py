@@ -0,0 +1,157 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from sqlalchemy import insert
+from app.db import SessionLocal
+from app.db_schema.logs import AuditLog
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+# how long the first entry of a batch may wait for others before it is written
+AUDIT_FLUSH_INTERVAL_MS = float(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "200"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+# JSON lines, appended when the database is unreachable or the queue is full
+AUDIT_FALLBACK_PATH = os.getenv("AUDIT_FALLBACK_PATH", "audit_fallback.jsonl")
+
+
+class AuditWriter:
+    """
+    Writes audit_log rows off the request path. Entries go into a bounded
+    in-process queue; a background thread writes them with one multi-row
+    INSERT per batch (up to `batch_size` rows, or whatever arrived within
+    `flush_interval_ms` of the first one) on its own session.
+
+    Entries are never silently lost: a full queue or a failed INSERT appends
+    them to `fallback_path` as JSON lines instead. `shutdown` drains the queue.
+    """
+
+    def __init__(self, batch_size: int, flush_interval_ms: float, queue_size: int, fallback_path: str):
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval_ms / 1000
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._fallback_path = fallback_path
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.overflowed = 0
+        self.to_fallback = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+        # scripts that log without going through the app's shutdown hook
+        atexit.register(self.shutdown)
+
+    def submit(self, entry: dict):
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.overflowed += 1
+            self._write_fallback([entry])
+
+    def _take_batch(self) -> list[dict]:
+        try:
+            batch = [self._queue.get(timeout=self._flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self._stopping.is_set():
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list[dict]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog).values(batch))
+            db.commit()
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+        except Exception as e:
+            print("Audit log write failed, using fallback file:", e)
+            db.rollback()
+            with self._lock:
+                self.failed_batches += 1
+            self._write_fallback(batch)
+        finally:
+            db.close()
+
+    def _write_fallback(self, entries: list[dict]):
+        try:
+            with self._file_lock, open(self._fallback_path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            with self._lock:
+                self.to_fallback += len(entries)
+        except OSError as e:
+            print(f"Audit log fallback failed, dropped {len(entries)} entries:", e)
+
+    def flush(self):
+        """Write everything queued so far on the calling thread."""
+        while True:
+            batch = []
+            try:
+                while len(batch) < self._batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return
+            self._write(batch)
+
+    def shutdown(self, timeout: float = 10):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "batch_size": self._batch_size,
+                "flush_interval_ms": self._flush_interval * 1000,
+                "written": self.written,
+                "batches": self.batches,
+                "mean_batch_size": round(self.written / self.batches, 2) if self.batches else None,
+                "failed_batches": self.failed_batches,
+                "overflowed": self.overflowed,
+                "to_fallback_file": self.to_fallback,
+            }
+
+
+audit_writer = AuditWriter(
+    batch_size=AUDIT_BATCH_SIZE,
+    flush_interval_ms=AUDIT_FLUSH_INTERVAL_MS,
+    queue_size=AUDIT_QUEUE_SIZE,
+    fallback_path=AUDIT_FALLBACK_PATH,
+)
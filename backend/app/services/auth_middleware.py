@@ -1,13 +1,17 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.db import SessionLocal
 from app.db_schema.user import User
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.dependencies import get_async_db
 from app.utils.jwt import SECRET_KEY, ALGORITHM
+from app.services.principal_cache import UserPrincipal, principal_cache
 from uuid import UUID
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
 def get_db():
     db = SessionLocal()
@@ -16,25 +20,70 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str | None) -> tuple[UUID, int | None]:
+    """(user id, iat) of a valid token."""
+    if not token:
+        raise _credentials_exception()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
-        if user is None:
-            raise credentials_exception
-        return user
-    except JWTError:
-        raise credentials_exception
-
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+            raise _credentials_exception()
+        return UUID(user_id), payload.get("iat")
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+
+def user_from_token(token: str | None, db: Session) -> UserPrincipal:
+    user_id, issued_at = _decode_token(token)
+    principal = principal_cache.get(user_id, issued_at)
+    if principal is not None:
+        return principal
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        raise _credentials_exception()
+    principal = UserPrincipal.from_user(user)
+    principal_cache.put(issued_at, principal)
+    return principal
+
+async def user_from_token_async(token: str | None, db: AsyncSession) -> UserPrincipal:
+    user_id, issued_at = _decode_token(token)
+    principal = principal_cache.get(user_id, issued_at)
+    if principal is not None:
+        return principal
+    user = await db.get(User, user_id)
+    if user is None:
+        raise _credentials_exception()
+    principal = UserPrincipal.from_user(user)
+    principal_cache.put(issued_at, principal)
+    return principal
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserPrincipal:
+    return user_from_token(token, db)
+
+def get_stream_user(
+    token: str | None = Depends(optional_oauth2_scheme),
+    access_token: str | None = Query(None, description="For clients that cannot set headers (EventSource)"),
+    db: Session = Depends(get_db),
+) -> UserPrincipal:
+    return user_from_token(token or access_token, db)
+
+def get_current_admin_user(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+# For async handlers: resolve the user on the event loop instead of a threadpool hop
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> UserPrincipal:
+    return await user_from_token_async(token, db)
+
+async def get_current_admin_user_async(current_user: UserPrincipal = Depends(get_current_user_async)) -> UserPrincipal:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from datetime import date
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.db_schema.escalations import Escalation
+from app.db_schema.patient_latest_risk import PatientLatestRisk
+from app.db_schema.patient_related import PatientReference, Assignment, FollowUp
+from app.db_schema.tasks import Task
+
+# how often the dashboard_counters job (app/services/maintenance_jobs.py) recounts
+DASHBOARD_RECONCILE_SECONDS = int(os.getenv("DASHBOARD_RECONCILE_SECONDS", "300"))
+RISK_LEVELS = ("High", "Medium", "Low", "Unknown")
+
+
+def count_risk_distribution(db: Session) -> dict:
+    rows = (
+        db.query(PatientLatestRisk.risk, func.count())
+        .join(PatientReference, PatientReference.patient_id == PatientLatestRisk.patient_id)
+        .group_by(PatientLatestRisk.risk)
+        .all()
+    )
+    distribution = dict.fromkeys(RISK_LEVELS, 0)
+    for risk, count in rows:
+        distribution[risk if risk in distribution else "Unknown"] += count
+    # patients without any prediction yet
+    distribution["Unknown"] += db.query(PatientReference).count() - sum(count for _, count in rows)
+    return distribution
+
+
+def count_pending_tasks(db: Session) -> int:
+    return db.query(Task).filter(Task.status == "pending").count()
+
+
+def count_pending_escalations(db: Session) -> int:
+    return db.query(Escalation).filter(Escalation.status == "pending").count()
+
+
+def count_unassigned_patients(db: Session) -> int:
+    assigned = db.query(Assignment.id).filter(Assignment.patient_id == PatientReference.patient_id)
+    return db.query(PatientReference).filter(~assigned.exists()).count()
+
+
+def count_overdue_followups(db: Session) -> int:
+    return (
+        db.query(FollowUp)
+        .filter(FollowUp.status.in_(("pending", "upcoming")), FollowUp.follow_up_date < date.today())
+        .count()
+    )
+
+
+COUNTERS = {
+    "risk_distribution": count_risk_distribution,
+    "pending_tasks": count_pending_tasks,
+    "pending_escalations": count_pending_escalations,
+    "unassigned_patients": count_unassigned_patients,
+    "overdue_followups": count_overdue_followups,
+}
+
+
+class DashboardCounters:
+    """
+    In-process cache of the admin dashboard counters.
+
+    Write paths report committed changes either as exact deltas (adjust /
+    risk_changed) or, where the delta is not known cheaply, by invalidating
+    a counter so the next read recounts just that one. A periodic
+    reconciliation recounts everything to catch drift, e.g. writes made by
+    other worker processes. A recount that overlapped a reported change is
+    not stored, so it cannot overwrite the cache with a pre-write count.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._stale = set(COUNTERS)
+        self._generation = 0
+        self.reconciled_at = None
+        self.reconciliations = 0
+        self.discarded = 0
+        self.last_drift = {}
+
+    def adjust(self, **deltas: int):
+        with self._lock:
+            self._generation += 1
+            for name, delta in deltas.items():
+                if name not in self._stale:
+                    self._values[name] += delta
+
+    def risk_changed(self, old: str | None, new: str | None):
+        with self._lock:
+            self._generation += 1
+            if "risk_distribution" in self._stale:
+                return
+            distribution = self._values["risk_distribution"]
+            distribution[old if old in distribution else "Unknown"] -= 1
+            distribution[new if new in distribution else "Unknown"] += 1
+
+    def invalidate(self, *names: str):
+        with self._lock:
+            self._generation += 1
+            self._stale.update(names)
+
+    def snapshot(self, db: Session) -> dict:
+        with self._lock:
+            stale = set(self._stale)
+            generation = self._generation
+        fresh = {name: COUNTERS[name](db) for name in stale}
+        with self._lock:
+            if generation == self._generation:
+                self._values.update(fresh)
+                self._stale.difference_update(fresh)
+            elif fresh:
+                # answer this read with the recount but leave the counters stale
+                self.discarded += 1
+            values = {**self._values, **fresh}
+            return {name: (dict(value) if isinstance(value, dict) else value) for name, value in values.items()}
+
+    def reconcile(self, db: Session) -> dict:
+        """Recount everything; returns counters that had drifted (cached, actual)."""
+        with self._lock:
+            generation = self._generation
+        fresh = {name: count(db) for name, count in COUNTERS.items()}
+        with self._lock:
+            if generation != self._generation:
+                # a change was reported mid-recount; the next run tries again
+                self.discarded += 1
+                return {}
+            drift = {
+                name: (self._values.get(name), value)
+                for name, value in fresh.items()
+                if name not in self._stale and self._values.get(name) != value
+            }
+            self._values = fresh
+            self._stale.clear()
+            self.reconciled_at = time.time()
+            self.reconciliations += 1
+            self.last_drift = drift
+        if drift:
+            print("Dashboard counters drifted:", drift)
+        return drift
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "reconciled_at": self.reconciled_at,
+                "reconciliations": self.reconciliations,
+                "discarded": self.discarded,
+                "last_drift": self.last_drift,
+                "stale": sorted(self._stale),
+            }
+
+
+dashboard_counters = DashboardCounters()
@@ -1,29 +1,51 @@
 from dotenv import load_dotenv
-from google import genai
-from google.genai import types
 import os
+import threading
+from app.services.instrumentation import span
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-def explain_with_gemini(response: dict) -> str:
-    explanation = ""
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+# "gemini" calls the Gemini API; "stub" renders a local template so the
+# explanation pipeline can run offline (local development, load tests)
+EXPLANATION_BACKEND = os.getenv("EXPLANATION_BACKEND", "gemini").lower()
 
-    # Initialize Gemini Client
-    client = genai.Client(api_key=GEMINI_API_KEY)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    One Gemini client per process; it keeps its HTTP connection pool warm.
+    The SDK takes most of a second to import, so it is only imported here
+    (or by the startup warm-up) rather than when the app loads.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google import genai
+                _client = genai.Client(api_key=GEMINI_API_KEY)
+    return _client
 
-    # Extract values
-    prediction_label = "Readmitted" if response["prediction"] == 1 else "Not Readmitted"
-    probability = response["probability"]
 
-    # Build SHAP feature impact list
+def import_sdk():
+    """Imports the Gemini SDK ahead of the first explanation (startup warm-up)."""
+    from google.genai import types  # noqa: F401
+
+
+def top_shap_features(response: dict, k: int = 7) -> list[tuple[str, float]]:
     shap_pairs = list(zip(response["shap"]["features"], response["shap"]["shap_values"]))
     shap_pairs.sort(key=lambda x: abs(x[1]), reverse=True)
+    return shap_pairs[:k]
 
-    top_features_text = "\n".join(
-        [f"- {feature}: SHAP = {shap:.3f}" for feature, shap in shap_pairs[:7]]
-    )
+
+def build_prompt(response: dict) -> str:
+    # Extract values
+    prediction_label = "Readmitted" if response["prediction"] == 1 else "Not Readmitted"
+    probability = response["probability"]
 
     # Build dynamic prompt
-    input_text = f"""
+    return f"""
 You are a medical assistant AI helping explain a hospital readmission prediction made by a machine learning model.
 
 Here is the patient's result:
@@ -53,6 +75,12 @@ Be sure to:
 This explanation will be shown to clinicians and care teams, so make it informative and accessible. Return the response as an HTML string.
 """
 
+
+def explain_with_gemini(response: dict) -> str:
+    from google.genai import types
+    client = get_client()
+    input_text = build_prompt(response)
+
     # Prepare Gemini payload
     contents = [
         types.Content(
@@ -67,12 +95,32 @@ This explanation will be shown to clinicians and care teams, so make it informat
         response_mime_type="text/plain"
     )
 
-    # Stream response from Gemini
-    for chunk in client.models.generate_content_stream(
-        model="gemini-2.5-flash",
+    # Explanations are generated off the request path, so a single
+    # non-streaming call is enough
+    result = client.models.generate_content(
+        model=GEMINI_MODEL,
         contents=contents,
         config=generate_content_config,
-    ):
-        explanation += chunk.text
+    )
+    return result.text or ""
+
+
+def explain_with_stub(response: dict) -> str:
+    """Deterministic, offline stand-in for explain_with_gemini."""
+    prediction_label = "Readmitted" if response["prediction"] == 1 else "Not Readmitted"
+    top = top_shap_features(response, k=4)
+    increasing = "".join(f"<li>{feat}: {val:.3f}</li>" for feat, val in top if val > 0)
+    decreasing = "".join(f"<li>{feat}: {val:.3f}</li>" for feat, val in top if val <= 0)
+    return (
+        f"<h3>Factors Increasing Risk</h3><ul>{increasing}</ul>"
+        f"<h3>Factors Decreasing Risk</h3><ul>{decreasing}</ul>"
+        f"<h3>Summary</h3><p>Prediction: {prediction_label} "
+        f"({round(response['probability'] * 100, 2)}% probability of readmission).</p>"
+    )
+
 
-    return explanation
\ No newline at end of file
+def generate_explanation(response: dict) -> str:
+    with span(f"explanation.{EXPLANATION_BACKEND}"):
+        if EXPLANATION_BACKEND == "stub":
+            return explain_with_stub(response)
+        return explain_with_gemini(response)
\ No newline at end of file
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from cachetools import TTLCache
+from sqlalchemy import func
+from app.db import SessionLocal
+from app.db_schema.explanation_cache import ExplanationCacheEntry
+from app.services.explanation import top_shap_features
+
+EXPLANATION_CACHE_MEMORY_SIZE = int(os.getenv("EXPLANATION_CACHE_MEMORY_SIZE", "2048"))
+EXPLANATION_CACHE_TTL = int(os.getenv("EXPLANATION_CACHE_TTL", str(7 * 24 * 3600)))
+EXPLANATION_CACHE_MAX_ROWS = int(os.getenv("EXPLANATION_CACHE_MAX_ROWS", "50000"))
+EXPLANATION_CACHE_PERSIST = os.getenv("EXPLANATION_CACHE_PERSIST", "true").lower() == "true"
+EXPLANATION_CACHE_TOP_K = int(os.getenv("EXPLANATION_CACHE_TOP_K", "7"))
+EXPLANATION_CACHE_SHAP_DECIMALS = int(os.getenv("EXPLANATION_CACHE_SHAP_DECIMALS", "2"))
+EXPLANATION_CACHE_PROB_DECIMALS = int(os.getenv("EXPLANATION_CACHE_PROB_DECIMALS", "2"))
+# run the TTL / size eviction on the DB tier every N stores
+EXPLANATION_CACHE_PRUNE_EVERY = int(os.getenv("EXPLANATION_CACHE_PRUNE_EVERY", "100"))
+
+
+def cache_key(payload: dict) -> str:
+    """
+    Content address of an explanation: disease, predicted class, rounded
+    probability and the top-k SHAP features with quantized values. Patients
+    with near-identical profiles share a key and therefore an explanation.
+    """
+    top = [
+        # "+ 0.0" folds -0.0 into 0.0 so both hash the same
+        [feature, round(float(value), EXPLANATION_CACHE_SHAP_DECIMALS) + 0.0]
+        for feature, value in top_shap_features(payload, k=EXPLANATION_CACHE_TOP_K)
+    ]
+    material = {
+        "disease": payload.get("disease"),
+        "prediction": int(payload["prediction"]),
+        "probability": round(float(payload["probability"]), EXPLANATION_CACHE_PROB_DECIMALS),
+        "top": top,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+class ExplanationCache:
+    """
+    Two-tier explanation cache: an in-process LRU (bounded, with TTL) in front
+    of the explanation_cache table, which survives restarts and is shared by
+    every worker. DB errors are logged and treated as misses so the cache can
+    never break explanation generation.
+    """
+
+    def __init__(self, memory_size: int, ttl: int, max_rows: int, persist: bool):
+        self._memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        self._ttl = ttl
+        self._max_rows = max_rows
+        self._persist = persist
+        self._lock = threading.Lock()
+        self._stores_since_prune = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def get_memory(self, payload: dict) -> str | None:
+        """Memory tier only: safe to call on the request path."""
+        key = cache_key(payload)
+        with self._lock:
+            explanation = self._memory.get(key)
+            if explanation is not None:
+                self.memory_hits += 1
+        return explanation
+
+    def get(self, payload: dict) -> str | None:
+        key = cache_key(payload)
+        with self._lock:
+            explanation = self._memory.get(key)
+            if explanation is not None:
+                self.memory_hits += 1
+                return explanation
+
+        explanation = self._db_get(key) if self._persist else None
+        with self._lock:
+            if explanation is None:
+                self.misses += 1
+            else:
+                self.db_hits += 1
+                self._memory[key] = explanation
+        return explanation
+
+    def put(self, payload: dict, explanation: str):
+        if not explanation:
+            return
+        key = cache_key(payload)
+        with self._lock:
+            self._memory[key] = explanation
+            self.stores += 1
+            self._stores_since_prune += 1
+            prune = self._stores_since_prune >= EXPLANATION_CACHE_PRUNE_EVERY
+            if prune:
+                self._stores_since_prune = 0
+        if self._persist:
+            self._db_put(key, payload.get("disease") or "", explanation)
+            if prune:
+                self.prune()
+
+    def _db_get(self, key: str) -> str | None:
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=self._ttl)
+            entry = (
+                db.query(ExplanationCacheEntry)
+                .filter(ExplanationCacheEntry.cache_key == key, ExplanationCacheEntry.created_at >= cutoff)
+                .first()
+            )
+            if entry is None:
+                return None
+            entry.hits = ExplanationCacheEntry.hits + 1
+            entry.last_used_at = datetime.utcnow()
+            explanation = entry.explanation
+            db.commit()
+            return explanation
+        except Exception as e:
+            db.rollback()
+            print("Explanation cache read failed:", e)
+            return None
+        finally:
+            db.close()
+
+    def _db_put(self, key: str, disease: str, explanation: str):
+        db = SessionLocal()
+        try:
+            db.merge(ExplanationCacheEntry(
+                cache_key=key,
+                disease=disease,
+                explanation=explanation,
+                created_at=datetime.utcnow(),
+                last_used_at=datetime.utcnow(),
+            ))
+            db.commit()
+        except Exception as e:
+            # e.g. another worker stored the same key first
+            db.rollback()
+            print("Explanation cache write failed:", e)
+        finally:
+            db.close()
+
+    def prune(self) -> int:
+        """Drop expired rows, then the least recently used ones beyond max_rows."""
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=self._ttl)
+            deleted = (
+                db.query(ExplanationCacheEntry)
+                .filter(ExplanationCacheEntry.created_at < cutoff)
+                .delete(synchronize_session=False)
+            )
+            total = db.query(func.count(ExplanationCacheEntry.cache_key)).scalar()
+            if total > self._max_rows:
+                oldest_kept = (
+                    db.query(ExplanationCacheEntry.last_used_at)
+                    .order_by(ExplanationCacheEntry.last_used_at.desc())
+                    .offset(self._max_rows - 1)
+                    .limit(1)
+                    .scalar()
+                )
+                deleted += (
+                    db.query(ExplanationCacheEntry)
+                    .filter(ExplanationCacheEntry.last_used_at < oldest_kept)
+                    .delete(synchronize_session=False)
+                )
+            db.commit()
+            with self._lock:
+                self.evictions += deleted
+            return deleted
+        except Exception as e:
+            db.rollback()
+            print("Explanation cache prune failed:", e)
+            return 0
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else None,
+                "stores": self.stores,
+                "db_evictions": self.evictions,
+            }
+
+
+explanation_cache = ExplanationCache(
+    memory_size=EXPLANATION_CACHE_MEMORY_SIZE,
+    ttl=EXPLANATION_CACHE_TTL,
+    max_rows=EXPLANATION_CACHE_MAX_ROWS,
+    persist=EXPLANATION_CACHE_PERSIST,
+)
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from cachetools import TTLCache
+from app.services.explanation import generate_explanation
+from app.services.explanation_cache import explanation_cache
+
+EXPLANATION_WORKERS = int(os.getenv("EXPLANATION_WORKERS", "4"))
+EXPLANATION_QUEUE_SIZE = int(os.getenv("EXPLANATION_QUEUE_SIZE", "256"))
+EXPLANATION_RESULT_TTL = int(os.getenv("EXPLANATION_RESULT_TTL", "3600"))
+EXPLANATION_RESULT_MAX = int(os.getenv("EXPLANATION_RESULT_MAX", "10000"))
+
+
+class ExplanationJob:
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = "pending"  # pending, running, ready, failed
+        self.explanation = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("ready", "failed")
+
+    def finish(self, explanation: str):
+        self.explanation = explanation
+        self.finished_at = time.time()
+        self.status = "ready"
+
+    def fail(self, error: str):
+        self.error = error
+        self.finished_at = time.time()
+        self.status = "failed"
+
+    def to_dict(self) -> dict:
+        return {
+            "explanation_id": self.id,
+            "status": self.status,
+            "explanation": self.explanation,
+            "error": self.error,
+        }
+
+
+class ExplanationQueue:
+    """
+    Generates LLM explanations on a small dedicated worker pool so predict
+    requests never wait on the LLM. At most `workers` explanations run at once
+    and at most `max_pending` may be queued; beyond that new jobs fail fast
+    instead of piling up behind a slow backend.
+    """
+
+    def __init__(self, workers: int, max_pending: int, result_ttl: int, result_max: int):
+        self._workers = workers
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._jobs = TTLCache(maxsize=result_max, ttl=result_ttl)
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="explanation")
+            return self._executor
+
+    def submit(self, build_payload: Callable[[], dict], payload: dict | None = None) -> ExplanationJob:
+        """
+        Queue an explanation. build_payload runs on the worker and returns the
+        prediction response (with SHAP values) to explain. When the payload is
+        already known it is checked against the in-memory cache first, and a hit
+        returns a finished job without touching the worker pool.
+        """
+        job = ExplanationJob(uuid.uuid4().hex)
+        with self._lock:
+            self._jobs[job.id] = job
+        if payload is not None:
+            cached = explanation_cache.get_memory(payload)
+            if cached is not None:
+                job.finish(cached)
+                return job
+        if not self._slots.acquire(blocking=False):
+            job.fail("Explanation queue is full, try again later")
+            return job
+        self._get_executor().submit(self._run, job, build_payload)
+        return job
+
+    def _run(self, job: ExplanationJob, build_payload: Callable[[], dict]):
+        try:
+            job.status = "running"
+            payload = build_payload()
+            explanation = explanation_cache.get(payload)
+            if explanation is None:
+                explanation = generate_explanation(payload)
+                explanation_cache.put(payload, explanation)
+            job.finish(explanation)
+        except Exception as e:
+            job.fail(str(e))
+        finally:
+            self._slots.release()
+
+    def get(self, job_id: str) -> ExplanationJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+explanation_queue = ExplanationQueue(
+    workers=EXPLANATION_WORKERS,
+    max_pending=EXPLANATION_QUEUE_SIZE,
+    result_ttl=EXPLANATION_RESULT_TTL,
+    result_max=EXPLANATION_RESULT_MAX,
+)
@@ -0,0 +1,181 @@
+import threading
+import warnings
+from contextlib import contextmanager
+import numpy as np
+from app.models.predict_inputs import DiabetesInput
+
+_warnings_lock = threading.RLock()
+
+
+@contextmanager
+def array_input():
+    """
+    Silences sklearn's "X does not have valid feature names" for the block
+    only: the models were fitted on DataFrames and we feed them arrays already
+    in training column order. catch_warnings() swaps process-wide state, so
+    blocks are serialized; only the uncompiled predict_proba fallback and the
+    load-time compile check take this path.
+    """
+    with _warnings_lock, warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+        yield
+
+
+def label_lookup(encoder) -> dict:
+    """LabelEncoder.transform as a dict lookup."""
+    return {label: code for code, label in enumerate(encoder.classes_.tolist())}
+
+
+def encode(lookup: dict, values: list, column: str) -> list:
+    try:
+        return [lookup[value] for value in values]
+    except KeyError as e:
+        # same message LabelEncoder.transform raises
+        raise ValueError(f"y contains previously unseen labels: {e.args[0]!r} ({column})") from None
+
+
+def scaler_vectors(scaler, scaled_cols: list, feature_names: list) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Full-width mean / scale vectors so standardization is a single
+    (X - mean) / scale over the whole matrix. Unscaled columns get mean 0 and
+    scale 1, which leaves them bit-for-bit unchanged.
+    """
+    mean = np.zeros(len(feature_names))
+    scale = np.ones(len(feature_names))
+    position = {name: i for i, name in enumerate(feature_names)}
+    for j, name in enumerate(scaled_cols):
+        if scaler.mean_ is not None:
+            mean[position[name]] = scaler.mean_[j]
+        if scaler.scale_ is not None:
+            scale[position[name]] = scaler.scale_[j]
+    return mean, scale
+
+
+class FeaturePipeline:
+    """
+    Turns validated input dicts (Pydantic model_dump()) straight into the
+    model's input matrix in training column order, without pandas.
+    Subclasses fill the columns; scaling is shared.
+    """
+
+    def __init__(self, feature_names: list, dtype, mean: np.ndarray = None, scale: np.ndarray = None, order: str = "C"):
+        self.feature_names = list(feature_names)
+        self.dtype = dtype
+        self.order = order
+        self._position = {name: i for i, name in enumerate(self.feature_names)}
+        self._mean = mean
+        self._scale = scale
+
+    def transform(self, records: list[dict]) -> np.ndarray:
+        X = np.zeros((len(records), len(self.feature_names)), dtype=np.float64, order=self.order)
+        self.fill(X, records)
+        if self._mean is not None:
+            X -= self._mean
+            X /= self._scale
+        # float64 until the end so the scaler arithmetic matches sklearn exactly
+        return np.asarray(X, dtype=self.dtype, order=self.order)
+
+    def fill(self, X: np.ndarray, records: list[dict]):
+        raise NotImplementedError
+
+    def column(self, name: str) -> int:
+        return self._position[name]
+
+
+class PneumoniaPipeline(FeaturePipeline):
+    LABEL_COLUMNS = ("gender", "smoking_status", "discharge_disposition")
+
+    def __init__(self, artifacts):
+        feature_names = artifacts.feature_order
+        mean, scale = scaler_vectors(artifacts.scaler, artifacts.numerical_cols, feature_names)
+        # float64: the voting ensemble includes a LogisticRegression, which
+        # (unlike the tree members) does not round its input to float32.
+        # Column-major like the DataFrame it replaces, so BLAS sums the
+        # LogisticRegression dot products in the same order.
+        super().__init__(feature_names, np.float64, mean, scale, order="F")
+        encoders = artifacts.encoders
+        self._lookups = {col: label_lookup(encoders[col]) for col in self.LABEL_COLUMNS}
+        self._comorb_columns = {
+            label: self.column(label) for label in encoders["multi_comorb"].classes_.tolist()
+        }
+        encoded = set(self.LABEL_COLUMNS) | set(self._comorb_columns)
+        self._numeric = [name for name in self.feature_names if name not in encoded]
+
+    def fill(self, X, records):
+        for name in self._numeric:
+            X[:, self.column(name)] = [record[name] for record in records]
+        for name, lookup in self._lookups.items():
+            X[:, self.column(name)] = encode(lookup, [record[name] for record in records], name)
+        for i, record in enumerate(records):
+            comorbidities = record["comorbidities"]
+            if isinstance(comorbidities, str):
+                comorbidities = comorbidities.split(",")
+            for label in comorbidities:
+                # MultiLabelBinarizer ignores labels it wasn't fitted on
+                j = self._comorb_columns.get(label)
+                if j is not None:
+                    X[i, j] = 1
+
+
+class HeartFailurePipeline(FeaturePipeline):
+    def __init__(self, artifacts):
+        feature_names = artifacts.feature_order
+        mean, scale = scaler_vectors(artifacts.scaler, artifacts.numerical_cols, feature_names)
+        # random forest evaluates on float32
+        super().__init__(feature_names, np.float32, mean, scale)
+        column_transformer = artifacts.encoders["categorical"]
+        _, one_hot, categorical_cols = column_transformer.transformers_[0]
+        # (input column, category) -> output column, replicating OneHotEncoder
+        # with drop='first' and handle_unknown='ignore' (unknown -> all zeros)
+        self._one_hot = []
+        drop_idxs = one_hot.drop_idx_ if one_hot.drop_idx_ is not None else [None] * len(categorical_cols)
+        for col, categories, drop_idx in zip(categorical_cols, one_hot.categories_, drop_idxs):
+            mapping = {}
+            for k, category in enumerate(categories.tolist()):
+                if drop_idx is not None and k == drop_idx:
+                    continue
+                mapping[category] = self.column(f"{col}_{category}")
+            self._one_hot.append((col, mapping))
+        encoded = {self.feature_names[j] for _, mapping in self._one_hot for j in mapping.values()}
+        self._numeric = [name for name in self.feature_names if name not in encoded]
+
+    def fill(self, X, records):
+        for name in self._numeric:
+            X[:, self.column(name)] = [record[name] for record in records]
+        for col, mapping in self._one_hot:
+            for i, record in enumerate(records):
+                j = mapping.get(record[col])
+                if j is not None:
+                    X[i, j] = 1
+
+
+def get_age_bucket(age: int) -> str:
+    if age < 0 or age > 99:
+        raise ValueError("Age must be between 0 and 99")
+    lower = (age // 10) * 10
+    upper = lower + 10
+    return f"[{lower}-{upper})"
+
+
+class DiabetesPipeline(FeaturePipeline):
+    def __init__(self, artifacts):
+        feature_names = artifacts.model.get_booster().feature_names or [
+            name for name in DiabetesInput.model_fields if name != "patient_id"
+        ]
+        # XGBoost evaluates on float32
+        super().__init__(feature_names, np.float32)
+        self._lookups = {
+            col: label_lookup(encoder) for col, encoder in artifacts.encoders.items() if col in self._position
+        }
+        self._numeric = [name for name in self.feature_names if name not in self._lookups]
+
+    def fill(self, X, records):
+        for name in self._numeric:
+            X[:, self.column(name)] = [record[name] for record in records]
+        for name, lookup in self._lookups.items():
+            if name == "age":
+                values = [get_age_bucket(record["age"]) for record in records]
+            else:
+                # missing values were encoded as the literal "NaN" label in training
+                values = ["NaN" if record[name] is None else record[name] for record in records]
+            X[:, self.column(name)] = encode(lookup, values, name)
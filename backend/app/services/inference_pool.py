@@ -0,0 +1,125 @@
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from threadpoolctl import threadpool_limits
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# requests admitted (running + waiting) before new ones get a 429
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+# per disease: how many may run at once, and how many may be admitted at all
+INFERENCE_DISEASE_CONCURRENCY = int(os.getenv("INFERENCE_DISEASE_CONCURRENCY", str(max(1, INFERENCE_WORKERS - 1))))
+INFERENCE_DISEASE_QUEUE_SIZE = int(os.getenv("INFERENCE_DISEASE_QUEUE_SIZE", "32"))
+# native threads (BLAS / OpenMP) each inference call may use
+INFERENCE_BLAS_THREADS = int(os.getenv("INFERENCE_BLAS_THREADS", "1"))
+
+
+class InferenceSaturated(Exception):
+    """Raised when the inference pool (or one disease's share of it) is full."""
+
+
+class InferencePool:
+    """
+    Dedicated executor for model inference and SHAP, so CPU-bound work never
+    runs on the event loop or in Starlette's shared threadpool.
+
+    Admission is bounded globally and per disease (excess requests are rejected
+    with InferenceSaturated, surfaced as 429), and each disease may occupy at
+    most `disease_concurrency` workers, so a burst for one model cannot starve
+    the others or the rest of the API.
+    """
+
+    def __init__(self, workers: int, queue_size: int, disease_concurrency: int, disease_queue_size: int):
+        self._workers = workers
+        self._queue_size = queue_size
+        self._disease_concurrency = disease_concurrency
+        self._disease_queue_size = disease_queue_size
+        self._executor = None
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._admitted = 0
+        self._disease_admitted = defaultdict(int)
+        self._disease_running = defaultdict(int)
+        self._completed = defaultdict(int)
+        self._rejected = defaultdict(int)
+
+    def start(self):
+        # Pin BLAS / OpenMP pools process-wide: with several inference workers
+        # in parallel, each native call using every core just thrashes.
+        threadpool_limits(limits=INFERENCE_BLAS_THREADS)
+        self._get_executor()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="inference")
+            return self._executor
+
+    def _semaphore(self, disease: str) -> asyncio.Semaphore:
+        with self._lock:
+            if disease not in self._semaphores:
+                self._semaphores[disease] = asyncio.Semaphore(self._disease_concurrency)
+            return self._semaphores[disease]
+
+    def _admit(self, disease: str):
+        with self._lock:
+            if self._admitted >= self._queue_size or self._disease_admitted[disease] >= self._disease_queue_size:
+                self._rejected[disease] += 1
+                raise InferenceSaturated(f"Inference capacity for {disease} is saturated, retry shortly")
+            self._admitted += 1
+            self._disease_admitted[disease] += 1
+
+    def _release(self, disease: str):
+        with self._lock:
+            self._admitted -= 1
+            self._disease_admitted[disease] -= 1
+
+    async def run(self, disease: str, fn: Callable, *args):
+        """Run fn(*args) on the inference pool under the disease's limits."""
+        self._admit(disease)
+        try:
+            async with self._semaphore(disease):
+                with self._lock:
+                    self._disease_running[disease] += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(self._get_executor(), fn, *args)
+                finally:
+                    with self._lock:
+                        self._disease_running[disease] -= 1
+                        self._completed[disease] += 1
+        finally:
+            self._release(disease)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "queue_size": self._queue_size,
+                "admitted": self._admitted,
+                "diseases": {
+                    disease: {
+                        "admitted": self._disease_admitted[disease],
+                        "running": self._disease_running[disease],
+                        "completed": self._completed[disease],
+                        "rejected": self._rejected[disease],
+                    }
+                    for disease in set(self._disease_admitted) | set(self._rejected)
+                },
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+inference_pool = InferencePool(
+    workers=INFERENCE_WORKERS,
+    queue_size=INFERENCE_QUEUE_SIZE,
+    disease_concurrency=INFERENCE_DISEASE_CONCURRENCY,
+    disease_queue_size=INFERENCE_DISEASE_QUEUE_SIZE,
+)
@@ -0,0 +1,271 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from sqlalchemy import event
+
+# upper bounds (seconds) of the latency histogram buckets
+METRICS_BUCKETS = tuple(sorted(float(b) for b in os.getenv(
+    "METRICS_BUCKETS", "0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+).split(",")))
+# per-stage breakdown of each response in a Server-Timing header (shown by browser dev tools);
+# off by default since it exposes internal timings to every client, turn on where that is fine
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+# sampling profiler: profile every Nth request (0 = off), sampling all threads every PROFILE_INTERVAL_MS
+PROFILE_EVERY_N = int(os.getenv("PROFILE_EVERY_N", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+
+class Histogram:
+    """Prometheus-style histogram (cumulative buckets, sum, count) per label set."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple, buckets: tuple = METRICS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            prefix = label_text + "," if label_text else ""
+            for bound, cumulative in zip(self.buckets, itertools.accumulate(counts)):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Request latency by route template and status.", ("method", "route", "status"),
+)
+stage_seconds = Histogram(
+    "app_stage_duration_seconds", "Time spent in instrumented stages (span()).", ("stage",),
+)
+
+
+class RequestTimings:
+    """Stage totals of one request, filled by spans running in its context."""
+
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.calls = Counter()
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] += seconds
+        self.calls[stage] += 1
+
+    def server_timing(self, total: float) -> str:
+        entries = [f"{stage.replace('.', '-')};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items()]
+        return ", ".join(entries + [f"total;dur={total * 1000:.2f}"])
+
+
+# set by InstrumentationMiddleware; copied into threadpool calls, not into the inference / explanation pools
+_request_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def record(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Times the block as `stage`: always into the app_stage_duration_seconds
+    histogram, and into the current request's Server-Timing breakdown when
+    the block runs in a request's context.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def traced(stage: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine):
+    """Times every statement executed through engine as the db.query stage."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        record("db.query", time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+# frames a thread sits in while it has nothing to do
+IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"), ("thread.py", "_worker")}
+
+
+class SamplingProfiler:
+    """
+    Opt-in sampling profiler for every Nth request. While a sampled request
+    runs, a background thread records the stacks of all busy threads every
+    `interval_ms`; when it finishes they are written to `directory` in the
+    folded format (one "frame;frame;frame count" line per distinct stack),
+    ready for flamegraph.pl or speedscope. One request is profiled at a time.
+    """
+
+    def __init__(self, every: int, interval_ms: float, directory: str):
+        self.every = every
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self._requests = itertools.count(1)
+        self._busy = threading.Lock()
+        self.profiles_written = 0
+        self.skipped_busy = 0
+
+    def maybe_start(self):
+        """A running sampler if this request should be profiled, else None."""
+        if self.every <= 0 or next(self._requests) % self.every:
+            return None
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+        stop = threading.Event()
+        stacks = Counter()
+        thread = threading.Thread(target=self._sample, args=(stop, stacks), name="profiler", daemon=True)
+        thread.start()
+        return stop, stacks, thread
+
+    def _sample(self, stop: threading.Event, stacks: Counter):
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(frames))] += 1
+
+    def finish(self, sampler, method: str, route: str, status: int, seconds: float):
+        stop, stacks, thread = sampler
+        stop.set()
+        thread.join()
+        if not stacks:  # finished before the first sample
+            self._busy.release()
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            slug = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+            path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{status}-{seconds * 1000:.0f}ms.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            self.profiles_written += 1
+        except OSError as e:
+            print("Writing profile failed:", e)
+        finally:
+            self._busy.release()
+
+
+profiler = SamplingProfiler(PROFILE_EVERY_N, PROFILE_INTERVAL_MS, PROFILE_DIR)
+
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware: times every HTTP request into http_request_duration_seconds
+    (labelled by route template, so path parameters don't explode the series),
+    collects the request's spans for a Server-Timing header, and hands every
+    Nth request to the sampling profiler.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        sampler = profiler.maybe_start()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    timing = timings.server_timing(time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            request_seconds.observe(elapsed, scope["method"], route, str(status))
+            _request_timings.reset(token)
+            if sampler is not None:
+                profiler.finish(sampler, scope["method"], route, status, elapsed)
+
+
+def render_metrics() -> str:
+    """Every histogram in the Prometheus text exposition format."""
+    lines = request_seconds.render() + stage_seconds.render()
+    lines += [
+        "# HELP app_profiles_written_total Folded-stack profiles written by the sampling profiler.",
+        "# TYPE app_profiles_written_total counter",
+        f"app_profiles_written_total {profiler.profiles_written}",
+    ]
+    return "\n".join(lines) + "\n"
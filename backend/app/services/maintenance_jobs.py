@@ -0,0 +1,170 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+from app.db_schema.notifications import Notification, NotificationRecipient
+from app.db_schema.patient_latest_risk import PatientLatestRisk
+from app.db_schema.patient_related import FollowUp, PatientReference
+from app.db_schema.predicition import Prediction
+from app.db_schema.tasks import Task
+from app.services.dashboard_counters import dashboard_counters, DASHBOARD_RECONCILE_SECONDS
+from app.services.patient_profile import patient_profiles
+from app.services.scheduler import Scheduler
+from app.utils.latest_risk import upsert_latest_risk
+from app.utils.notification_create import create_notification
+from app.utils.transactions import on_commit
+
+JOB_MISSED_FOLLOWUPS_SECONDS = float(os.getenv("JOB_MISSED_FOLLOWUPS_SECONDS", "300"))
+JOB_OVERDUE_TASKS_SECONDS = float(os.getenv("JOB_OVERDUE_TASKS_SECONDS", "900"))
+JOB_PRUNE_NOTIFICATIONS_SECONDS = float(os.getenv("JOB_PRUNE_NOTIFICATIONS_SECONDS", "3600"))
+JOB_LATEST_RISK_SECONDS = float(os.getenv("JOB_LATEST_RISK_SECONDS", "3600"))
+# read notifications older than this are deleted; unread ones are kept
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+
+
+def mark_missed_followups(db: Session, batch_size: int) -> int:
+    """Upcoming follow-ups whose date has passed become pending."""
+    today = datetime.utcnow().date()
+    total = 0
+    while True:
+        rows = db.execute(
+            select(FollowUp.id, FollowUp.patient_id)
+            .where(FollowUp.status == "upcoming", FollowUp.follow_up_date < today)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return total
+        db.execute(
+            update(FollowUp).where(FollowUp.id.in_([row.id for row in rows])).values(status="pending")
+        )
+        on_commit(db, lambda: dashboard_counters.invalidate("overdue_followups"))
+        patient_profiles.invalidate_on_commit(db, *{row.patient_id for row in rows})
+        db.commit()
+        total += len(rows)
+
+
+def notify_overdue_tasks(db: Session, batch_size: int) -> int:
+    """One notification per assignee for pending tasks past their due date, once per task."""
+    today = datetime.utcnow().date()
+    total = 0
+    while True:
+        tasks = db.execute(
+            select(Task.id, Task.assigned_to)
+            .where(Task.status == "pending", Task.due_date < today, Task.overdue_notified_at.is_(None))
+            .limit(batch_size)
+        ).all()
+        if not tasks:
+            return total
+        db.execute(
+            update(Task).where(Task.id.in_([task.id for task in tasks])).values(overdue_notified_at=datetime.utcnow())
+        )
+        by_user = defaultdict(int)
+        for task in tasks:
+            if task.assigned_to is not None:
+                by_user[task.assigned_to] += 1
+        for user_id, count in by_user.items():
+            # committed below together with the batch's flags
+            create_notification(db, [user_id], f"{count} of your tasks {'is' if count == 1 else 'are'} overdue", link="/tasks")
+        db.commit()
+        total += len(tasks)
+
+
+def prune_notifications(db: Session, batch_size: int) -> int:
+    """Deletes read inbox rows past the retention period, then notifications nobody has left."""
+    cutoff = datetime.utcnow() - timedelta(days=NOTIFICATION_RETENTION_DAYS)
+    total = 0
+    while True:
+        keys = db.execute(
+            select(NotificationRecipient.notification_id, NotificationRecipient.user_id)
+            .where(NotificationRecipient.created_at < cutoff, NotificationRecipient.read_at.isnot(None))
+            .limit(batch_size)
+        ).all()
+        if not keys:
+            break
+        db.execute(delete(NotificationRecipient).where(
+            tuple_(NotificationRecipient.notification_id, NotificationRecipient.user_id).in_([tuple(key) for key in keys])
+        ))
+        db.commit()
+        total += len(keys)
+    while True:
+        orphans = db.scalars(
+            select(Notification.id)
+            .where(
+                Notification.created_at < cutoff,
+                ~select(NotificationRecipient.notification_id)
+                .where(NotificationRecipient.notification_id == Notification.id)
+                .exists(),
+            )
+            .limit(batch_size)
+        ).all()
+        if not orphans:
+            return total
+        db.execute(delete(Notification).where(Notification.id.in_(orphans)))
+        db.commit()
+        total += len(orphans)
+
+
+def reconcile_latest_risk(db: Session, batch_size: int) -> int:
+    """
+    Repairs patient_latest_risk rows that are missing or older than the
+    patient's newest prediction (e.g. predictions written outside the API).
+    Escalation overrides keep their predicted_at, so they are left alone.
+    Patients are walked in patient_id order, batch_size at a time; each
+    chunk's newest predictions come from ix_predictions_patient_id_timestamp.
+    """
+    total = 0
+    last = None
+    while True:
+        query = select(PatientReference.patient_id).order_by(PatientReference.patient_id).limit(batch_size)
+        if last is not None:
+            query = query.where(PatientReference.patient_id > last)
+        chunk = db.scalars(query).all()
+        if not chunk:
+            return total
+        last = chunk[-1]
+        newest = (
+            select(Prediction.patient_id, func.max(Prediction.timestamp).label("timestamp"))
+            .where(Prediction.patient_id.in_(chunk))
+            .group_by(Prediction.patient_id)
+            .subquery()
+        )
+        stale = db.execute(
+            select(newest.c.patient_id, newest.c.timestamp)
+            .outerjoin(PatientLatestRisk, PatientLatestRisk.patient_id == newest.c.patient_id)
+            .where(or_(PatientLatestRisk.patient_id.is_(None), PatientLatestRisk.predicted_at < newest.c.timestamp))
+        ).all()
+        if not stale:
+            continue
+        predictions = db.scalars(
+            select(Prediction).where(tuple_(Prediction.patient_id, Prediction.timestamp).in_([tuple(row) for row in stale]))
+        ).all()
+        upsert_latest_risk(db, [
+            {
+                "id": p.id,
+                "patient_id": p.patient_id,
+                "disease_type": p.disease_type,
+                "risk": p.risk,
+                "predicted_class": p.predicted_class,
+                "predicted_probability": p.predicted_probability,
+                "timestamp": p.timestamp,
+            }
+            for p in predictions
+        ])
+        db.commit()
+        total += len(stale)
+
+
+def reconcile_counters(db: Session, batch_size: int) -> int:
+    """Recounts this process's dashboard counters; returns how many had drifted."""
+    return len(dashboard_counters.reconcile(db))
+
+
+def register_maintenance_jobs(scheduler: Scheduler):
+    scheduler.register("missed_followups", mark_missed_followups, JOB_MISSED_FOLLOWUPS_SECONDS)
+    scheduler.register("overdue_tasks", notify_overdue_tasks, JOB_OVERDUE_TASKS_SECONDS)
+    scheduler.register("prune_notifications", prune_notifications, JOB_PRUNE_NOTIFICATIONS_SECONDS)
+    scheduler.register("latest_risk_reconciliation", reconcile_latest_risk, JOB_LATEST_RISK_SECONDS)
+    # in-memory counters: every worker keeps its own, so every worker reconciles (first count right away)
+    scheduler.register("dashboard_counters", reconcile_counters, DASHBOARD_RECONCILE_SECONDS,
+                       exclusive=False, initial_delay=0)
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+from collections import Counter, defaultdict
+from typing import Callable
+from app.services.inference_pool import inference_pool
+
+# how long a request may wait for others to join its batch, and the batch cap
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+MICRO_BATCH_MAX_ROWS = int(os.getenv("MICRO_BATCH_MAX_ROWS", "64"))
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-record predictions for the same disease into
+    one vectorized call on the inference pool, then fans the per-record
+    results back out to the waiting requests.
+
+    Adaptive: when nothing is in flight for a disease the batch is flushed on
+    the next loop iteration (requests arriving in the same tick still join),
+    so an idle server adds no latency. While a batch is running, new requests
+    accumulate and are flushed when it finishes, after max_wait_ms, or as soon
+    as max_rows are waiting, whichever comes first.
+
+    `process(disease, records)` runs on the inference pool and must return one
+    entry per record: the result, or an Exception to raise for that record only.
+    """
+
+    def __init__(self, process: Callable[[str, list], list], max_wait_ms: float, max_rows: int):
+        self._process = process
+        self._max_wait = max_wait_ms / 1000
+        self._max_rows = max(1, max_rows)
+        self._pending = defaultdict(list)  # disease -> [(record, future, enqueued_at)]
+        self._timers = {}
+        self._in_flight = defaultdict(int)
+        self._batches = defaultdict(int)
+        self._rows = defaultdict(int)
+        self._sizes = defaultdict(Counter)
+        self._wait_seconds = defaultdict(float)
+
+    async def submit(self, disease: str, record: dict):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending[disease]
+        pending.append((record, future, time.perf_counter()))
+        if len(pending) >= self._max_rows:
+            self._flush(disease)
+        elif disease not in self._timers:
+            delay = self._max_wait if self._in_flight[disease] else 0
+            self._timers[disease] = loop.call_later(delay, self._flush, disease)
+        return await future
+
+    def _flush(self, disease: str):
+        timer = self._timers.pop(disease, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(disease, None)
+        if batch:
+            self._in_flight[disease] += 1
+            asyncio.ensure_future(self._run(disease, batch))
+
+    async def _run(self, disease: str, batch: list):
+        flushed_at = time.perf_counter()
+        self._batches[disease] += 1
+        self._rows[disease] += len(batch)
+        self._sizes[disease][len(batch)] += 1
+        self._wait_seconds[disease] += sum(flushed_at - enqueued_at for _, _, enqueued_at in batch)
+        try:
+            results = await inference_pool.run(disease, self._process, disease, [record for record, _, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        except BaseException:
+            # cancelled (e.g. at shutdown): don't leave the waiting requests hanging
+            for _, future, _ in batch:
+                future.cancel()
+            raise
+        finally:
+            self._in_flight[disease] -= 1
+            # requests that queued up behind this batch go next
+            if self._pending.get(disease) and not self._in_flight[disease]:
+                self._flush(disease)
+        for (_, future, _), result in zip(batch, results):
+            if future.done():  # client went away
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "max_wait_ms": self._max_wait * 1000,
+            "max_rows": self._max_rows,
+            "diseases": {
+                disease: {
+                    "batches": self._batches[disease],
+                    "rows": self._rows[disease],
+                    "mean_batch_size": round(self._rows[disease] / self._batches[disease], 2),
+                    "max_batch_size": max(self._sizes[disease]),
+                    "batch_sizes": dict(sorted(self._sizes[disease].items())),
+                    "mean_wait_ms": round(self._wait_seconds[disease] / self._rows[disease] * 1000, 3),
+                    "pending": len(self._pending.get(disease, ())),
+                }
+                for disease in self._batches
+            },
+        }
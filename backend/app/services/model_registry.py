@@ -0,0 +1,289 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+import joblib
+from app.services.instrumentation import span
+from app.services.feature_pipeline import PneumoniaPipeline, HeartFailurePipeline, DiabetesPipeline, array_input
+from app.services.tree_compiler import compile_model, verify, COMPILE_MODELS_TOLERANCE
+
+MODELS_DIR = os.getenv("MODELS_DIR", "models")
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower() == "true"
+# threads each estimator may use per predict call; the inference pool already
+# runs several requests in parallel, so nested joblib / XGBoost pools only contend
+MODEL_THREADS = int(os.getenv("INFERENCE_MODEL_THREADS", "1"))
+# replace sklearn's per-estimator predict path with flattened NumPy trees / native boosters
+COMPILE_MODELS = os.getenv("COMPILE_MODELS", "true").lower() == "true"
+
+
+class ModelArtifacts:
+    """
+    Everything one disease model needs at inference time: the estimator,
+    its encoders / scaler and the training-time threshold and feature order.
+    Loaded once per process and shared (read-only) by every request.
+    """
+
+    def __init__(self, disease, model, threshold=None, feature_order=None,
+                 encoders=None, scaler=None, numerical_cols=None, explainer_factory=None):
+        self.disease = disease
+        self.model = model
+        self.threshold = threshold
+        self.feature_order = feature_order
+        self.encoders = encoders or {}
+        self.scaler = scaler
+        self.numerical_cols = numerical_cols
+        self.pipeline = None  # FeaturePipeline compiled from the encoders / scaler above
+        self.compiled = None  # tree_compiler stand-in for model.predict_proba, if verified
+        self.compile_error = None
+        self.load_seconds = 0.0
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.explainer_seconds = None
+        self._explainer_factory = explainer_factory
+        self._explainer = None
+        self._explainer_lock = threading.Lock()
+
+    @property
+    def explainer(self):
+        """SHAP explainer for this model, built on first use and then reused."""
+        if self._explainer is None:
+            with self._explainer_lock:
+                if self._explainer is None:
+                    start = time.perf_counter()
+                    self._explainer = self._explainer_factory(self)
+                    self.explainer_seconds = time.perf_counter() - start
+        return self._explainer
+
+    def predict_proba(self, X):
+        if self.compiled is not None:
+            return self.compiled.predict_proba(X)
+        with array_input():
+            return self.model.predict_proba(X)
+
+    def compile(self):
+        """Compile the model and keep it only if it reproduces model.predict_proba."""
+        compiled = compile_model(self.model)
+        if compiled is None:
+            return
+        with array_input():
+            self.compile_error = verify(
+                self.model, compiled, len(self.pipeline.feature_names), self.pipeline.dtype, self.pipeline.order
+            )
+        if self.compile_error <= COMPILE_MODELS_TOLERANCE:
+            self.compiled = compiled
+        else:
+            print(f"Compiled {self.disease} model rejected: max probability error {self.compile_error}")
+
+    def stats(self) -> dict:
+        return {
+            "disease": self.disease,
+            "model": type(self.model).__name__,
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes,
+            "explainer_seconds": round(self.explainer_seconds, 4) if self.explainer_seconds is not None else None,
+            "compiled": type(self.compiled).__name__ if self.compiled is not None else None,
+            "compile_error": self.compile_error,
+        }
+
+
+def _path(*parts) -> str:
+    return os.path.join(MODELS_DIR, *parts)
+
+
+def _load_json(*parts):
+    with open(_path(*parts)) as f:
+        return json.load(f)
+
+
+def _shap():
+    # shap drags in numba, pandas and sklearn (seconds of import time), so it
+    # is imported on the first explainer build instead of with this module
+    import shap
+    return shap
+
+
+def _load_pneumonia() -> ModelArtifacts:
+    enc_dir = ("model_pneumonia", "encoders_pneumonia")
+    artifacts = ModelArtifacts(
+        disease="pneumonia",
+        model=joblib.load(_path("model_pneumonia", "voting_model.pkl")),
+        threshold=_load_json("model_pneumonia", "threshold.json")["best_threshold"],
+        feature_order=_load_json("model_pneumonia", "features.json")["feature_order"],
+        encoders={
+            "gender": joblib.load(_path(*enc_dir, "label_encoder_gender.joblib")),
+            "smoking_status": joblib.load(_path(*enc_dir, "label_encoder_smoking_status.joblib")),
+            "discharge_disposition": joblib.load(_path(*enc_dir, "label_encoder_discharge_disposition.joblib")),
+            "multi_comorb": joblib.load(_path(*enc_dir, "multi_label_binarizer.joblib")),
+        },
+        scaler=joblib.load(_path("model_pneumonia", "scalers_pneumonia", "scaler.joblib")),
+        numerical_cols=['age', 'bmi', 'wbc_count', 'crp_level', 'oxygen_saturation', 'num_prior_admissions', 'length_of_stay'],
+        # only the XGBoost member of the voting ensemble is explained
+        explainer_factory=lambda artifacts: _shap().TreeExplainer(artifacts.model.named_estimators_['xgb']),
+    )
+    artifacts.pipeline = PneumoniaPipeline(artifacts)
+    return artifacts
+
+
+def _forest_explainer(artifacts: ModelArtifacts):
+    # TreeSHAP over the compiled trees when available (same trees, no sklearn parsing)
+    if artifacts.compiled is not None:
+        return _shap().TreeExplainer(artifacts.compiled.shap_model())
+    return _shap().Explainer(artifacts.model)
+
+
+def _load_heart_failure() -> ModelArtifacts:
+    artifacts = ModelArtifacts(
+        disease="heart_failure",
+        model=joblib.load(_path("model_heartfailure", "random_forest.pkl")),
+        feature_order=_load_json("model_heartfailure", "feature_order.json"),
+        encoders={"categorical": joblib.load(_path("model_heartfailure", "encoder_heart.pkl"))},
+        scaler=joblib.load(_path("model_heartfailure", "standard_scaler.pkl")),
+        numerical_cols=_load_json("model_heartfailure", "numerical_columns.json"),
+        explainer_factory=_forest_explainer,
+    )
+    artifacts.pipeline = HeartFailurePipeline(artifacts)
+    return artifacts
+
+
+DIABETES_ENCODERS = {
+    "A1Cresult": "label_encoder_A1Cresult.joblib",
+    "age": "label_encoder_age.joblib",
+    "change": "label_encoder_change.joblib",
+    "diabetesMed": "label_encoder_diabetesMed.joblib",
+    "diag_1": "label_encoder_diag_1.joblib",
+    "diag_2": "label_encoder_diag_2.joblib",
+    "diag_3": "label_encoder_diag_3.joblib",
+    "gender": "label_encoder_gender.joblib",
+    "glipizide": "label_encoder_glipizide.joblib",
+    "glyburide": "label_encoder_glyburide.joblib",
+    "insulin": "label_encoder_insulin.joblib",
+    "max_glu_serum": "label_encoder_max_glu_serum.joblib",
+    "medical_specialty": "label_encoder_medical_specialty.joblib",
+    "metformin": "label_encoder_metformin.joblib",
+    "race": "label_encoder_race.joblib",
+}
+
+
+def _load_diabetes() -> ModelArtifacts:
+    enc_dir = ("model_diabetics", "encoders_diabetics")
+    artifacts = ModelArtifacts(
+        disease="diabetes",
+        model=joblib.load(_path("model_diabetics", "xgb_readmission_model.joblib")),
+        threshold=joblib.load(_path("model_diabetics", "threshold.joblib")),
+        encoders={col: joblib.load(_path(*enc_dir, fname)) for col, fname in DIABETES_ENCODERS.items()},
+        explainer_factory=lambda artifacts: _shap().Explainer(artifacts.model),
+    )
+    artifacts.pipeline = DiabetesPipeline(artifacts)
+    return artifacts
+
+
+# disease key -> (loader, directory holding its artifacts)
+LOADERS = {
+    "pneumonia": (_load_pneumonia, "model_pneumonia"),
+    "heart_failure": (_load_heart_failure, "model_heartfailure"),
+    "diabetes": (_load_diabetes, "model_diabetics"),
+}
+
+
+def _pin_threads(estimator, n_jobs: int):
+    """Recursively set n_jobs on an estimator and every fitted sub-estimator."""
+    if hasattr(estimator, "get_booster"):
+        estimator.n_jobs = n_jobs
+        estimator.get_booster().set_param("nthread", n_jobs)
+    elif hasattr(estimator, "n_jobs"):
+        estimator.n_jobs = n_jobs
+    for step in getattr(estimator, "steps", []):
+        _pin_threads(step[1], n_jobs)
+    for sub in getattr(estimator, "estimators_", []):
+        if hasattr(sub, "n_jobs") or hasattr(sub, "steps") or hasattr(sub, "estimators_"):
+            _pin_threads(sub, n_jobs)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _rss_bytes() -> int:
+    # Native allocations (sklearn trees, XGBoost boosters) are invisible to
+    # tracemalloc, so also look at the resident set size where we can.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of ModelArtifacts. Models are loaded at most once,
+    either eagerly via load_all() (the startup warm-up) or lazily on first get().
+    """
+
+    def __init__(self, loaders: dict):
+        self._loaders = loaders
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    def get(self, disease: str) -> ModelArtifacts:
+        artifacts = self._artifacts.get(disease)
+        if artifacts is not None:
+            return artifacts
+        if disease not in self._loaders:
+            raise KeyError(f"Unknown disease model: {disease}")
+        with self._lock:
+            # another thread may have finished loading while we waited
+            artifacts = self._artifacts.get(disease)
+            if artifacts is None:
+                artifacts = self._load(disease)
+                self._artifacts[disease] = artifacts
+        return artifacts
+
+    def _load(self, disease: str) -> ModelArtifacts:
+        loader, directory = self._loaders[disease]
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        mem_before = tracemalloc.get_traced_memory()[0]
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            with span("model.load"):
+                artifacts = loader()
+        finally:
+            elapsed = time.perf_counter() - start
+            mem_after = tracemalloc.get_traced_memory()[0]
+            rss_after = _rss_bytes()
+            if not was_tracing:
+                tracemalloc.stop()
+        _pin_threads(artifacts.model, MODEL_THREADS)
+        if COMPILE_MODELS:
+            artifacts.compile()
+        artifacts.load_seconds = elapsed
+        artifacts.memory_bytes = max(mem_after - mem_before, rss_after - rss_before, 0)
+        artifacts.disk_bytes = _dir_size(_path(directory))
+        return artifacts
+
+    def load_all(self, with_explainers: bool = True):
+        for disease in self._loaders:
+            artifacts = self.get(disease)
+            if with_explainers:
+                artifacts.explainer  # build the SHAP explainer up front too
+
+    def is_loaded(self, disease: str) -> bool:
+        return disease in self._artifacts
+
+    def stats(self) -> list[dict]:
+        return [a.stats() for a in self._artifacts.values()]
+
+
+model_registry = ModelRegistry(LOADERS)
+
+
+def get_model(disease: str) -> ModelArtifacts:
+    return model_registry.get(disease)
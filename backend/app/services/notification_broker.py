@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from typing import Callable
+
+# "local" delivers within this process only; a shared backend (Redis, Postgres
+# LISTEN/NOTIFY) is needed once several API workers serve streams
+NOTIFICATION_BROKER_BACKEND = os.getenv("NOTIFICATION_BROKER_BACKEND", "local").lower()
+# events a connection may have waiting before it is dropped (the client reconnects and catches up)
+NOTIFICATION_STREAM_BUFFER = int(os.getenv("NOTIFICATION_STREAM_BUFFER", "100"))
+
+
+class LocalBackend:
+    """
+    Broker backend for a single process: publish hands the event straight
+    to this process's subscribers. Other backends implement the same two
+    calls and invoke `deliver` for events published by any process.
+    """
+
+    def start(self, deliver: Callable[[list, dict], None]):
+        self._deliver = deliver
+
+    def publish(self, user_ids: list, event: dict):
+        self._deliver(user_ids, event)
+
+    def stop(self):
+        pass
+
+
+BACKENDS = {"local": LocalBackend}
+
+
+class Subscription:
+    """One open stream: a bounded buffer of events for one user, owned by one event loop."""
+
+    def __init__(self, user_id: str, loop: asyncio.AbstractEventLoop, buffer_size: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed = asyncio.Event()
+
+    def push(self, event: dict):
+        # runs on self.loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed.set()
+
+
+class NotificationBroker:
+    """
+    In-process pub/sub for new notifications, keyed by recipient.
+
+    `publish` may be called from any thread (request handlers run in the
+    threadpool); each event is handed to the subscriber's own event loop.
+    A subscriber that falls `buffer_size` events behind is flagged as
+    overflowed rather than buffering without bound.
+    """
+
+    def __init__(self, backend, buffer_size: int):
+        self._backend = backend
+        self._buffer_size = buffer_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+        backend.start(self._deliver)
+
+    def subscribe(self, user_id) -> Subscription:
+        """Call from the event loop that will consume the subscription."""
+        subscription = Subscription(str(user_id), asyncio.get_running_loop(), self._buffer_size)
+        with self._lock:
+            self._subscriptions[subscription.user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+            if subscription.overflowed.is_set():
+                self.overflows += 1
+
+    def publish(self, user_ids: list, event: dict):
+        with self._lock:
+            self.published += 1
+        self._backend.publish([str(user_id) for user_id in user_ids], event)
+
+    def _deliver(self, user_ids: list, event: dict):
+        with self._lock:
+            targets = [s for user_id in user_ids for s in self._subscriptions.get(user_id, ())]
+            self.delivered += len(targets)
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:  # loop already closed (shutdown)
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": type(self._backend).__name__,
+                "connected_users": len(self._subscriptions),
+                "connections": sum(len(s) for s in self._subscriptions.values()),
+                "buffer_size": self._buffer_size,
+                "published": self.published,
+                "delivered": self.delivered,
+                "overflows": self.overflows,
+            }
+
+    def shutdown(self):
+        self._backend.stop()
+
+
+notification_broker = NotificationBroker(BACKENDS[NOTIFICATION_BROKER_BACKEND](), NOTIFICATION_STREAM_BUFFER)
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from app.utils.security import hash_password, verify_and_update
+
+# bcrypt is deliberately slow; a couple of workers keep a login storm from taking every core
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# hash / verify calls admitted (running + waiting) before new ones are turned away
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+
+
+class HasherSaturated(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+class PasswordHasher:
+    """
+    Dedicated, bounded executor for bcrypt. Hashing and verification never
+    run on the event loop or in Starlette's shared threadpool, so a burst of
+    logins queues here (up to `queue_size`, then HasherSaturated) instead of
+    stalling every other endpoint.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self._workers = workers
+        self._queue_size = queue_size
+        self._executor = None
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._recent = deque(maxlen=1024)  # seconds per call, queueing included
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    async def _run(self, fn: Callable, *args):
+        with self._lock:
+            if self._admitted >= self._queue_size:
+                self._rejected += 1
+                raise HasherSaturated("Too many sign-in attempts in progress, retry shortly")
+            self._admitted += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._admitted -= 1
+                self._completed += 1
+                self._recent.append(time.perf_counter() - start)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """(matches, upgraded hash or None), see app.utils.security.verify_and_update."""
+        return await self._run(verify_and_update, password, hashed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            return {
+                "workers": self._workers,
+                "queue_size": self._queue_size,
+                "in_flight": self._admitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "p50_ms": round(recent[len(recent) // 2] * 1000, 1) if recent else None,
+                "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1) if recent else None,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(workers=PASSWORD_HASH_WORKERS, queue_size=PASSWORD_HASH_QUEUE_SIZE)
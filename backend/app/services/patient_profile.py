@@ -0,0 +1,165 @@
+import os
+import threading
+from uuid import UUID
+from cachetools import TTLCache
+from sqlalchemy import JSON, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+from app.db_schema.escalations import Escalation
+from app.db_schema.patient_latest_risk import PatientLatestRisk
+from app.db_schema.patient_related import FollowUp, PatientReference
+from app.models.escalation import EscalationSchema
+from app.models.patient import FollowUpSchema, PatientDetails, PredictionSummary
+from app.utils.transactions import on_commit
+
+PATIENT_PROFILE_CACHE_SIZE = int(os.getenv("PATIENT_PROFILE_CACHE_SIZE", "1024"))
+# seconds; writes through the API invalidate earlier, this bounds staleness from anything else
+PATIENT_PROFILE_CACHE_TTL = float(os.getenv("PATIENT_PROFILE_CACHE_TTL", "30"))
+
+FOLLOW_UP_FIELDS = ("id", "user_id", "notes", "status", "follow_up_type", "follow_up_date", "timestamp")
+ESCALATION_FIELDS = ("id", "patient_id", "user_id", "old_risk", "new_risk", "description", "status",
+                     "rejection_note", "reviewed_by", "created_at", "updated_at")
+
+
+def _json_rows(dialect: str, model, fields: tuple, patient_id: str, order_by):
+    """Scalar subquery: the patient's rows of `model` as one JSON array, ordered."""
+    if dialect == "postgresql":
+        row = func.json_build_object(*[part for f in fields for part in (f, getattr(model, f))])
+        return (
+            select(func.json_agg(aggregate_order_by(row, order_by), type_=JSON))
+            .where(model.patient_id == patient_id)
+            .scalar_subquery()
+        )
+    # SQLite aggregates in the order rows come out of the subquery
+    rows = select(*[getattr(model, f) for f in fields]).where(model.patient_id == patient_id).order_by(order_by).subquery()
+    row = func.json_object(*[part for f in fields for part in (f, rows.c[f])])
+    return select(func.json_group_array(row, type_=JSON)).scalar_subquery()
+
+
+def _load_rows(db: Session, patient_id: str):
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        return _load_rows_separately(db, patient_id)
+    row = db.execute(
+        select(
+            PatientReference,
+            PatientLatestRisk,
+            _json_rows(dialect, FollowUp, FOLLOW_UP_FIELDS, patient_id, FollowUp.follow_up_date.desc()).label("follow_ups"),
+            _json_rows(dialect, Escalation, ESCALATION_FIELDS, patient_id, Escalation.updated_at.desc()).label("escalations"),
+        )
+        .outerjoin(PatientLatestRisk, PatientLatestRisk.patient_id == PatientReference.patient_id)
+        .where(PatientReference.patient_id == patient_id)
+    ).first()
+    if row is None:
+        return None
+    return row[0], row[1], row.follow_ups or [], row.escalations or []
+
+
+def _load_rows_separately(db: Session, patient_id: str):
+    patient = db.get(PatientReference, patient_id)
+    if patient is None:
+        return None
+    followups = db.query(FollowUp).filter(FollowUp.patient_id == patient_id).order_by(FollowUp.follow_up_date.desc())
+    escalations = db.query(Escalation).filter(Escalation.patient_id == patient_id).order_by(Escalation.updated_at.desc())
+    return (
+        patient,
+        db.get(PatientLatestRisk, patient_id),
+        [{f: getattr(item, f) for f in FOLLOW_UP_FIELDS} for item in followups],
+        [{f: getattr(item, f) for f in ESCALATION_FIELDS} for item in escalations],
+    )
+
+
+def _uuid_str(value) -> str:
+    # SQLite keeps UUIDs as bare hex; answer with the dashed form either way
+    return str(UUID(str(value)))
+
+
+def load_patient_profile(db: Session, patient_id: str) -> PatientDetails | None:
+    """
+    Patient, follow-ups, latest prediction and escalations in one round trip:
+    the follow-ups and escalations come back as JSON arrays from correlated
+    subqueries next to the patient row. None if the patient does not exist.
+    """
+    rows = _load_rows(db, patient_id)
+    if rows is None:
+        return None
+    patient, latest, followups, escalations = rows
+    return PatientDetails(
+        patient_id=patient.patient_id,
+        name=patient.name,
+        age=patient.age,
+        gender=patient.gender,
+        mobile_number=patient.mobile_number,
+        disease_type=patient.disease_type,
+        clinical_info=patient.clinical_info or {},
+        follow_ups=[
+            FollowUpSchema(**{**f, "id": _uuid_str(f["id"]), "user_id": _uuid_str(f["user_id"])})
+            for f in followups
+        ],
+        prediction=PredictionSummary(
+            risk=latest.risk,
+            predicted_probability=latest.predicted_probability,
+            prediction_class=str(latest.predicted_class)
+        ) if latest else None,
+        escalations=[EscalationSchema(**esc) for esc in escalations],
+    )
+
+
+class PatientProfileCache:
+    """
+    Short-TTL cache of assembled patient profiles, keyed by patient_id.
+
+    Writers call `invalidate_on_commit` for the patients they touch; the entry
+    is dropped only once the transaction commits. A profile loaded while an
+    invalidation happened is not stored, so a read racing a write cannot put
+    the pre-write profile back for a whole TTL.
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self._entries = TTLCache(maxsize=size, ttl=ttl) if ttl > 0 else None
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, patient_id: str) -> PatientDetails | None:
+        if self._entries is None:
+            return load_patient_profile(db, patient_id)
+        with self._lock:
+            profile = self._entries.get(patient_id)
+            generation = self._generation
+            if profile is not None:
+                self.hits += 1
+                return profile
+            self.misses += 1
+        profile = load_patient_profile(db, patient_id)
+        if profile is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[patient_id] = profile
+        return profile
+
+    def invalidate(self, *patient_ids: str):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if self._entries is not None:
+                for patient_id in patient_ids:
+                    self._entries.pop(patient_id, None)
+
+    def invalidate_on_commit(self, db: Session, *patient_ids: str):
+        on_commit(db, lambda: self.invalidate(*patient_ids))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries) if self._entries is not None else 0,
+                "ttl_seconds": PATIENT_PROFILE_CACHE_TTL,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+patient_profiles = PatientProfileCache(PATIENT_PROFILE_CACHE_SIZE, PATIENT_PROFILE_CACHE_TTL)
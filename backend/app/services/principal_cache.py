@@ -0,0 +1,100 @@
+import os
+import threading
+from dataclasses import dataclass
+from uuid import UUID
+from cachetools import TTLCache
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from app.db_schema.user import User
+from app.utils.transactions import on_commit
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "4096"))
+# seconds; also bounds how long another worker process may serve a stale role
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The authenticated user as request handlers see it: a detached snapshot of the users row."""
+    id: UUID
+    username: str
+    email: str
+    role: str
+    must_change_password: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            must_change_password=user.must_change_password,
+        )
+
+
+class PrincipalCache:
+    """
+    TTL + LRU cache of user principals keyed by (user id, token iat), so an
+    authenticated request needs no users lookup while its principal is warm.
+
+    Any ORM update or delete of a User (password change, role change,
+    deletion) drops that user's entries once the transaction commits; the
+    TTL covers other worker processes, which don't see the invalidation.
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self._entries = TTLCache(maxsize=size, ttl=ttl) if ttl > 0 else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: UUID, issued_at) -> UserPrincipal | None:
+        if self._entries is None:
+            return None
+        with self._lock:
+            principal = self._entries.get((user_id, issued_at))
+            if principal is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return principal
+
+    def put(self, issued_at, principal: UserPrincipal):
+        if self._entries is not None:
+            with self._lock:
+                self._entries[(principal.id, issued_at)] = principal
+
+    def invalidate_user(self, user_id: UUID):
+        with self._lock:
+            self.invalidations += 1
+            if self._entries is not None:
+                for key in [key for key in self._entries if key[0] == user_id]:
+                    self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries) if self._entries is not None else 0,
+                "ttl_seconds": AUTH_CACHE_TTL,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User):
+    user_id = target.id
+    session = object_session(target)
+    if session is None:
+        principal_cache.invalidate_user(user_id)
+    else:
+        on_commit(session, lambda: principal_cache.invalidate_user(user_id))
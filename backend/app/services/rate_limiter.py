@@ -0,0 +1,92 @@
+import ipaddress
+import os
+import threading
+import time
+from collections import deque
+from cachetools import TTLCache
+from starlette.requests import Request
+
+# reverse proxies / load balancers (IPs or CIDRs, comma-separated) whose
+# X-Forwarded-For is believed; unset = use the socket peer as the client IP
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.getenv("TRUSTED_PROXIES", "").split(",") if entry.strip()
+]
+
+
+class RateLimiter:
+    """
+    In-process sliding-window limit: at most `limit` recorded attempts per
+    key within `window` seconds. Keys with no attempt for a whole window are
+    forgotten, and at most `max_keys` are tracked (least recently used go
+    first), so a flood of distinct keys cannot grow memory without bound.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 100_000):
+        self.limit = limit
+        self.window = window
+        self._attempts = TTLCache(maxsize=max_keys, ttl=window)
+        self._lock = threading.Lock()
+        self.blocked = 0
+
+    def _prune(self, key, now: float) -> deque:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return deque()
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        return attempts
+
+    def retry_after(self, key) -> float | None:
+        """Seconds until key may try again, or None if it is under the limit."""
+        if key is None or self.limit <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._prune(key, now)
+            if len(attempts) < self.limit:
+                return None
+            self.blocked += 1
+            return attempts[0] + self.window - now
+
+    def record(self, key):
+        if key is None or self.limit <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._prune(key, now)
+            attempts.append(now)
+            self._attempts[key] = attempts  # also restarts the key's expiry
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"limit": self.limit, "window_seconds": self.window, "tracked_keys": len(self._attempts), "blocked": self.blocked}
+
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str | None:
+    """
+    The address a request really came from. Behind TRUSTED_PROXIES that is
+    the right-most X-Forwarded-For entry not added by one of them (entries
+    further left are client-supplied and can't be trusted); otherwise the
+    socket peer.
+    """
+    peer = request.client.host if request.client else None
+    if peer is None or not _trusted(peer):
+        return peer
+    forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _trusted(hop):
+            return hop
+    return forwarded[0] if forwarded else peer
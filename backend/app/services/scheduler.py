@@ -0,0 +1,173 @@
+import asyncio
+import os
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Callable
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.db import SessionLocal, engine
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+# rows each maintenance job touches per transaction
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "1000"))
+# advisory lock keys are JOB_LOCK_NAMESPACE + crc32(job name), to stay clear of other users of advisory locks
+JOB_LOCK_NAMESPACE = int(os.getenv("JOB_LOCK_NAMESPACE", str(0x5C4ED << 32)))
+
+
+class Job:
+    """
+    A periodic job. `fn(db, batch_size)` does the work in batches, committing
+    as it goes, and returns the number of rows it touched.
+
+    exclusive jobs run on one worker process at a time (the one holding the
+    job's advisory lock); non-exclusive jobs maintain per-process state and
+    run in every process.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Session, int], int], interval: float,
+                 exclusive: bool = True, initial_delay: float = None):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.exclusive = exclusive
+        # staggered by default so every job doesn't fire at startup at once
+        self.initial_delay = interval / 10 if initial_delay is None else initial_delay
+        self.lock_key = JOB_LOCK_NAMESPACE + zlib.crc32(name.encode())
+        self.running = threading.Lock()
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.total_rows = 0
+        self.total_seconds = 0.0
+        self.history = deque(maxlen=20)
+
+
+class Scheduler:
+    """
+    asyncio scheduler for maintenance jobs. Each job has its own loop task;
+    the work itself runs in the threadpool on a fresh session.
+
+    Leader election is per job and per run: on Postgres an exclusive job
+    first takes pg_try_advisory_lock on a dedicated connection, and a worker
+    that doesn't get it skips the run. Other databases fall back to an
+    in-process lock, i.e. assume a single worker.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._tasks = []
+
+    def register(self, name: str, fn: Callable[[Session, int], int], interval: float, **options) -> Job:
+        job = Job(name, fn, interval, **options)
+        self._jobs[name] = job
+        return job
+
+    def jobs(self) -> list[str]:
+        return list(self._jobs)
+
+    def _try_leader_lock(self, job: Job):
+        """A connection holding the job's advisory lock, None if another worker holds it."""
+        if engine.dialect.name != "postgresql":
+            return False  # no cross-process lock needed / available
+        connection = engine.connect()
+        try:
+            if connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": job.lock_key}).scalar():
+                return connection
+        except Exception:
+            connection.close()
+            raise
+        connection.close()
+        return None
+
+    def _release_leader_lock(self, job: Job, connection):
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": job.lock_key})
+            connection.rollback()
+            connection.close()
+        except Exception as e:
+            print(f"Releasing the lock of job {job.name} failed:", e)
+            # never hand a connection that may still hold the lock back to the pool
+            connection.invalidate()
+
+    def run(self, name: str, trigger: str = "schedule") -> dict:
+        """Run one job now, in the calling thread; returns the run record."""
+        job = self._jobs[name]
+        record = {"job": name, "trigger": trigger, "started_at": time.time(), "rows": 0, "seconds": 0.0}
+        if not job.running.acquire(blocking=False):
+            job.skipped += 1
+            return {**record, "status": "skipped", "reason": "already running in this process"}
+        leader = False
+        try:
+            if job.exclusive:
+                leader = self._try_leader_lock(job)
+                if leader is None:
+                    job.skipped += 1
+                    return {**record, "status": "skipped", "reason": "running on another worker"}
+            start = time.perf_counter()
+            db = SessionLocal()
+            try:
+                record["rows"] = job.fn(db, JOB_BATCH_SIZE) or 0
+                record["status"] = "ok"
+            except Exception as e:
+                db.rollback()
+                print(f"Job {name} failed:", e)
+                job.failures += 1
+                record.update(status="failed", error=str(e))
+            finally:
+                db.close()
+            record["seconds"] = round(time.perf_counter() - start, 4)
+            job.runs += 1
+            job.total_rows += record["rows"]
+            job.total_seconds += record["seconds"]
+            job.history.append(record)
+            return record
+        finally:
+            if leader:
+                self._release_leader_lock(job, leader)
+            job.running.release()
+
+    async def _loop(self, job: Job):
+        await asyncio.sleep(job.initial_delay)
+        while True:
+            try:
+                await run_in_threadpool(self.run, job.name)
+            except Exception as e:  # e.g. the database is down; try again next interval
+                print(f"Job {job.name} could not run:", e)
+            await asyncio.sleep(job.interval)
+
+    def start(self):
+        """Call from the running event loop (app startup)."""
+        if not SCHEDULER_ENABLED:
+            return
+        self._tasks = [asyncio.ensure_future(self._loop(job)) for job in self._jobs.values()]
+
+    def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "enabled": SCHEDULER_ENABLED,
+            "jobs": {
+                job.name: {
+                    "interval_seconds": job.interval,
+                    "exclusive": job.exclusive,
+                    "running": job.running.locked(),
+                    "runs": job.runs,
+                    "skipped": job.skipped,
+                    "failures": job.failures,
+                    "total_rows": job.total_rows,
+                    "mean_seconds": round(job.total_seconds / job.runs, 4) if job.runs else None,
+                    "last_run": job.history[-1] if job.history else None,
+                    "recent_runs": list(job.history),
+                }
+                for job in self._jobs.values()
+            },
+        }
+
+
+scheduler = Scheduler()
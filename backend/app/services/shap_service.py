@@ -0,0 +1,80 @@
+import os
+import threading
+from cachetools import TTLCache
+from app.services.model_registry import ModelArtifacts
+
+# "eager": SHAP values are computed inside the predict request (default).
+# "lazy":  the prediction is returned first and SHAP values are computed on the
+#          explanation worker, to be fetched from GET /predict/{id}/shap.
+SHAP_MODE = os.getenv("SHAP_MODE", "eager").lower()
+SHAP_LAZY = SHAP_MODE == "lazy"
+SHAP_CACHE_SIZE = int(os.getenv("SHAP_CACHE_SIZE", "1024"))
+SHAP_CACHE_TTL = int(os.getenv("SHAP_CACHE_TTL", "3600"))
+
+_results = TTLCache(maxsize=SHAP_CACHE_SIZE, ttl=SHAP_CACHE_TTL)
+_results_lock = threading.Lock()
+
+
+def _pneumonia_shap(explainer, X, feature_names: list) -> list[dict]:
+    shap_values = explainer.shap_values(X)
+    base_value = float(explainer.expected_value)
+    return [
+        {
+            "features": list(feature_names),
+            "shap_values": [float(val) for val in row],
+            "base_value": base_value
+        }
+        for row in shap_values
+    ]
+
+
+def _heart_failure_shap(explainer, X, feature_names: list) -> list[dict]:
+    shap_values = explainer(X)
+    return [
+        {
+            "features": list(feature_names),
+            "shap_values": shap_values[i].values[:, 1].tolist(),  # Class 1 SHAPs
+            "base_value": float(shap_values.base_values[i][1])  # Class 1 base
+        }
+        for i in range(len(X))
+    ]
+
+
+def _diabetes_shap(explainer, X, feature_names: list) -> list[dict]:
+    shap_values = explainer(X)
+    base_value = float(explainer.expected_value)
+    return [
+        {
+            "features": list(feature_names),
+            "shap_values": row.tolist(),
+            "base_value": base_value
+        }
+        for row in shap_values.values
+    ]
+
+
+_FORMATTERS = {
+    "pneumonia": _pneumonia_shap,
+    "heart_failure": _heart_failure_shap,
+    "diabetes": _diabetes_shap,
+}
+
+
+def compute_shap_rows(artifacts: ModelArtifacts, X) -> list[dict]:
+    """SHAP attributions for every row in X, in one explainer call."""
+    return _FORMATTERS[artifacts.disease](artifacts.explainer, X, artifacts.pipeline.feature_names)
+
+
+def compute_shap(artifacts: ModelArtifacts, X) -> dict:
+    """SHAP attributions for the single feature row in X, using the cached explainer."""
+    return compute_shap_rows(artifacts, X)[0]
+
+
+def store_result(prediction_id: str, result: dict):
+    with _results_lock:
+        _results[prediction_id] = result
+
+
+def get_result(prediction_id: str) -> dict | None:
+    with _results_lock:
+        return _results.get(prediction_id)
@@ -0,0 +1,239 @@
+import os
+import numpy as np
+
+# reject a compiled model whose probabilities differ from the original by more than this
+COMPILE_MODELS_TOLERANCE = float(os.getenv("COMPILE_MODELS_TOLERANCE", "1e-12"))
+COMPILE_VERIFY_ROWS = int(os.getenv("COMPILE_VERIFY_ROWS", "512"))
+
+
+class CompiledTrees:
+    """
+    A list of sklearn decision trees flattened into one array-of-nodes layout
+    and evaluated for every row and every tree at once with NumPy indexing,
+    instead of one Python-level predict call per tree.
+
+    Every (row, tree) pair walks down from its root one level per step, and
+    drops out of the walk once it reaches a leaf. `columns` maps each tree's
+    feature indices back to columns of the full input (used for bagging, where
+    every tree sees a feature subset).
+    """
+
+    def __init__(self, trees: list, columns: list = None):
+        sizes = [tree.node_count for tree in trees]
+        self.n_trees = len(trees)
+        self.roots = np.cumsum([0] + sizes[:-1])
+        self.feature = np.zeros(sum(sizes), dtype=np.intp)
+        self.threshold = np.zeros(sum(sizes))
+        self.left = np.zeros(sum(sizes), dtype=np.intp)
+        self.right = np.zeros(sum(sizes), dtype=np.intp)
+        self.missing_left = np.zeros(sum(sizes), dtype=bool)
+        self.value = np.concatenate([tree.value[:, 0, :] for tree in trees])
+        self._trees = trees
+        for t, (tree, offset) in enumerate(zip(trees, self.roots)):
+            nodes = slice(offset, offset + tree.node_count)
+            own = np.arange(offset, offset + tree.node_count)
+            leaf = tree.children_left == -1
+            features = tree.feature if columns is None else np.asarray(columns[t])[np.maximum(tree.feature, 0)]
+            self.feature[nodes] = np.where(leaf, 0, features)
+            self.threshold[nodes] = tree.threshold
+            self.left[nodes] = np.where(leaf, own, tree.children_left + offset)
+            self.right[nodes] = np.where(leaf, own, tree.children_right + offset)
+            if hasattr(tree, "missing_go_to_left"):
+                self.missing_left[nodes] = tree.missing_go_to_left.astype(bool)
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self._columns = columns
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows, n_trees) leaf node of every tree for every row."""
+        n_rows, n_features = X.shape
+        flat = np.ravel(X)
+        node = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        has_nan = np.isnan(flat).any()
+        # (row, tree) pairs still descending; shrinks as walks reach leaves
+        active = np.arange(node.size)
+        while active.size:
+            current = node[active]
+            x = flat[row_offset[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if has_nan:
+                # sklearn sends NaN wherever the split learned to send missing values
+                go_left |= np.isnan(x) & self.missing_left[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return node.reshape(n_rows, self.n_trees)
+
+    def sum_values(self, X: np.ndarray) -> np.ndarray:
+        """Leaf values summed over trees, in tree order (as sklearn accumulates them)."""
+        values = self.value[self.leaves(X)]  # (n_rows, n_trees, n_classes)
+        # cumsum adds sequentially, so the float rounding matches `proba += tree_proba`
+        return np.cumsum(values, axis=1)[:, -1]
+
+    def split_points(self) -> dict:
+        """feature column -> thresholds used anywhere in the ensemble."""
+        internal = ~self.is_leaf
+        points = {}
+        for feature, threshold in zip(self.feature[internal], self.threshold[internal]):
+            points.setdefault(int(feature), []).append(threshold)
+        return points
+
+    def shap_model(self, scaling: float) -> dict:
+        """The same trees in shap.TreeExplainer's dictionary model format."""
+        trees = []
+        for t, tree in enumerate(self._trees):
+            values = tree.value.reshape(tree.value.shape[0], -1)
+            features = tree.feature if self._columns is None else np.where(
+                tree.feature >= 0, np.asarray(self._columns[t])[np.maximum(tree.feature, 0)], tree.feature
+            )
+            children_default = tree.children_left
+            if hasattr(tree, "missing_go_to_left"):
+                children_default = np.where(tree.missing_go_to_left, tree.children_left, tree.children_right)
+            trees.append({
+                "children_left": tree.children_left,
+                "children_right": tree.children_right,
+                "children_default": children_default,
+                "features": features,
+                "thresholds": tree.threshold.astype(np.float64),
+                "values": (values.T / values.sum(1)).T * scaling,
+                "node_sample_weight": tree.weighted_n_node_samples.astype(np.float64),
+            })
+        return {
+            "trees": trees,
+            "internal_dtype": self.value.dtype.type,
+            "input_dtype": np.float32,
+            "tree_output": "probability",
+            "base_offset": 0,
+        }
+
+
+class CompiledForest:
+    """RandomForestClassifier.predict_proba on CompiledTrees."""
+
+    def __init__(self, model):
+        self.model = model
+        self.trees = CompiledTrees([estimator.tree_ for estimator in model.estimators_])
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        return self.trees.sum_values(X) / self.trees.n_trees
+
+    def shap_model(self) -> dict:
+        return self.trees.shap_model(1.0 / self.trees.n_trees)
+
+
+class CompiledBagging:
+    """
+    (Balanced)BaggingClassifier of decision trees on CompiledTrees. Pipeline
+    members are accepted when every step before the tree is a sampler, since
+    samplers are skipped at predict time.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        trees = [_final_tree(estimator) for estimator in model.estimators_]
+        self.trees = CompiledTrees([tree.tree_ for tree in trees], columns=model.estimators_features_)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        return self.trees.sum_values(X) / self.model.n_estimators
+
+
+class BoosterPredictor:
+    """XGBClassifier.predict_proba straight on the native booster, skipping the sklearn wrapper."""
+
+    def __init__(self, model):
+        self.model = model
+        self.booster = model.get_booster()
+        try:
+            self.iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        p = self.booster.inplace_predict(
+            X, iteration_range=self.iteration_range, predict_type="value",
+            missing=self.model.missing, validate_features=False,
+        )
+        return np.vstack((1 - p, p)).transpose()
+
+
+class CompiledVoting:
+    """Soft VotingClassifier over compiled members (uncompilable members run as-is)."""
+
+    def __init__(self, model):
+        self.model = model
+        self.members = [compile_model(estimator) or estimator for estimator in model.estimators_]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        probas = np.asarray([member.predict_proba(X) for member in self.members])
+        return np.average(probas, axis=0, weights=self.model._weights_not_none)
+
+
+def _final_tree(estimator):
+    steps = getattr(estimator, "steps", None)
+    if steps is None:
+        return estimator
+    if not all(hasattr(step, "fit_resample") for _, step in steps[:-1]):
+        raise TypeError("pipeline transforms its input at predict time")
+    return steps[-1][1]
+
+
+def _is_tree(estimator) -> bool:
+    return type(estimator).__name__ == "DecisionTreeClassifier" and estimator.n_outputs_ == 1
+
+
+def compile_model(model):
+    """
+    Fast predict_proba stand-in for a supported model, or None:
+    RandomForestClassifier, bagging of decision trees, binary XGBClassifier
+    and soft VotingClassifier with at least one compilable member.
+    """
+    name = type(model).__name__
+    try:
+        if name == "RandomForestClassifier" and model.n_outputs_ == 1:
+            return CompiledForest(model)
+        if name in ("BaggingClassifier", "BalancedBaggingClassifier"):
+            trees = [_final_tree(estimator) for estimator in model.estimators_]
+            if all(_is_tree(tree) and len(tree.classes_) == model.n_classes_ for tree in trees):
+                return CompiledBagging(model)
+        if name == "XGBClassifier" and model.n_classes_ == 2 and model.objective == "binary:logistic":
+            return BoosterPredictor(model)
+        if name == "VotingClassifier" and model.voting == "soft":
+            compiled = CompiledVoting(model)
+            if any(member is not estimator for member, estimator in zip(compiled.members, model.estimators_)):
+                return compiled
+    except (AttributeError, TypeError) as e:
+        print(f"Model compilation skipped for {name}:", e)
+    return None
+
+
+def _split_points(compiled) -> dict:
+    if isinstance(compiled, (CompiledForest, CompiledBagging)):
+        return compiled.trees.split_points()
+    points = {}
+    for member in getattr(compiled, "members", []):
+        for feature, thresholds in _split_points(member).items():
+            points.setdefault(feature, []).extend(thresholds)
+    return points
+
+
+def probe_matrix(compiled, n_features: int, rows: int, seed: int = 0) -> np.ndarray:
+    """
+    Inputs that exercise both sides of the ensemble's splits: each value is a
+    split threshold of that feature, exactly or nudged just above / below it.
+    Features no tree splits on get random values.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0, 3, size=(rows, n_features))
+    for feature, thresholds in _split_points(compiled).items():
+        picked = rng.choice(np.asarray(thresholds), size=rows)
+        nudge = rng.choice([-1e-3, 0.0, 1e-3], size=rows)
+        X[:, feature] = picked + nudge
+    return X
+
+
+def verify(model, compiled, n_features: int, dtype, order: str = "C") -> float:
+    """Largest absolute predict_proba difference between model and compiled on probe inputs."""
+    X = np.asarray(probe_matrix(compiled, n_features, COMPILE_VERIFY_ROWS), dtype=dtype, order=order)
+    return float(np.abs(model.predict_proba(X) - compiled.predict_proba(X)).max())
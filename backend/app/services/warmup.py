@@ -0,0 +1,58 @@
+import threading
+import time
+from typing import Callable
+
+
+class Warmup:
+    """
+    Slow startup work (loading the disease models, building SHAP explainers,
+    importing the Gemini SDK) run in order on a background thread, so the
+    process starts serving the rest of the API right away. ready() turns
+    true once every step has finished; a failed step is logged and keeps
+    the process not-ready, while later steps still run.
+    """
+
+    def __init__(self):
+        self._steps = {}
+        self._done = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.seconds = {}
+        self.errors = {}
+
+    def register(self, name: str, fn: Callable[[], object]):
+        self._steps[name] = fn
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for name, fn in self._steps.items():
+            start = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                print(f"Warm-up step {name} failed:", e)
+                self.errors[name] = str(e)
+            self.seconds[name] = round(time.perf_counter() - start, 4)
+        self._done.set()
+
+    def ready(self) -> bool:
+        return self._done.is_set() and not self.errors
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready(),
+            "finished": self._done.is_set(),
+            "steps": list(self._steps),
+            "seconds": dict(self.seconds),
+            "errors": dict(self.errors),
+            "started_at": self.started_at,
+        }
+
+
+warmup = Warmup()
@@ -1,6 +1,12 @@
+from datetime import datetime
 from uuid import UUID
 from sqlalchemy.orm import Session
 from typing import Optional
+from app.db_schema.logs import AuditLog
+from app.services.audit_writer import audit_writer
+from app.utils.transactions import has_pending_writes, in_unit_of_work, on_commit
+
+
 def log_action(
     db: Session,
     user_id: Optional[UUID],
@@ -8,13 +14,22 @@ def log_action(
     endpoint: Optional[str] = None,
     payload: Optional[dict] = None,
 ):
-    from app.db_schema.logs import AuditLog
-
-    log_entry = AuditLog(
-        user_id=user_id,
-        action=action,
-        endpoint=endpoint,
-        payload=payload,
-    )
-    db.add(log_entry)
-    db.commit()
+    """
+    Record an audit_log row; never commits db. Inside unit_of_work the row is
+    added to db and commits (or rolls back) together with the route's writes.
+    Otherwise it is queued for the background writer, only once db's
+    uncommitted changes commit, so a rolled-back action leaves no audit trail.
+    """
+    entry = {
+        "user_id": user_id,
+        "action": action,
+        "endpoint": endpoint,
+        "payload": payload,
+        "timestamp": datetime.utcnow(),
+    }
+    if in_unit_of_work(db):
+        db.add(AuditLog(**entry))
+    elif has_pending_writes(db):
+        on_commit(db, lambda: audit_writer.submit(entry))
+    else:
+        audit_writer.submit(entry)
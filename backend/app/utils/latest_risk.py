@@ -0,0 +1,81 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.db_schema.patient_latest_risk import PatientLatestRisk
+from app.db_schema.predicition import Prediction
+from app.services.dashboard_counters import dashboard_counters
+from app.services.patient_profile import patient_profiles
+from app.utils.transactions import on_commit
+
+INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def upsert_latest_risk(db: Session, predictions: list[dict]):
+    """
+    Record new predictions in patient_latest_risk, in the caller's transaction.
+    `predictions` are Prediction column dicts (id, patient_id, timestamp, ...);
+    a row only replaces the stored one if it is at least as recent.
+    """
+    latest = {}
+    for prediction in predictions:
+        # one row per patient: ON CONFLICT cannot touch the same row twice
+        current = latest.get(prediction["patient_id"])
+        if current is None or prediction["timestamp"] >= current["timestamp"]:
+            latest[prediction["patient_id"]] = prediction
+    if not latest:
+        return
+    # which patients changed bucket isn't known without reading back; recount on next read
+    on_commit(db, lambda: dashboard_counters.invalidate("risk_distribution"))
+    patient_profiles.invalidate_on_commit(db, *latest)
+    values = [
+        {
+            "patient_id": p["patient_id"],
+            "prediction_id": p["id"],
+            "disease_type": p["disease_type"],
+            "risk": p["risk"],
+            "predicted_class": p["predicted_class"],
+            "predicted_probability": p["predicted_probability"],
+            "predicted_at": p["timestamp"],
+            "updated_at": datetime.utcnow(),
+        }
+        for p in latest.values()
+    ]
+    insert = INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        for value in values:
+            existing = db.get(PatientLatestRisk, value["patient_id"])
+            if existing is None or existing.predicted_at <= value["predicted_at"]:
+                db.merge(PatientLatestRisk(**value))
+        return
+    stmt = insert(PatientLatestRisk).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PatientLatestRisk.patient_id],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("prediction_id", "disease_type", "risk", "predicted_class",
+                           "predicted_probability", "predicted_at", "updated_at")
+        },
+        where=PatientLatestRisk.predicted_at <= stmt.excluded.predicted_at,
+    )
+    db.execute(stmt)
+
+
+def set_latest_risk(db: Session, patient_id: str, risk: str) -> bool:
+    """
+    Override the risk of a patient's latest prediction (accepted escalation),
+    both on the prediction itself and in patient_latest_risk. Returns False
+    if the patient has no prediction yet.
+    """
+    latest = db.get(PatientLatestRisk, patient_id)
+    if latest is None:
+        return False
+    previous = latest.risk
+    on_commit(db, lambda: dashboard_counters.risk_changed(previous, risk))
+    patient_profiles.invalidate_on_commit(db, patient_id)
+    latest.risk = risk
+    latest.updated_at = datetime.utcnow()
+    db.query(Prediction).filter(Prediction.id == latest.prediction_id).update(
+        {Prediction.risk: risk}, synchronize_session=False
+    )
+    return True
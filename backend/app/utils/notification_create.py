@@ -1,5 +1,8 @@
-from app.db_schema.notifications import Notification
-from uuid import UUID
+from datetime import datetime
+from app.db_schema.notifications import Notification, NotificationRecipient
+from app.services.notification_broker import notification_broker
+from app.utils.transactions import on_commit
+from uuid import UUID, uuid4
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -9,12 +12,25 @@ def create_notification(
     message: str,
     link: str | None = None
 ):
+    """
+    Adds a notification for user_ids to db's transaction; never commits db.
+    Written with the caller's commit, and pushed to open streams only after it.
+    """
     notif = Notification(
-        user_ids=user_ids,
+        id=uuid4(),  # known before the INSERT, so nothing has to flush here
         message=message,
-        link=link
+        link=link,
+        created_at=datetime.utcnow()
     )
     db.add(notif)
-    db.commit()
-    db.refresh(notif)
+    recipients = {UUID(str(user_id)) for user_id in user_ids}
+    if recipients:
+        # flushed with the notification, as one multi-row insert however many admins an escalation fans out to
+        db.add_all([
+            NotificationRecipient(notification_id=notif.id, user_id=user_id, created_at=notif.created_at)
+            for user_id in recipients
+        ])
+        event = {"id": str(notif.id), "message": message, "link": link, "created_at": notif.created_at.isoformat()}
+        # pushed to open streams only once the notification is visible to /my-notifications
+        on_commit(db, lambda: notification_broker.publish(list(recipients), event))
     return notif
@@ -1,7 +1,13 @@
+import uuid
+from datetime import datetime
 from app.db_schema.predicition import Prediction
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.db_schema.user import User
+from app.utils.latest_risk import upsert_latest_risk
+from app.services.instrumentation import traced
 
+@traced("db.log_prediction")
 def log_prediction(
     db: Session,
     user: User,
@@ -13,13 +19,63 @@ def log_prediction(
 ):
     patient_id = input_data["patient_id"]
     prediction_log = Prediction(
+        id=uuid.uuid4(),
         user_id=user.id,
         disease_type=disease,
         input_data=input_data,
         patient_id = patient_id,
         predicted_class=prediction,
         predicted_probability=float(probability),
-        risk = risk
+        risk = risk,
+        timestamp=datetime.utcnow()
     )
+    # read the id before commit() expires the instance, to avoid a refresh query
+    prediction_id = prediction_log.id
     db.add(prediction_log)
+    db.flush()  # patient_latest_risk references the prediction row
+    upsert_latest_risk(db, [{
+        "id": prediction_id,
+        "patient_id": patient_id,
+        "disease_type": disease,
+        "risk": risk,
+        "predicted_class": prediction,
+        "predicted_probability": float(probability),
+        "timestamp": prediction_log.timestamp,
+    }])
     db.commit()
+    return prediction_id
+
+
+@traced("db.log_prediction")
+def log_predictions(
+    db: Session,
+    user: User,
+    disease: str,
+    rows: list[tuple[dict, int, float, str]]
+):
+    """
+    Bulk variant of log_prediction for batch scoring: rows are
+    (input_data, prediction, probability, risk) and are written with a single
+    multi-row INSERT. Returns the generated prediction ids in row order.
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user.id,
+            "disease_type": disease,
+            "input_data": input_data,
+            "patient_id": input_data["patient_id"],
+            "predicted_class": prediction,
+            "predicted_probability": float(probability),
+            "risk": risk,
+            "timestamp": now,
+        }
+        for input_data, prediction, probability, risk in rows
+    ]
+    db.execute(insert(Prediction), values)
+    upsert_latest_risk(db, values)
+    db.commit()
+    return [value["id"] for value in values]
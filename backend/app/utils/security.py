@@ -1,9 +1,24 @@
+import os
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor. Hashes made with any other cost are re-hashed at the
+# next successful login, so tuning this migrates users transparently.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed: str) -> bool:
     return pwd_context.verify(plain_password, hashed)
+
+def verify_and_update(plain_password: str, hashed: str) -> tuple[bool, str | None]:
+    """(matches, replacement hash if the stored one uses outdated settings, else None)."""
+    return pwd_context.verify_and_update(plain_password, hashed)
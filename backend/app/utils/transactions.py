@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+from typing import Callable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# session.info key holding callbacks for the session's current transaction
+AFTER_COMMIT = "after_commit_callbacks"
+# set once the current transaction has sent a write to the database
+WROTE = "transaction_wrote"
+# nesting depth of unit_of_work blocks on the session
+UNIT_OF_WORK = "unit_of_work_depth"
+
+
+def on_commit(db: Session, callback: Callable[[], None]):
+    """
+    Run callback once db's current transaction commits. Dropped if the
+    transaction rolls back, so in-process state (caches, counters) only ever
+    reflects data that actually reached the database.
+    """
+    db.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+
+@contextmanager
+def unit_of_work(db: Session):
+    """
+    One transaction for a whole request: the route and every helper it calls
+    (create_notification, log_action, set_latest_risk, ...) only add to db,
+    and the block commits once on exit, or rolls everything back if it
+    raises, audit rows included. Side effects registered with on_commit
+    (pushes to notification streams, cache invalidations) run after that
+    commit.
+
+    Objects stay loaded after the commit, so returning them from the route
+    costs no extra SELECT. Nested blocks join the outermost one.
+    """
+    depth = db.info.get(UNIT_OF_WORK, 0)
+    db.info[UNIT_OF_WORK] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+            try:
+                db.commit()
+            finally:
+                db.expire_on_commit = expire_on_commit
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        db.info[UNIT_OF_WORK] = depth
+
+
+def in_unit_of_work(db: Session) -> bool:
+    """Whether db is inside a unit_of_work block, i.e. will commit once at its end."""
+    return db.info.get(UNIT_OF_WORK, 0) > 0
+
+
+def has_pending_writes(db: Session) -> bool:
+    """Whether db's current transaction has changes that a commit would persist."""
+    return bool(db.new or db.dirty or db.deleted or db.info.get(WROTE))
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session: Session, flush_context):
+    session.info[WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session):
+    session.info.pop(WROTE, None)
+    for callback in session.info.pop(AFTER_COMMIT, []):
+        try:
+            callback()
+        except Exception as e:
+            print("After-commit callback failed:", e)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit(session: Session):
+    session.info.pop(WROTE, None)
+    session.info.pop(AFTER_COMMIT, None)
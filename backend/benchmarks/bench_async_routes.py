@@ -0,0 +1,136 @@
+"""
+Sync vs async database access under concurrent load: the same read queries
+(/tasks/me and /patients/assigned/me) served by a sync handler on a Session
+(Starlette threadpool) and by an async handler on an AsyncSession
+(app.dependencies.get_async_db), driven in-process at rising concurrency.
+Uses DATABASE_URL / ASYNC_DATABASE_URL and the data already in it; both
+sides share the DB_POOL_* sizing, so past DB_POOL_SIZE + DB_MAX_OVERFLOW
+concurrent queries the pool, not the handler style, is the limit. Run from
+backend/:
+
+    python -m benchmarks.bench_async_routes [--user nurse1] [--concurrency 1 10 50 200]
+        [--requests 1000] [--latency-ms 20] [--json out.json]
+
+--latency-ms adds a server-side pg_sleep to every query (Postgres only) to
+stand in for a remote database.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.api.patients import assigned_patients_query
+from app.api.tasks import my_tasks_query
+from app.db import SessionLocal, async_engine, engine
+from app.db_schema.tasks import Task
+from app.db_schema.user import User
+from app.dependencies import get_async_db, get_db
+from benchmarks.timing import percentiles
+
+QUERIES = {"tasks": my_tasks_query, "assigned_patients": assigned_patients_query}
+
+
+def build_app(user_id, latency_ms: float) -> FastAPI:
+    app = FastAPI()
+    sleep = text("SELECT pg_sleep(:seconds)").bindparams(seconds=latency_ms / 1000) if latency_ms else None
+
+    for name, query in QUERIES.items():
+        def sync_route(db: Session = Depends(get_db), query=query):
+            if sleep is not None:
+                db.execute(sleep)
+            return len(db.execute(query(user_id)).all())
+
+        async def async_route(db: AsyncSession = Depends(get_async_db), query=query):
+            if sleep is not None:
+                await db.execute(sleep)
+            return len((await db.execute(query(user_id))).all())
+
+        app.add_api_route(f"/sync/{name}", sync_route)
+        app.add_api_route(f"/async/{name}", async_route)
+    return app
+
+
+async def drive(app: FastAPI, path: str, concurrency: int, requests: int) -> dict:
+    latencies = []
+    remaining = iter(range(requests))
+    errors = 0
+
+    async def worker(client):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get(path)  # warm the pool and the query cache
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return {"requests_per_s": round(requests / elapsed, 1), "errors": errors, **percentiles(latencies)}
+
+
+def pick_user(db: Session, username: str | None):
+    if username:
+        user = db.query(User.id).filter(User.username == username).first()
+        if user is None:
+            raise SystemExit(f"No user {username!r}")
+        return user.id
+    user = db.execute(
+        select(Task.assigned_to).where(Task.assigned_to.isnot(None))
+        .group_by(Task.assigned_to).order_by(func.count().desc()).limit(1)
+    ).first()
+    if user is None:
+        raise SystemExit("No tasks in the database; pass --user or seed some data first")
+    return user.assigned_to
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user", help="username whose tasks / patients are read (default: most tasks)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 200], help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per route and concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated database latency (Postgres only)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.latency_ms and engine.dialect.name != "postgresql":
+        parser.error("--latency-ms needs Postgres (pg_sleep)")
+    db = SessionLocal()
+    try:
+        user_id = pick_user(db, args.user)
+    finally:
+        db.close()
+    app = build_app(user_id, args.latency_ms)
+
+    async def run_all():
+        results = []
+        for name in QUERIES:
+            for concurrency in args.concurrency:
+                row = {"route": name, "concurrency": concurrency}
+                for mode in ("sync", "async"):
+                    row[mode] = await drive(app, f"/{mode}/{name}", concurrency, args.requests)
+                results.append(row)
+                print(f"{name:<18} c={concurrency:<4} " + "  ".join(
+                    f"{mode} {row[mode]['requests_per_s']:>7} req/s p50/p95/p99 "
+                    f"{row[mode]['p50_ms']}/{row[mode]['p95_ms']}/{row[mode]['p99_ms']} ms"
+                    for mode in ("sync", "async")
+                ))
+        await async_engine.dispose()
+        return results
+
+    results = asyncio.run(run_all())
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Latency of the compiled tree models (app/services/tree_compiler.py) against
+the original sklearn / XGBoost predict path, plus a correctness check of
+predict_proba and of TreeSHAP on the compiled heart-failure forest. Run from
+backend/:
+
+    python -m benchmarks.bench_compiled_models [--repeat 200] [--json out.json]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import numpy as np
+import shap
+from app.services.feature_pipeline import array_input
+from app.services.model_registry import get_model, LOADERS
+from app.services.tree_compiler import compile_model, probe_matrix
+
+BATCH_SIZES = (1, 16, 256)
+
+
+def timed(fn, X, repeat: int) -> float:
+    """Median latency in milliseconds."""
+    fn(X)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench(disease: str, repeat: int) -> dict:
+    artifacts = get_model(disease)
+    compiled = compile_model(artifacts.model)
+    if compiled is None:
+        return {"disease": disease, "compiled": None}
+    pipeline = artifacts.pipeline
+    X = np.asarray(
+        probe_matrix(compiled, len(pipeline.feature_names), max(BATCH_SIZES), seed=1),
+        dtype=pipeline.dtype, order=pipeline.order,
+    )
+    result = {
+        "disease": disease,
+        "compiled": type(compiled).__name__,
+        "max_abs_error": float(np.abs(artifacts.model.predict_proba(X) - compiled.predict_proba(X)).max()),
+        "latency_ms": {},
+    }
+    for n in BATCH_SIZES:
+        rows = np.asarray(X[:n], order=pipeline.order)
+        original = timed(artifacts.model.predict_proba, rows, repeat)
+        fast = timed(compiled.predict_proba, rows, repeat)
+        result["latency_ms"][n] = {"original": round(original, 4), "compiled": round(fast, 4), "speedup": round(original / fast, 1)}
+    if hasattr(compiled, "shap_model"):
+        rows = X[:16]
+        original = shap.Explainer(artifacts.model)(rows)
+        fast = shap.TreeExplainer(compiled.shap_model())(rows)
+        result["shap_max_abs_error"] = float(np.abs(original.values - fast.values).max())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    with array_input():
+        results = [bench(disease, args.repeat) for disease in LOADERS]
+    ok = True
+    for result in results:
+        if result["compiled"] is None:
+            print(f"{result['disease']:<14} not compilable")
+            continue
+        ok &= result["max_abs_error"] == 0 and result.get("shap_max_abs_error", 0) == 0
+        print(f"{result['disease']:<14} {result['compiled']:<17} max |Δp|={result['max_abs_error']:.1e}"
+              + (f"  max |Δshap|={result['shap_max_abs_error']:.1e}" if "shap_max_abs_error" in result else ""))
+        for n, timing in result["latency_ms"].items():
+            print(f"    rows={n:<5} original {timing['original']:>9.3f} ms   compiled {timing['compiled']:>9.3f} ms   x{timing['speedup']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
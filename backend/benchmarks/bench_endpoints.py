@@ -0,0 +1,229 @@
+"""
+End-to-end latency and throughput per API endpoint: drives the FastAPI app
+in-process over ASGI (httpx, with the app's startup / shutdown hooks) with
+N concurrent clients, each authenticated as a seeded nurse or admin, and
+reports p50/p95/p99 latency and requests/s. The Gemini explainer is replaced
+by its offline stub (EXPLANATION_BACKEND=stub) and the maintenance scheduler
+is off. Run from backend/ against a scratch database:
+
+    python -m benchmarks.bench_endpoints --database-url sqlite:///bench.db [--seed-patients 1000]
+        [--endpoints tasks_me patient_profile ...] [--concurrency 1 16 64] [--requests 500]
+        [--json results.json] [--compare baseline.json] [--max-regression 0.2]
+
+--seed-patients seeds the database first (see benchmarks/seed_data.py) if
+it has no patients yet. --compare exits non-zero when an endpoint's p95
+grew by more than --max-regression against the earlier run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from benchmarks.seed_data import create_schema, seed, use_database
+from benchmarks.timing import percentiles
+
+DISEASE_ROUTES = {"pneumonia": "pneumonia", "Heart Failure": "heart_failure", "diabetes": "diabetes"}
+
+
+# ── Endpoints: name -> (role, request builder(rng, user) -> (method, url, json body)) ──
+
+def predict_request(rng, user):
+    from scripts.check_pipeline_parity import RECORDS
+    patient_id, disease = rng.choice(user["patients"])
+    route = DISEASE_ROUTES[disease]
+    record = RECORDS[route](rng, 0)
+    record["patient_id"] = patient_id
+    return "POST", f"/predict/{route}", record
+
+
+def follow_up_request(rng, user):
+    patient_id, _ = rng.choice(user["patients"])
+    return "POST", f"/patients/{patient_id}/followups", {
+        "notes": "Benchmark call", "status": "completed", "follow_up_type": "phone",
+        "follow_up_date": date.today().isoformat(),
+        "next_followup": (date.today() + timedelta(days=rng.randint(7, 60))).isoformat(),
+    }
+
+
+ENDPOINTS = {
+    "patients_assigned_me": ("nurse", lambda rng, user: ("GET", "/patients/assigned/me", None)),
+    "patient_profile": ("nurse", lambda rng, user: ("GET", f"/patients/{rng.choice(user['patients'])[0]}", None)),
+    "patients_list": ("admin", lambda rng, user: ("GET", "/patients/list?limit=50&sort=risk&order=desc", None)),
+    "patients_summary": ("admin", lambda rng, user: ("GET", "/patients/summary", None)),
+    "tasks_me": ("nurse", lambda rng, user: ("GET", "/tasks/me", None)),
+    "my_notifications": ("nurse", lambda rng, user: ("GET", "/my-notifications", None)),
+    "unread_count": ("nurse", lambda rng, user: ("GET", "/my-notifications/unread-count", None)),
+    "escalations_all": ("admin", lambda rng, user: ("GET", "/escalations/all", None)),
+    "add_follow_up": ("nurse", follow_up_request),
+    "predict": ("nurse", predict_request),
+}
+
+
+def load_users(db) -> dict:
+    """Seeded users with an access token each; nurses also carry their assigned patients."""
+    from app.db_schema.patient_related import Assignment, PatientReference
+    from app.db_schema.user import User
+    from app.utils.jwt import create_access_token
+
+    users = {"nurse": [], "admin": []}
+    for user in db.query(User).filter(User.role.in_(("nurse", "admin"))).order_by(User.username):
+        users[user.role].append({
+            "username": user.username,
+            "headers": {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"},
+            "patients": [],
+        })
+    by_name = {user["username"]: user for user in users["nurse"]}
+    rows = (
+        db.query(User.username, PatientReference.patient_id, PatientReference.disease_type)
+        .join(Assignment, Assignment.user_id == User.id)
+        .join(PatientReference, PatientReference.patient_id == Assignment.patient_id)
+        .filter(User.role == "nurse")
+    )
+    for username, patient_id, disease in rows:
+        if disease in DISEASE_ROUTES:
+            by_name[username]["patients"].append((patient_id, disease))
+    users["nurse"] = [user for user in users["nurse"] if user["patients"]]
+    if not users["nurse"] or not users["admin"]:
+        raise SystemExit("No seeded nurses with patients / admins; run benchmarks.seed_data or pass --seed-patients")
+    return users
+
+
+async def drive(client, name: str, users: list, concurrency: int, requests: int, seed: int) -> dict:
+    role, build = ENDPOINTS[name]
+    rng = random.Random(seed)
+    latencies = []
+    statuses = Counter()
+    remaining = iter(range(requests))
+
+    async def one():
+        user = rng.choice(users)
+        method, url, body = build(rng, user)
+        start = time.perf_counter()
+        response = await client.request(method, url, json=body, headers=user["headers"])
+        return time.perf_counter() - start, response.status_code
+
+    for _ in range(min(10, requests)):  # warm-up: caches, pools, first model load
+        await one()
+
+    async def worker():
+        for _ in remaining:
+            elapsed, status = await one()
+            latencies.append(elapsed)
+            statuses[status] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return {
+        "endpoint": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "requests_per_s": round(requests / elapsed, 1),
+        **percentiles(latencies),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def compare(results: list, baseline_path: str, max_regression: float) -> bool:
+    """Prints p95 / throughput changes against a previous run; False if any p95 regressed too far."""
+    with open(baseline_path) as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    ok = True
+    print(f"\nagainst {baseline_path} (p95 regression limit {max_regression:.0%})")
+    for r in results:
+        before = baseline.get((r["endpoint"], r["concurrency"]))
+        if before is None:
+            continue
+        p95_change = r["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps_change = r["requests_per_s"] / before["requests_per_s"] - 1 if before["requests_per_s"] else 0.0
+        regressed = p95_change > max_regression
+        ok &= not regressed
+        print(f"  {r['endpoint']:<22} c={r['concurrency']:<4} p95 {before['p95_ms']:>8} -> {r['p95_ms']:>8} ms "
+              f"({p95_change:+.0%})  req/s {rps_change:+.0%}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db"),
+                        help="scratch database (default: $BENCH_DATABASE_URL or sqlite:///bench.db)")
+    parser.add_argument("--seed-patients", type=int, help="seed this many patients first if the database is empty")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64], help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint and concurrency level")
+    parser.add_argument("--seed", type=int, default=0, help="seeds the request mix")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 growth with --compare")
+    args = parser.parse_args()
+
+    use_database(args.database_url)
+    os.environ["EXPLANATION_BACKEND"] = "stub"
+    os.environ["SCHEDULER_ENABLED"] = "false"
+    import httpx
+    from app.db import SessionLocal, engine
+    from app.db_schema.patient_related import PatientReference
+    from app.main import app
+
+    create_schema()  # no-op for existing tables; on SQLite also sets up client-side UUIDs
+    db = SessionLocal()
+    try:
+        patients = db.query(PatientReference).count()
+        if not patients and args.seed_patients:
+            print(f"seeding {args.seed_patients} patients ...")
+            seed(db, args.seed_patients, args.seed)
+            patients = db.query(PatientReference).count()
+        users = load_users(db)
+    finally:
+        db.close()
+
+    async def run_all():
+        results = []
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for name in args.endpoints:
+                    for concurrency in args.concurrency:
+                        r = await drive(client, name, users[ENDPOINTS[name][0]], concurrency, args.requests, args.seed)
+                        results.append(r)
+                        print(f"{name:<22} c={concurrency:<4} {r['requests_per_s']:>8} req/s  "
+                              f"p50/p95/p99 {r['p50_ms']}/{r['p95_ms']}/{r['p99_ms']} ms  errors {r['errors']}")
+        return results
+
+    results = asyncio.run(run_all())
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "database": engine.dialect.name,
+            "patients": patients,
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Login-path password hashing under a sign-in storm: latency and throughput of
+bcrypt verification through the dedicated executor
+(app/services/password_hasher.py), against the old behaviour of verifying
+inside Starlette's shared threadpool. While the storm runs, a cheap
+threadpool task stands in for every other endpoint; its latency shows
+whether the storm starves the rest of the API. Run from backend/:
+
+    python -m benchmarks.bench_password_hashing [--logins 200] [--rounds 10 12] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+from app.services.password_hasher import PasswordHasher, PASSWORD_HASH_WORKERS
+from benchmarks.timing import percentiles
+
+
+async def other_endpoint_latency(stop: asyncio.Event) -> list:
+    """Latency of a trivial threadpool job, sampled every 10ms until stop."""
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await run_in_threadpool(lambda: None)
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return samples
+
+
+async def storm(verify, logins: int) -> dict:
+    stop = asyncio.Event()
+    probe = asyncio.ensure_future(other_endpoint_latency(stop))
+    latencies = []
+
+    async def one():
+        start = time.perf_counter()
+        await verify()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    others = await probe
+    return {
+        "logins_per_s": round(logins / elapsed, 1),
+        "login": percentiles(latencies),
+        "other_endpoints": percentiles(others),
+    }
+
+
+def bench(rounds: int, logins: int) -> dict:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash("correct horse battery staple")
+    check = lambda: context.verify("correct horse battery staple", hashed)
+
+    single = []
+    for _ in range(5):
+        start = time.perf_counter()
+        check()
+        single.append(time.perf_counter() - start)
+
+    hasher = PasswordHasher(workers=PASSWORD_HASH_WORKERS, queue_size=logins)
+    try:
+        dedicated = asyncio.run(storm(lambda: hasher._run(check), logins))
+    finally:
+        hasher.shutdown()
+    shared = asyncio.run(storm(lambda: run_in_threadpool(check), logins))
+    return {
+        "rounds": rounds,
+        "single_verify_ms": round(statistics.median(single) * 1000, 2),
+        "dedicated_executor": dedicated,
+        "shared_threadpool": shared,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200, help="concurrent logins per storm")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12], help="bcrypt cost factors to compare")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [bench(rounds, args.logins) for rounds in args.rounds]
+    for r in results:
+        print(f"bcrypt rounds={r['rounds']}  single verify {r['single_verify_ms']} ms")
+        for mode in ("dedicated_executor", "shared_threadpool"):
+            m = r[mode]
+            print(f"  {mode:<20} {m['logins_per_s']:>7} logins/s  "
+                  f"login p50/p95/p99 {m['login']['p50_ms']}/{m['login']['p95_ms']}/{m['login']['p99_ms']} ms  "
+                  f"other endpoints p95/p99 {m['other_endpoints']['p95_ms']}/{m['other_endpoints']['p99_ms']} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Cold-start cost of the API, measured in fresh interpreters: how long
+`import app.main` takes and which modules dominate it (python -X importtime),
+how long until /health/live answers once startup has run, and how long until
+the background warm-up makes /health/ready return 200. Also checks that the
+heavy ML / Gemini modules (HEAVY_MODULES) stay out of `import app.main`, and
+what each of them costs when it is imported later. The scheduler is off; the
+database is DATABASE_URL (startup only needs it to be reachable). Run from
+backend/:
+
+    python -m benchmarks.bench_startup [--runs 5] [--top 15] [--ready-timeout 300]
+        [--json out.json] [--fail-on-heavy]
+
+--fail-on-heavy exits non-zero when `import app.main` imports any of
+HEAVY_MODULES again.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# imported by the warm-up / first prediction, never by `import app.main`
+HEAVY_MODULES = ("shap", "numba", "sklearn", "pandas", "xgboost", "google.genai")
+
+# runs in the child: prints one JSON line with the timings (seconds since the child started)
+CHILD = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+import httpx
+
+async def probe():
+    fa = app.main.app
+    async with fa.router.lifespan_context(fa):
+        started = time.perf_counter() - start
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fa), base_url="http://bench") as client:
+            live = (await client.get("/health/live")).status_code
+            live_at = time.perf_counter() - start
+            deadline = time.perf_counter() + {timeout}
+            while True:
+                response = await client.get("/health/ready")
+                if response.status_code == 200 or response.json().get("finished") or time.perf_counter() > deadline:
+                    break
+                await asyncio.sleep(0.02)
+            ready_at = time.perf_counter() - start
+    return started, live, live_at, response.status_code, ready_at, response.json()
+
+started, live, live_at, ready, ready_at, warmup = asyncio.run(probe())
+print(json.dumps({{
+    "import_s": imported, "startup_s": started, "live_s": live_at, "ready_s": ready_at,
+    "live_status": live, "ready_status": ready, "warmup_seconds": warmup.get("seconds"),
+    "warmup_errors": warmup.get("errors"), "heavy_imported": heavy,
+}}))
+"""
+
+# runs in the child: the cost of one heavy module once app.main is already imported
+DEFERRED = """
+import time, app.main
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def child_env() -> dict:
+    return {**os.environ, "SCHEDULER_ENABLED": "false", "PYTHONWARNINGS": "ignore"}
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """
+    `-X importtime` lines as {module, self_ms, cumulative_ms}, up to app.main
+    itself; later lines are the warm-up's imports.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+        if name.strip() == "app.main":
+            break
+    return modules
+
+
+def run_once(timeout: float) -> dict:
+    wall = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(heavy=HEAVY_MODULES, timeout=timeout)],
+        capture_output=True, text=True, env=child_env(),
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"child failed:\n{proc.stderr[-4000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_wall_s"] = time.perf_counter() - wall
+    result["importtime"] = parse_importtime(proc.stderr)
+    return result
+
+
+def deferred_cost(module: str) -> float | None:
+    proc = subprocess.run([sys.executable, "-c", DEFERRED.format(module=module)], capture_output=True, text=True, env=child_env())
+    if proc.returncode != 0:
+        return None  # not installed
+    return round(float(proc.stdout.strip().splitlines()[-1]) * 1000, 1)
+
+
+def summarize(runs: list, key: str) -> dict:
+    values = [r[key] * 1000 for r in runs]
+    return {"median_ms": round(statistics.median(values), 1), "min_ms": round(min(values), 1), "max_ms": round(max(values), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules (by self time) to list")
+    parser.add_argument("--ready-timeout", type=float, default=300, help="seconds to wait for /health/ready")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--fail-on-heavy", action="store_true", help="exit 1 if app.main imports HEAVY_MODULES")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.runs):
+        r = run_once(args.ready_timeout)
+        runs.append(r)
+        print(f"run {i + 1}: import {r['import_s'] * 1000:7.0f} ms  live {r['live_s'] * 1000:7.0f} ms  "
+              f"ready {r['ready_s'] * 1000:7.0f} ms ({r['ready_status']})  process {r['process_wall_s'] * 1000:7.0f} ms")
+
+    # the last run's -X importtime breakdown
+    slowest = sorted(runs[-1]["importtime"], key=lambda m: m["self_ms"], reverse=True)[:args.top]
+    print("\nslowest modules imported by app.main (self time):")
+    for m in slowest:
+        print(f"  {m['module']:<48} {m['self_ms']:8.1f} ms  (cumulative {m['cumulative_ms']:.1f} ms)")
+
+    heavy_imported = sorted({name for r in runs for name in r["heavy_imported"]})
+    deferred = {module: deferred_cost(module) for module in HEAVY_MODULES}
+    print("\ndeferred to the warm-up / first prediction:")
+    for module, cost in deferred.items():
+        state = "IMPORTED BY app.main" if module in heavy_imported else "not installed" if cost is None else f"{cost:.0f} ms"
+        print(f"  {module:<16} {state}")
+    warmup_errors = runs[-1]["warmup_errors"]
+    print(f"\nwarm-up steps: {runs[-1]['warmup_seconds']}" + (f"  errors: {warmup_errors}" if warmup_errors else ""))
+
+    report = {
+        "runs": args.runs,
+        "python": sys.version.split()[0],
+        "import": summarize(runs, "import_s"),
+        "live": summarize(runs, "live_s"),
+        "ready": summarize(runs, "ready_s"),
+        "process_wall": summarize(runs, "process_wall_s"),
+        "warmup_seconds": runs[-1]["warmup_seconds"],
+        "warmup_errors": warmup_errors,
+        "slowest_imports": slowest,
+        "heavy_imported_by_app_main": heavy_imported,
+        "deferred_import_ms": deferred,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.fail_on_heavy and heavy_imported:
+        print(f"app.main imports {heavy_imported}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
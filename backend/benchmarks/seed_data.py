@@ -0,0 +1,187 @@
+"""
+Synthetic data for the benchmarks: users, patients with assignments,
+predictions (and their patient_latest_risk rows), follow-ups, tasks,
+escalations and notifications, generated deterministically from --seed.
+Per patient that is about 13 rows, so --patients 1000 gives ~13k rows and
+--patients 75000 ~1M. Run from backend/ against a scratch database:
+
+    python -m benchmarks.seed_data --database-url sqlite:///bench.db --patients 1000 [--reset]
+
+Every seeded user's password is "benchmark". Usernames are admin0..,
+nurse0.. and patient ids BP0000000..
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+PATIENTS_PER_NURSE = 50
+PREDICTIONS_PER_PATIENT = 3
+FOLLOW_UPS_PER_PATIENT = 2
+NOTIFICATIONS_PER_NURSE = 100
+ADMINS = 2
+CHUNK = 5000  # rows per INSERT statement
+PASSWORD = "benchmark"
+DISEASES = ("pneumonia", "Heart Failure", "diabetes")
+RISKS = ("Low", "Medium", "High")
+
+
+def use_database(url: str):
+    """Point app.db at url; must run before anything imports app."""
+    if "app.db" in sys.modules and sys.modules["app.db"].DATABASE_URL != url:
+        raise RuntimeError("app.db is already bound to another database")
+    os.environ["DATABASE_URL"] = url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+
+
+def create_schema(reset: bool = False):
+    """
+    Creates every table from the ORM models. SQLite has no gen_random_uuid(),
+    so there the UUID primary keys default to 16 random bytes in hex (the
+    form SQLAlchemy stores UUIDs in on SQLite) instead.
+    """
+    import app.main  # noqa: F401 -- registers every model on Base
+    from sqlalchemy import text
+    from app.db import Base, engine
+    if engine.dialect.name == "sqlite":
+        for table in Base.metadata.tables.values():
+            for column in table.columns:
+                if column.server_default is not None and "gen_random_uuid" in str(column.server_default.arg):
+                    column.server_default.arg = text("(lower(hex(randomblob(16))))")
+    if reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+def _insert(db, table, rows: list, counts: dict):
+    from sqlalchemy import insert
+    for start in range(0, len(rows), CHUNK):
+        db.execute(insert(table), rows[start:start + CHUNK])
+    counts[table.name] = counts.get(table.name, 0) + len(rows)
+
+
+def seed(db, patients: int, seed: int = 0) -> dict:
+    """Inserts the synthetic data and commits; returns the row count per table."""
+    from app.db_schema.escalations import Escalation
+    from app.db_schema.notifications import Notification, NotificationRecipient
+    from app.db_schema.patient_latest_risk import PatientLatestRisk
+    from app.db_schema.patient_related import Assignment, FollowUp, PatientReference
+    from app.db_schema.predicition import Prediction
+    from app.db_schema.tasks import Task
+    from app.db_schema.user import User
+    from app.utils.security import hash_password
+
+    rng = random.Random(seed)
+    ids = lambda: uuid.UUID(int=rng.getrandbits(128), version=4)
+    now = datetime.utcnow().replace(microsecond=0)
+    ago = lambda days: now - timedelta(days=rng.uniform(0, days))
+    counts = {}
+
+    hashed = hash_password(PASSWORD)
+    nurses = [{"id": ids(), "username": f"nurse{i}", "email": f"nurse{i}@bench.local", "hashed_password": hashed,
+               "role": "nurse", "created_at": ago(365), "must_change_password": False}
+              for i in range(max(1, patients // PATIENTS_PER_NURSE))]
+    admins = [{"id": ids(), "username": f"admin{i}", "email": f"admin{i}@bench.local", "hashed_password": hashed,
+               "role": "admin", "created_at": ago(365), "must_change_password": False}
+              for i in range(ADMINS)]
+    _insert(db, User.__table__, nurses + admins, counts)
+
+    # patients in slices, so 1M-row runs don't hold everything in memory
+    for first in range(0, patients, CHUNK):
+        batch = {name: [] for name in ("patients", "assignments", "predictions", "latest", "follow_ups", "tasks", "escalations")}
+        for n in range(first, min(patients, first + CHUNK)):
+            patient_id = f"BP{n:07d}"
+            disease = DISEASES[n % len(DISEASES)]
+            nurse = nurses[n % len(nurses)]["id"]
+            batch["patients"].append({
+                "patient_id": patient_id, "name": f"Patient {n}", "age": rng.randint(18, 95),
+                "gender": rng.choice(("Male", "Female")), "mobile_number": f"555{n:07d}",
+                "disease_type": disease, "clinical_info": {"bmi": round(rng.uniform(17, 40), 1)},
+            })
+            # every 20th patient is left unassigned
+            if n % 20:
+                batch["assignments"].append({"id": ids(), "user_id": nurse, "patient_id": patient_id, "assigned_at": ago(180)})
+            predictions = sorted(
+                ({"id": ids(), "user_id": nurse, "patient_id": patient_id, "disease_type": disease, "input_data": {},
+                  "predicted_class": rng.randint(0, 1), "predicted_probability": round(rng.random(), 4),
+                  "risk": rng.choice(RISKS), "timestamp": ago(180)}
+                 for _ in range(PREDICTIONS_PER_PATIENT)),
+                key=lambda p: p["timestamp"],
+            )
+            batch["predictions"].extend(predictions)
+            latest = predictions[-1]
+            batch["latest"].append({
+                "patient_id": patient_id, "prediction_id": latest["id"], "disease_type": disease, "risk": latest["risk"],
+                "predicted_class": latest["predicted_class"], "predicted_probability": latest["predicted_probability"],
+                "predicted_at": latest["timestamp"], "updated_at": latest["timestamp"],
+            })
+            for _ in range(FOLLOW_UPS_PER_PATIENT):
+                when = ago(120) + timedelta(days=60)
+                batch["follow_ups"].append({
+                    "id": ids(), "patient_id": patient_id, "user_id": nurse, "notes": "Routine check",
+                    "follow_up_type": rng.choice(("phone", "onsite", "virtual")),
+                    "status": "upcoming" if when > now else rng.choice(("completed", "pending", "cancelled")),
+                    "timestamp": ago(120), "follow_up_date": when.date(),
+                })
+            batch["tasks"].append({
+                "id": ids(), "patient_id": patient_id, "assigned_by": admins[0]["id"], "assigned_to": nurse,
+                "description": f"Review {patient_id}", "status": rng.choice(("pending", "completed")),
+                "created_at": ago(90), "updated_at": now, "due_date": (ago(30) + timedelta(days=20)).date(),
+            })
+            if n % 10 == 0:
+                batch["escalations"].append({
+                    "id": ids(), "patient_id": patient_id, "user_id": nurse, "old_risk": "Low", "new_risk": "High",
+                    "description": "Worsening vitals", "status": rng.choice(("pending", "accepted", "rejected")),
+                    "created_at": ago(60), "updated_at": now,
+                })
+        _insert(db, PatientReference.__table__, batch["patients"], counts)
+        _insert(db, Assignment.__table__, batch["assignments"], counts)
+        _insert(db, Prediction.__table__, batch["predictions"], counts)
+        _insert(db, PatientLatestRisk.__table__, batch["latest"], counts)
+        _insert(db, FollowUp.__table__, batch["follow_ups"], counts)
+        _insert(db, Task.__table__, batch["tasks"], counts)
+        _insert(db, Escalation.__table__, batch["escalations"], counts)
+        db.commit()
+
+    for nurse in nurses:
+        notifications, recipients = [], []
+        for i in range(NOTIFICATIONS_PER_NURSE):
+            created_at = ago(120)
+            notifications.append({"id": ids(), "message": f"Synthetic notification {i}", "link": "/tasks", "created_at": created_at})
+            recipients.append({"notification_id": notifications[-1]["id"], "user_id": nurse["id"], "created_at": created_at,
+                               "read_at": created_at + timedelta(hours=1) if rng.random() < 0.7 else None})
+        _insert(db, Notification.__table__, notifications, counts)
+        _insert(db, NotificationRecipient.__table__, recipients, counts)
+    db.commit()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db"),
+                        help="scratch database to seed (default: $BENCH_DATABASE_URL or sqlite:///bench.db)")
+    parser.add_argument("--patients", type=int, default=1000, help="number of patients (~13 rows each)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    args = parser.parse_args()
+
+    use_database(args.database_url)
+    create_schema(reset=args.reset)
+    from app.db import SessionLocal
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        counts = seed(db, args.patients, args.seed)
+    finally:
+        db.close()
+    for table, rows in counts.items():
+        print(f"{table:<24} {rows:>9}")
+    print(f"{'total':<24} {sum(counts.values()):>9}  ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
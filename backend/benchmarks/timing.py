@@ -0,0 +1,8 @@
+"""Helpers shared by the benchmark scripts."""
+
+
+def percentiles(samples: list) -> dict:
+    """p50/p95/p99 and max of latency samples (seconds), in milliseconds."""
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(len(samples) * q))] * 1000, 2)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(samples[-1] * 1000, 2)}
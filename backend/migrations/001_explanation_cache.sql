@@ -0,0 +1,12 @@
+-- Persistent tier of the explanation cache (app/services/explanation_cache.py)
+CREATE TABLE IF NOT EXISTS explanation_cache (
+    cache_key    VARCHAR(64) PRIMARY KEY,
+    disease      VARCHAR     NOT NULL,
+    explanation  TEXT        NOT NULL,
+    hits         INTEGER     NOT NULL DEFAULT 0,
+    created_at   TIMESTAMP   DEFAULT now(),
+    last_used_at TIMESTAMP   DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_explanation_cache_created_at ON explanation_cache (created_at);
+CREATE INDEX IF NOT EXISTS ix_explanation_cache_last_used_at ON explanation_cache (last_used_at);
@@ -0,0 +1,24 @@
+-- Latest prediction per patient (app/db_schema/patient_latest_risk.py)
+CREATE INDEX IF NOT EXISTS ix_predictions_patient_id_timestamp ON predictions (patient_id, timestamp DESC);
+-- "my assigned patients" starts from the user's assignments
+CREATE INDEX IF NOT EXISTS ix_assignments_user_id ON assignments (user_id);
+
+CREATE TABLE IF NOT EXISTS patient_latest_risk (
+    patient_id            VARCHAR   PRIMARY KEY REFERENCES patient_reference (patient_id),
+    prediction_id         UUID      NOT NULL REFERENCES predictions (id),
+    disease_type          VARCHAR   NOT NULL,
+    risk                  VARCHAR,
+    predicted_class       INTEGER   NOT NULL,
+    predicted_probability FLOAT     NOT NULL,
+    predicted_at          TIMESTAMP NOT NULL,
+    updated_at            TIMESTAMP DEFAULT now()
+);
+
+-- Backfill from existing predictions (walks the index above once per patient)
+INSERT INTO patient_latest_risk
+    (patient_id, prediction_id, disease_type, risk, predicted_class, predicted_probability, predicted_at, updated_at)
+SELECT DISTINCT ON (patient_id)
+    patient_id, id, disease_type, risk, predicted_class, predicted_probability, timestamp, now()
+FROM predictions
+ORDER BY patient_id, timestamp DESC
+ON CONFLICT (patient_id) DO NOTHING;
@@ -0,0 +1,6 @@
+-- Keyset-paginated GET /patients/list
+-- latest assignee per patient (correlated subquery) and the assigned / unassigned filters
+CREATE INDEX IF NOT EXISTS ix_assignments_patient_id_assigned_at ON assignments (patient_id, assigned_at DESC);
+CREATE INDEX IF NOT EXISTS ix_patient_reference_disease_type ON patient_reference (disease_type, patient_id);
+CREATE INDEX IF NOT EXISTS ix_patient_latest_risk_probability ON patient_latest_risk (predicted_probability DESC, patient_id);
+CREATE INDEX IF NOT EXISTS ix_patient_latest_risk_risk ON patient_latest_risk (risk, patient_id);
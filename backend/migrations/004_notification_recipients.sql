@@ -0,0 +1,28 @@
+-- Per-recipient notification inbox (app/db_schema/notifications.py)
+CREATE TABLE IF NOT EXISTS notification_recipients (
+    notification_id UUID      NOT NULL REFERENCES notifications (id) ON DELETE CASCADE,
+    user_id         UUID      NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    created_at      TIMESTAMP NOT NULL DEFAULT now(),
+    read_at         TIMESTAMP,
+    PRIMARY KEY (notification_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS ix_notification_recipients_user_created
+    ON notification_recipients (user_id, created_at DESC, notification_id DESC);
+CREATE INDEX IF NOT EXISTS ix_notification_recipients_unread
+    ON notification_recipients (user_id) WHERE read_at IS NULL;
+
+-- Backfill from the user_ids / read_by arrays. The old schema kept no read time,
+-- so notifications already read are stamped with their creation time.
+-- Recipients that no longer exist as users are skipped.
+INSERT INTO notification_recipients (notification_id, user_id, created_at, read_at)
+SELECT n.id,
+       r.user_id,
+       COALESCE(n.created_at, now()),
+       CASE WHEN r.user_id = ANY (COALESCE(n.read_by, '{}')) THEN COALESCE(n.created_at, now()) END
+FROM notifications n
+CROSS JOIN LATERAL (SELECT DISTINCT unnest(n.user_ids) AS user_id) r
+JOIN users u ON u.id = r.user_id
+ON CONFLICT (notification_id, user_id) DO NOTHING;
+
+-- The arrays are no longer written; they can be dropped once every instance runs this version.
+ALTER TABLE notifications ALTER COLUMN user_ids DROP NOT NULL;
@@ -0,0 +1,11 @@
+-- Scheduled maintenance jobs (app/services/maintenance_jobs.py)
+-- missed_followups: upcoming follow-ups whose date has passed
+CREATE INDEX IF NOT EXISTS ix_follow_ups_status_date ON follow_ups (status, follow_up_date);
+
+-- overdue_tasks: pending tasks past their due date, notified once
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS overdue_notified_at TIMESTAMP;
+CREATE INDEX IF NOT EXISTS ix_tasks_status_due_date ON tasks (status, due_date);
+
+-- prune_notifications: read inbox rows past the retention period
+CREATE INDEX IF NOT EXISTS ix_notification_recipients_read_created
+    ON notification_recipients (created_at) WHERE read_at IS NOT NULL;
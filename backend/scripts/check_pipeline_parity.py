@@ -0,0 +1,179 @@
+"""
+Parity check for app/services/feature_pipeline.py.
+
+Runs the legacy pandas preprocessing (kept here verbatim as the reference)
+and the compiled NumPy pipelines on the same randomly generated inputs, and
+checks that the feature matrices, predict_proba outputs and SHAP values are
+identical. Run from backend/:
+
+    python -m scripts.check_pipeline_parity [--rows 500] [--seed 0]
+
+The same checks run as a test: python -m unittest tests.test_pipeline_parity
+"""
+import argparse
+import random
+import sys
+import numpy as np
+import pandas as pd
+from app.models.predict_inputs import PneumoniaInput, HeartFailureInput, DiabetesInput
+from app.services.model_registry import get_model
+from app.services.shap_service import compute_shap
+
+
+# ── Reference implementation (pandas), as previously used by app/api/predict.py ──
+
+def get_age_bucket(age: int) -> str:
+    if age < 0 or age > 99:
+        raise ValueError("Age must be between 0 and 99")
+    lower = (age // 10) * 10
+    upper = lower + 10
+    return f"[{lower}-{upper})"
+
+def prepare_pneumonia(artifacts, records: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(records)
+    df.drop(columns=["patient_id"], inplace=True)
+    encoders = artifacts.encoders
+
+    # Encode categorical
+    df["gender"] = encoders["gender"].transform(df["gender"])
+    df["smoking_status"] = encoders["smoking_status"].transform(df["smoking_status"])
+    df["discharge_disposition"] = encoders["discharge_disposition"].transform(df["discharge_disposition"])
+
+    # Comorbidities (multi-label)
+    comorb = [record["comorbidities"].split(",") for record in records]
+    comorb_encoded = encoders["multi_comorb"].transform(comorb)
+    comorb_df = pd.DataFrame(comorb_encoded, columns=encoders["multi_comorb"].classes_)
+    df = df.drop(columns=["comorbidities"]).join(comorb_df)
+
+    # Scale selected features
+    scaler_cols = artifacts.numerical_cols
+    df[scaler_cols] = artifacts.scaler.transform(df[scaler_cols])
+
+    # Reorder to match training
+    return df[artifacts.feature_order]
+
+def prepare_heart_failure(artifacts, records: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(records)
+    encoder = artifacts.encoders["categorical"]
+    categorical_cols = ["Gender", "Ethnicity", "Discharge_Disposition"]
+    encoded_array = encoder.transform(df[categorical_cols])
+    encoded_df = pd.DataFrame(encoded_array, columns=encoder.get_feature_names_out())
+    encoded_df.columns = [col.replace("cat__", "") for col in encoded_df.columns]
+    df = df.drop(["patient_id"] + categorical_cols, axis=1)
+    df = pd.concat([df.reset_index(drop=True), encoded_df.reset_index(drop=True)], axis=1)
+
+    df = df[artifacts.feature_order]
+
+    numerical_cols = artifacts.numerical_cols
+    df[numerical_cols] = artifacts.scaler.transform(df[numerical_cols])
+    return df
+
+def prepare_diabetes(artifacts, records: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(records)
+    df.drop(columns=["patient_id"], errors="ignore", inplace=True)
+    df['age'] = [get_age_bucket(age) for age in df['age']]
+    encoders = artifacts.encoders
+    for col in encoders:
+        if col in df.columns:
+            # missing values were encoded as the literal "NaN" label in training
+            df[col] = encoders[col].transform(df[col].fillna("NaN"))
+    return df
+
+
+REFERENCE = {
+    "pneumonia": prepare_pneumonia,
+    "heart_failure": prepare_heart_failure,
+    "diabetes": prepare_diabetes,
+}
+
+
+# ── Synthetic inputs covering every categorical level ──
+
+def choice_of(model, field):
+    return list(model.model_fields[field].annotation.__args__)
+
+
+def pneumonia_record(rng, i):
+    encoders = get_model("pneumonia").encoders
+    comorb = encoders["multi_comorb"].classes_.tolist()
+    return PneumoniaInput(
+        patient_id=f"P{i}", age=rng.randint(18, 99), gender=rng.choice(choice_of(PneumoniaInput, "gender")),
+        bmi=rng.uniform(15, 45), smoking_status=rng.choice(choice_of(PneumoniaInput, "smoking_status")),
+        length_of_stay=rng.randint(1, 30), num_prior_admissions=rng.randint(0, 8),
+        oxygen_saturation=rng.uniform(80, 100), wbc_count=rng.uniform(2, 25), crp_level=rng.uniform(0, 250),
+        antibiotic_given=rng.choice([0, 1]), icu_admission=rng.choice([0, 1]),
+        # only the dispositions the encoder was fitted on
+        discharge_disposition=rng.choice([d for d in choice_of(PneumoniaInput, "discharge_disposition")
+                                          if d in encoders["discharge_disposition"].classes_]),
+        comorbidities=",".join(rng.sample(comorb, rng.randint(1, 3)) + (["Unknown"] if rng.random() < 0.1 else [])),
+    ).model_dump()
+
+
+def heart_failure_record(rng, i):
+    return HeartFailureInput(
+        patient_id=f"H{i}", Age=rng.randint(30, 99), Gender=rng.choice(choice_of(HeartFailureInput, "Gender")),
+        Ethnicity=rng.choice(choice_of(HeartFailureInput, "Ethnicity")), Length_of_Stay=rng.randint(1, 25),
+        Previous_Admissions=rng.randint(0, 6),
+        Discharge_Disposition=rng.choice(choice_of(HeartFailureInput, "Discharge_Disposition")),
+        Pulse=rng.randint(40, 140), Temperature=rng.uniform(35, 40.5), Heart_Rate=rng.randint(40, 150),
+        Systolic_BP=rng.randint(80, 200), Diastolic_BP=rng.randint(40, 120), Respiratory_Rate=rng.randint(8, 35),
+        BUN=rng.uniform(5, 80), Creatinine=rng.uniform(0.4, 6), Sodium=rng.randint(120, 155),
+        Hemoglobin=rng.uniform(7, 18), NT_proBNP=rng.uniform(50, 20000), Ejection_Fraction=rng.randint(10, 75),
+    ).model_dump()
+
+
+def diabetes_record(rng, i):
+    encoders = get_model("diabetes").encoders
+    labels = {col: encoders[col].classes_.tolist() for col in ("diag_1", "diag_2", "diag_3", "diabetesMed")}
+    fields = {
+        field: rng.choice(choice_of(DiabetesInput, field))
+        for field in ("metformin", "glipizide", "glyburide", "race", "gender", "max_glu_serum",
+                      "A1Cresult", "insulin", "change", "medical_specialty")
+    }
+    return DiabetesInput(
+        patient_id=f"D{i}", time_in_hospital=rng.uniform(1, 14), time_in_hospital_max=rng.randint(1, 14),
+        num_lab_procedures=rng.uniform(1, 120), num_procedures=rng.uniform(0, 6),
+        num_medications_mean=rng.uniform(1, 60), number_outpatient_sum=rng.randint(0, 10),
+        number_emergency=rng.randint(0, 5), number_inpatient=rng.randint(0, 8),
+        number_diagnoses=rng.uniform(1, 16), admission_type_id=rng.randint(1, 8),
+        discharge_disposition_id=rng.randint(1, 28), admission_source_id=rng.randint(1, 25),
+        diag_1=rng.choice(labels["diag_1"]), diag_2=rng.choice(labels["diag_2"]), diag_3=rng.choice(labels["diag_3"]),
+        age=rng.randint(0, 99), diabetesMed=rng.choice(labels["diabetesMed"]), **fields,
+    ).model_dump()
+
+
+RECORDS = {
+    "pneumonia": pneumonia_record,
+    "heart_failure": heart_failure_record,
+    "diabetes": diabetes_record,
+}
+
+
+def check(disease: str, rows: int, rng: random.Random) -> bool:
+    artifacts = get_model(disease)
+    records = [RECORDS[disease](rng, i) for i in range(rows)]
+    reference = REFERENCE[disease](artifacts, records)
+    X = artifacts.pipeline.transform(records)
+
+    ok = list(reference.columns) == artifacts.pipeline.feature_names
+    ok &= np.array_equal(reference.to_numpy(dtype=np.float64).astype(X.dtype), X)
+    ok &= np.array_equal(artifacts.model.predict_proba(reference), artifacts.predict_proba(X))
+    # SHAP on a few rows (single-row, as the endpoints use it)
+    for i in range(min(rows, 5)):
+        ok &= compute_shap(artifacts, reference.iloc[[i]]) == compute_shap(artifacts, X[i:i + 1])
+    print(f"{disease:<14} rows={rows:<6} {'OK' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    results = [check(disease, args.rows, rng) for disease in REFERENCE]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
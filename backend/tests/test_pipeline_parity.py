@@ -0,0 +1,50 @@
+"""
+The compiled NumPy feature pipelines (app/services/feature_pipeline.py)
+must reproduce the legacy pandas preprocessing exactly: same columns, same
+feature matrix, same predict_proba and same SHAP values, on random inputs
+covering every categorical level. Uses the models in MODELS_DIR. Run from
+backend/:
+
+    python -m unittest tests.test_pipeline_parity
+"""
+import random
+import unittest
+import numpy as np
+from app.services.feature_pipeline import array_input
+from app.services.model_registry import get_model
+from app.services.shap_service import compute_shap
+from scripts.check_pipeline_parity import RECORDS, REFERENCE
+
+ROWS = 200
+SHAP_ROWS = 5
+
+
+class PipelineParityTest(unittest.TestCase):
+
+    def check(self, disease: str):
+        artifacts = get_model(disease)
+        rng = random.Random(0)
+        records = [RECORDS[disease](rng, i) for i in range(ROWS)]
+        reference = REFERENCE[disease](artifacts, records)
+        X = artifacts.pipeline.transform(records)
+
+        self.assertEqual(list(reference.columns), artifacts.pipeline.feature_names)
+        np.testing.assert_array_equal(reference.to_numpy(dtype=np.float64).astype(X.dtype), X)
+        with array_input():
+            np.testing.assert_array_equal(artifacts.model.predict_proba(reference), artifacts.predict_proba(X))
+        # single-row SHAP, as the endpoints use it
+        for i in range(SHAP_ROWS):
+            self.assertEqual(compute_shap(artifacts, reference.iloc[[i]]), compute_shap(artifacts, X[i:i + 1]))
+
+    def test_pneumonia(self):
+        self.check("pneumonia")
+
+    def test_heart_failure(self):
+        self.check("heart_failure")
+
+    def test_diabetes(self):
+        self.check("diabetes")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,70 +1,22 @@
-import React, {
-  useContext,
-  useState,
-  useEffect,
-  useMemo,
-  useCallback,
-} from "react";
+import React, { useContext, useState } from "react";
 import { AuthContext } from "../context/AuthContext";
+import { useNotifications } from "../hooks/use-notifications";
 import { Link } from "react-router-dom";
 import { FaBell } from "react-icons/fa";
 
 const Header = () => {
   const { user, logout } = useContext(AuthContext);
-  const [notifications, setNotifications] = useState([]);
   const [isPopoverOpen, setIsPopoverOpen] = useState(false);
 
-  // --- API Configuration ---
-  const BASE_URL = process.env.REACT_APP_API_BASE_URL;
   const token = JSON.parse(localStorage.getItem("user"))?.token;
-
-  // --- Data Fetching ---
-  const fetchNotifications = useCallback(async () => {
-    if (!token) return;
-    try {
-      const res = await fetch(`${BASE_URL}/my-notifications`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      if (!res.ok) throw new Error("Failed to fetch notifications.");
-      const data = await res.json();
-      setNotifications(Array.isArray(data) ? data : []);
-    } catch (error) {
-      console.error("Notification fetch error:", error);
-      setNotifications([]); // Reset on error
-    }
-  }, [token, BASE_URL]);
-
-  useEffect(() => {
-    // Fetch notifications on component mount and then every 30 seconds
-    fetchNotifications();
-    const interval = setInterval(fetchNotifications, 30000);
-    return () => clearInterval(interval);
-  }, [fetchNotifications]);
-
-  // --- Unread Count Calculation ---
-  const unreadCount = useMemo(() => {
-    if (!user?.id || !notifications.length) return 0;
-    return notifications.filter((n) => !n.read_by.includes(user.id)).length;
-  }, [notifications, user?.id]);
+  const { notifications, unreadCount, hasMore, loadMore, markAllAsRead } =
+    useNotifications(token);
 
   // --- Mark as Read Logic ---
   const handleMarkAllAsRead = async () => {
     if (!token || unreadCount === 0) return;
-
-    const unreadNotifications = notifications.filter(
-      (n) => !n.read_by.includes(user.id)
-    );
-
-    const markAsReadPromises = unreadNotifications.map((n) =>
-      fetch(`${BASE_URL}/mark-as-read/${n.id}`, {
-        method: "POST",
-        headers: { Authorization: `Bearer ${token}` },
-      })
-    );
-
     try {
-      await Promise.all(markAsReadPromises);
-      await fetchNotifications(); // Refresh the list
+      await markAllAsRead();
       setIsPopoverOpen(false); // Close popover after marking as read
     } catch (error) {
       console.error("Failed to mark all as read:", error);
@@ -141,6 +93,14 @@ const Header = () => {
                     No notifications yet.
                   </p>
                 )}
+                {hasMore && (
+                  <button
+                    onClick={loadMore}
+                    className="w-full p-2 text-sm text-blue-600 hover:underline"
+                  >
+                    Load older notifications
+                  </button>
+                )}
               </div>
             </div>
           )}
@@ -7,6 +7,8 @@ import React, {
   useMemo,
 } from "react";
 
+const PATIENT_PAGE_SIZE = 1000; // /patients/list maximum
+
 /* ---------- Context ---------- */
 const GlobalContext = createContext();
 
@@ -20,40 +22,65 @@ export const GlobalProvider = ({ children }) => {
   });
   const [loading, setLoading] = useState(true);
 
-  const token = JSON.parse(localStorage.getItem("user"))?.token;
+  const storedUser = JSON.parse(localStorage.getItem("user"));
+  const token = storedUser?.token;
+  const isAdmin = storedUser?.role === "admin";
   const BASE_URL = process.env.REACT_APP_API_BASE_URL;
 
-  /* Fetch everything from /patients/all */
-  const fetchAll = useCallback(async () => {
-    setLoading(true);
-    try {
-      const res = await fetch(`${BASE_URL}/patients/all`, {
+  /* Every patient, page by page from the keyset-paginated /patients/list
+     (light columns only; clinical_info comes with /patients/{id}) */
+  const fetchPatients = useCallback(async () => {
+    const all = [];
+    let cursor = null;
+    do {
+      const query = new URLSearchParams({ limit: PATIENT_PAGE_SIZE });
+      if (cursor) query.set("cursor", cursor);
+      const res = await fetch(`${BASE_URL}/patients/list?${query}`, {
         headers: { Authorization: `Bearer ${token}` },
       });
       if (!res.ok) throw new Error("Fetch failed");
-      const data = await res.json();
+      const page = await res.json();
+      all.push(...page.items);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return all;
+  }, [token, BASE_URL]);
 
-      /* backend delivers:
-         {
-           patients_details: [...] ,
-           user_details:     [...] ,
-           pending_tasks_count: n ,
-           escalations_count:   n
-         }
-      */
-      setLoading(false);
-      setPatients(data.patients_details);
-      setUsers(data.user_details);
-      setCounts({
-        pendingTasks: data.pending_tasks_count,
-        escalations: data.escalations_count,
+  const fetchJson = useCallback(
+    async (path) => {
+      const res = await fetch(`${BASE_URL}${path}`, {
+        headers: { Authorization: `Bearer ${token}` },
       });
+      if (!res.ok) throw new Error("Fetch failed");
+      return res.json();
+    },
+    [token, BASE_URL]
+  );
+
+  /* Patients for everyone; assignable users and dashboard counters for admins */
+  const fetchAll = useCallback(async () => {
+    setLoading(true);
+    try {
+      const [patientList, userList, summary] = await Promise.all([
+        fetchPatients(),
+        isAdmin ? fetchJson("/auth/users") : [],
+        isAdmin ? fetchJson("/patients/summary") : null,
+      ]);
+      setLoading(false);
+      setPatients(patientList);
+      setUsers(userList);
+      if (summary) {
+        setCounts({
+          pendingTasks: summary.pending_tasks,
+          escalations: summary.pending_escalations,
+        });
+      }
     } catch (err) {
       console.error("GlobalContext fetch error:", err);
     } finally {
       setLoading(false);
     }
-  }, [token, BASE_URL]);
+  }, [isAdmin, fetchPatients, fetchJson]);
 
   useEffect(() => {
     if (token) {
@@ -0,0 +1,129 @@
+import { useState, useEffect, useCallback, useRef } from "react";
+
+const POLL_INTERVAL_MS = 30000;
+
+// The current user's notification inbox: /my-notifications is paged (newest
+// first, X-Next-Cursor points at the next page), so the unread badge comes
+// from /my-notifications/unread-count and "mark all as read" is one call to
+// /mark-all-read rather than being worked out from the loaded page. New
+// notifications arrive over the /my-notifications/stream SSE stream; polling
+// only runs while the stream is not connected (or EventSource is missing).
+export function useNotifications(token) {
+  const [notifications, setNotifications] = useState([]);
+  const [unreadCount, setUnreadCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const streaming = useRef(false);
+
+  const BASE_URL = process.env.REACT_APP_API_BASE_URL;
+
+  const fetchPage = useCallback(
+    async (cursor) => {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await fetch(`${BASE_URL}/my-notifications${query}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (!res.ok) throw new Error("Failed to fetch notifications.");
+      const data = await res.json();
+      return {
+        items: Array.isArray(data) ? data : [],
+        next: res.headers.get("X-Next-Cursor"),
+      };
+    },
+    [token, BASE_URL]
+  );
+
+  const fetchUnreadCount = useCallback(async () => {
+    const res = await fetch(`${BASE_URL}/my-notifications/unread-count`, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!res.ok) throw new Error("Failed to fetch unread count.");
+    const data = await res.json();
+    setUnreadCount(data.unread ?? 0);
+  }, [token, BASE_URL]);
+
+  // first page and unread count; older pages are loaded on demand
+  const fetchNotifications = useCallback(async () => {
+    if (!token) return;
+    try {
+      const [{ items, next }] = await Promise.all([
+        fetchPage(null),
+        fetchUnreadCount(),
+      ]);
+      setNotifications(items);
+      setNextCursor(next);
+    } catch (error) {
+      console.error("Notification fetch error:", error);
+      setNotifications([]);
+      setNextCursor(null);
+      setUnreadCount(0);
+    }
+  }, [token, fetchPage, fetchUnreadCount]);
+
+  const loadMore = useCallback(async () => {
+    if (!token || !nextCursor) return;
+    try {
+      const { items, next } = await fetchPage(nextCursor);
+      setNotifications((prev) => [...prev, ...items]);
+      setNextCursor(next);
+    } catch (error) {
+      console.error("Notification fetch error:", error);
+    }
+  }, [token, nextCursor, fetchPage]);
+
+  const markAllAsRead = useCallback(async () => {
+    if (!token) return;
+    const res = await fetch(`${BASE_URL}/mark-all-read`, {
+      method: "POST",
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!res.ok) throw new Error("Failed to mark all as read.");
+    await fetchNotifications(); // Refresh the list
+  }, [token, BASE_URL, fetchNotifications]);
+
+  useEffect(() => {
+    // Fetch notifications on mount and then every 30 seconds unless streaming
+    fetchNotifications();
+    const interval = setInterval(() => {
+      if (!streaming.current) fetchNotifications();
+    }, POLL_INTERVAL_MS);
+    return () => clearInterval(interval);
+  }, [fetchNotifications]);
+
+  useEffect(() => {
+    if (!token || typeof EventSource === "undefined") return;
+    // EventSource cannot send headers, so the token goes in the query string;
+    // it reconnects by itself and resumes from the last event id
+    const source = new EventSource(
+      `${BASE_URL}/my-notifications/stream?access_token=${encodeURIComponent(token)}`
+    );
+    source.onopen = () => {
+      streaming.current = true;
+    };
+    source.onerror = () => {
+      streaming.current = false;
+    };
+    source.addEventListener("notification", (e) => {
+      const notification = JSON.parse(e.data);
+      setNotifications((prev) =>
+        prev.some((n) => n.id === notification.id)
+          ? prev
+          : [notification, ...prev]
+      );
+      setUnreadCount((count) => count + 1);
+    });
+    // too many missed while disconnected: reload the first page and count
+    source.addEventListener("resync", () => fetchNotifications());
+    return () => {
+      streaming.current = false;
+      source.close();
+    };
+  }, [token, BASE_URL, fetchNotifications]);
+
+  return {
+    notifications,
+    unreadCount,
+    hasMore: Boolean(nextCursor),
+    loadMore,
+    markAllAsRead,
+  };
+}
@@ -1,12 +1,7 @@
-import React, {
-  useState,
-  useContext,
-  useEffect,
-  useCallback,
-  useMemo,
-} from "react";
+import React, { useState, useContext, useEffect } from "react";
 import { Link } from "react-router-dom";
 import { AuthContext } from "../context/AuthContext";
+import { useNotifications } from "../hooks/use-notifications";
 import { motion, AnimatePresence } from "framer-motion";
 import {
   UserCheck,
@@ -33,55 +28,16 @@ const AdminDashboard = () => {
   const [darkMode, setDarkMode] = useState(false);
 
   // --- Notification Logic ---
-  const [notifications, setNotifications] = useState([]);
   const [isPopoverOpen, setIsPopoverOpen] = useState(false);
-  const BASE_URL = process.env.REACT_APP_API_BASE_URL;
   const token = user?.token;
-
-  const fetchNotifications = useCallback(async () => {
-    if (!token) return;
-    try {
-      const res = await fetch(`${BASE_URL}/my-notifications`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      if (!res.ok) throw new Error("Failed to fetch notifications.");
-      const data = await res.json();
-      setNotifications(Array.isArray(data) ? data : []);
-    } catch (error) {
-      console.error("Notification fetch error:", error);
-      setNotifications([]);
-    }
-  }, [token, BASE_URL]);
-
-  useEffect(() => {
-    fetchNotifications();
-    const interval = setInterval(fetchNotifications, 30000); // Poll every 30 seconds
-    return () => clearInterval(interval);
-  }, [fetchNotifications]);
-
-  const unreadCount = useMemo(() => {
-    if (!user?.id || !notifications.length) return 0;
-    return notifications.filter((n) => !n.read_by.includes(user.id)).length;
-  }, [notifications, user?.id]);
+  const { notifications, unreadCount, hasMore, loadMore, markAllAsRead } =
+    useNotifications(token);
 
   // --- Mark as Read Logic ---
   const handleMarkAllAsRead = async () => {
     if (!token || unreadCount === 0) return;
-
-    const unreadNotifications = notifications.filter(
-      (n) => !n.read_by.includes(user.id)
-    );
-
-    const markAsReadPromises = unreadNotifications.map((n) =>
-      fetch(`${BASE_URL}/mark-as-read/${n.id}`, {
-        method: "POST",
-        headers: { Authorization: `Bearer ${token}` },
-      })
-    );
-
     try {
-      await Promise.all(markAsReadPromises);
-      await fetchNotifications(); // Refresh the list
+      await markAllAsRead();
       setIsPopoverOpen(false); // Close popover after marking as read
     } catch (error) {
       console.error("Failed to mark all as read:", error);
@@ -212,6 +168,14 @@ const AdminDashboard = () => {
                           You're all caught up!
                         </p>
                       )}
+                      {hasMore && (
+                        <button
+                          onClick={loadMore}
+                          className="w-full p-2 text-sm text-blue-600 hover:underline"
+                        >
+                          Load older notifications
+                        </button>
+                      )}
                     </div>
                   </div>
                 )}
@@ -74,7 +74,11 @@ const fieldTypeParsers = {
   },
 };
 const cleanedExplanation = (explanation) =>
-  explanation.replace(/^```html/, "").replace(/```$/, "");
+  explanation
+    ? explanation.replace(/^```html/, "").replace(/```$/, "")
+    : "<p>Generating explanation…</p>";
+
+const EXPLANATION_POLL_MS = 1500;
 
 const parseFieldValue = (condition, field, value) => {
   if (fieldTypeParsers[condition].int.includes(field))
@@ -262,10 +266,23 @@ const PredictionForm = () => {
     }
   };
 
-  const handleSelectPatient = (patient) => {
+  // /patients/list rows carry no clinical_info; load it from the patient's record
+  const handleSelectPatient = async (patient) => {
+    let clinicalInfo = {};
+    try {
+      const token = JSON.parse(localStorage.getItem("user"))?.token;
+      const BASE_URL =
+        process.env.REACT_APP_API_BASE_URL || "http://localhost:8000";
+      const res = await fetch(`${BASE_URL}/patients/${patient.patient_id}`, {
+        headers: { ...(token && { Authorization: `Bearer ${token}` }) },
+      });
+      if (res.ok) clinicalInfo = (await res.json()).clinical_info || {};
+    } catch (error) {
+      console.error("Patient fetch error:", error);
+    }
     const selectedData = {};
     const flatPatientData = {
-      ...patient.clinical_info,
+      ...clinicalInfo,
       ...patient,
     };
     displayOrder[condition].forEach((field) => {
@@ -279,6 +296,30 @@ const PredictionForm = () => {
     setSuggestions([]);
   };
 
+  // Explanations are generated in the background; poll until ready
+  const pollExplanation = async (BASE_URL, token, explanationId) => {
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, EXPLANATION_POLL_MS));
+      const res = await fetch(`${BASE_URL}/predict/explanations/${explanationId}`, {
+        headers: { ...(token && { Authorization: `Bearer ${token}` }) },
+      });
+      if (!res.ok) return;
+      const job = await res.json();
+      if (job.status === "ready" || job.status === "failed") {
+        setPredictionOutput((prev) =>
+          prev && prev.explanation_id === explanationId
+            ? {
+                ...prev,
+                explanation:
+                  job.explanation || "<p>Explanation is unavailable.</p>",
+              }
+            : prev
+        );
+        return;
+      }
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setIsLoading(true);
@@ -329,6 +370,9 @@ const PredictionForm = () => {
       }
       const result = await res.json();
       setPredictionOutput(result);
+      if (!result.explanation && result.explanation_id) {
+        pollExplanation(BASE_URL, token, result.explanation_id);
+      }
     } catch (err) {
       setError(err);
     } finally {